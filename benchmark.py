@@ -0,0 +1,282 @@
+"""
+Benchmark harness for image_to_pdf.py.
+
+Generates a reproducible corpus of synthetic transcript and degree scans,
+with text drawn at the same coordinates the converter crops, then times:
+
+  - generate_filename() on the known field text
+  - Search Mode over the corpus, with a cold and then a warm OCR index
+  - Bulk Convert Mode into a scratch output folder, once per OCR profile
+
+and reports throughput, per-file latency percentiles and peak RSS for each,
+plus the total size of the PDFs each OCR profile wrote.
+
+    python benchmark.py                      # corpora of 20 and 100 scans
+    python benchmark.py --sizes 500 --workers 16 --single-pass --json bench.json
+    python benchmark.py --sizes 50 --ocr-profiles fast archival
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+
+try:
+    import resource  # peak RSS; not available on Windows
+except ImportError:
+    resource = None
+
+from PIL import Image, ImageDraw, ImageFont
+
+# Keep the benchmark's OCR index and thumbnails away from the user's cache.
+# Must be set before image_to_pdf is imported (CACHE_DIR is read at import).
+_SCRATCH = tempfile.mkdtemp(prefix="image_to_pdf_bench_")
+os.environ["IMAGE_TO_PDF_CACHE_DIR"] = os.path.join(_SCRATCH, "cache")
+
+import image_to_pdf  # noqa: E402
+
+# Synthetic page: US Letter at 300 DPI, which is what the crop coordinates assume
+PAGE_SIZE = (2550, 3300)
+PAGE_DPI = 300
+
+LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis",
+              "Rodriguez", "Martinez", "Hernandez", "Lopez", "Wilson", "Anderson", "Thomas", "Moore"]
+FIRST_NAMES = ["John", "Mary", "Robert", "Patricia", "Michael", "Linda", "William", "Barbara",
+               "David", "Susan", "Richard", "Jessica", "Joseph", "Sarah", "Charles", "Karen"]
+COURSES = ["Arts", "Science", "Nursing", "Education", "Engineering", "Business Administration"]
+MONTHS = ["January", "February", "March", "April", "May", "June", "July", "August",
+          "September", "October", "November", "December"]
+
+FONT_CANDIDATES = [
+    "DejaVuSans.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/Library/Fonts/Arial.ttf",
+    "C:\\Windows\\Fonts\\arial.ttf",
+]
+
+
+def load_font(size=40):
+    """A scalable font at size px — a system TrueType font if one is found, else Pillow's built-in."""
+    for candidate in FONT_CANDIDATES:
+        try:
+            return ImageFont.truetype(candidate, size)
+        except OSError:
+            continue
+    return ImageFont.load_default(size=size)
+
+
+def random_date(rng, start_year, end_year):
+    return f"{rng.choice(MONTHS)} {rng.randint(1, 28)}, {rng.randint(start_year, end_year)}"
+
+
+def make_document(rng, font, max_skew=0.0):
+    """Return (image, fields) for one synthetic transcript or degree, rotated by up to max_skew degrees."""
+    last, first = rng.choice(LAST_NAMES), rng.choice(FIRST_NAMES)
+    middle = rng.choice("ABCDEFGHJKLMNPRSTW")
+    course = rng.choice(COURSES)
+    admission = random_date(rng, 1960, 1985)
+    graduation = random_date(rng, 1964, 1989)
+    is_degree = rng.random() < 0.5
+
+    fields = {
+        "name": f"{last}, {first} {middle}.",
+        "admission": f"Date of Admission\n{admission}" if not is_degree else "",
+        "graduation": graduation if is_degree else "",
+        "degree": (f"Graduated Received\nDegree Received: {course}" if is_degree
+                   else f"Degree Received: {course}"),
+    }
+
+    img = Image.new("L", PAGE_SIZE, color=255)
+    draw = ImageDraw.Draw(img)
+    draw.text((200, 80), "STATE UNIVERSITY — OFFICE OF THE REGISTRAR", font=font, fill=0)
+    for field, text in fields.items():
+        left, top = image_to_pdf.FIELD_REGIONS[field][:2]
+        if text:
+            draw.multiline_text((left + 8, top + 8), text, font=font, fill=0, spacing=12)
+
+    # Body text below the field area, so full-page OCR has realistic work to do
+    for row in range(40):
+        y = 700 + row * 60
+        line = " ".join(rng.choice(["Course", "Credit", "Grade", "Term", "Hours", "Honors", "Pass"])
+                        for _ in range(8))
+        draw.text((318, y), f"{line}  {rng.randint(1960, 1989)}", font=font, fill=0)
+    if max_skew:
+        # Scanner feeders rarely put a page in perfectly straight
+        img = img.rotate(rng.uniform(-max_skew, max_skew), resample=Image.BICUBIC, fillcolor=255)
+    return img, fields
+
+
+def generate_corpus(folder, count, seed=0, fmt="jpg", max_skew=0.0):
+    """Write count synthetic scans into folder (spread over a few subfolders). Returns ground truth."""
+    rng = random.Random(seed)
+    font = load_font()
+    truth = {}
+    for i in range(count):
+        img, fields = make_document(rng, font, max_skew)
+        sub = Path(folder) / f"box{i % 5:02d}"
+        sub.mkdir(parents=True, exist_ok=True)
+        path = sub / f"scan_{i:05d}.{fmt}"
+        if fmt == "jpg":
+            img.save(path, quality=85, dpi=(PAGE_DPI, PAGE_DPI))
+        else:
+            img.save(path, dpi=(PAGE_DPI, PAGE_DPI))
+        truth[str(path)] = fields
+    return truth
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process and of its largest child, in MB (None if unknown)."""
+    if resource is None:
+        return None, None
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024   # bytes on macOS, KB elsewhere
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / divisor
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / divisor
+    return round(own, 1), round(children, 1)
+
+
+def summarize(name, size, seconds, files, metrics=None):
+    own, children = peak_rss_mb()
+    result = {
+        "benchmark": name,
+        "corpus": size,
+        "wall_s": round(seconds, 3),
+        "files_per_s": round(files / seconds, 2) if seconds else 0.0,
+        "peak_rss_mb": own,
+        "peak_child_rss_mb": children,
+    }
+    if metrics:
+        result["stages"] = {
+            stage: {"p50_s": stats["p50_s"], "p90_s": stats["p90_s"], "p99_s": stats["p99_s"]}
+            for stage, stats in metrics["stages"].items()
+        }
+        result["pages_per_s"] = metrics["pages_per_s"]
+    return result
+
+
+def folder_size_mb(folder):
+    return round(sum(p.stat().st_size for p in Path(folder).rglob("*.pdf")) / (1024 * 1024), 2)
+
+
+def bench_generate_filename(truth, repeat=200):
+    texts = list(truth.values())
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for fields in texts:
+            image_to_pdf.generate_filename(
+                fields["name"], fields["admission"], fields["graduation"], fields["degree"],
+                "fallback", log=lambda message: None,
+            )
+    elapsed = time.perf_counter() - start
+    calls = repeat * len(texts)
+    result = summarize("generate_filename", len(texts), elapsed, calls)
+    result["latency_us"] = round(elapsed / calls * 1e6, 2)
+    return result
+
+
+def run_engine(engine, func, *args):
+    """Run an engine call and return (seconds, last metrics report, return value)."""
+    events = []
+    engine.progress = events.append
+    engine.reset()
+    start = time.perf_counter()
+    value = func(*args)
+    elapsed = time.perf_counter() - start
+    metrics = [event for event in events if event["event"] == "metrics"]
+    return elapsed, (metrics[-1] if metrics else None), value
+
+
+def bench_corpus(size, args, quiet):
+    corpus = Path(_SCRATCH) / f"corpus_{size}"
+    truth = generate_corpus(corpus, size, seed=args.seed, fmt=args.format, max_skew=args.skew)
+    results = [bench_generate_filename(truth)]
+
+    engine = image_to_pdf.ConversionEngine(
+        input_path=str(corpus), workers=args.workers, single_pass=args.single_pass, resume=False, log=quiet,
+    )
+    name = next(iter(truth.values()))["name"].split(",")[0]
+    for label in ("search (cold index)", "search (warm index)"):
+        elapsed, metrics, _ = run_engine(engine, engine.search, name)
+        results.append(summarize(label, size, elapsed, size, metrics))
+
+    if not args.skip_bulk:
+        # Single-pass conversion does not run ocrmypdf, so the profiles make no difference there
+        for ocr_profile in [None] if args.single_pass else args.ocr_profiles:
+            output = Path(_SCRATCH) / f"output_{size}_{ocr_profile or 'single_pass'}"
+            shutil.rmtree(output, ignore_errors=True)
+            output.mkdir(parents=True)
+            engine.output_path = str(output)
+            engine.ocr_profile = ocr_profile
+            elapsed, metrics, summary = run_engine(engine, engine.bulk_convert)
+            label = f"bulk convert ({ocr_profile})" if ocr_profile else "bulk convert"
+            result = summarize(label, size, elapsed, summary["converted"], metrics)
+            result["errors"] = summary["errors"]
+            result["ocr_profile"] = ocr_profile
+            result["output_mb"] = folder_size_mb(output)
+            results.append(result)
+    return results
+
+
+def print_table(results):
+    header = (f"{'benchmark':<26}{'corpus':>8}{'wall s':>10}{'files/s':>10}{'p50 ms':>10}{'p90 ms':>10}"
+              f"{'RSS MB':>9}{'PDF MB':>9}")
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        stages = r.get("stages", {})
+        # Per-file latency: the sum of the stage percentiles is a close upper bound
+        p50 = sum(s["p50_s"] for s in stages.values()) * 1000 if stages else r.get("latency_us", 0) / 1000
+        p90 = sum(s["p90_s"] for s in stages.values()) * 1000 if stages else r.get("latency_us", 0) / 1000
+        rss = r["peak_rss_mb"] if r["peak_rss_mb"] is not None else float("nan")
+        pdf_mb = f"{r['output_mb']:>9.2f}" if "output_mb" in r else f"{'':>9}"
+        print(f"{r['benchmark']:<26}{r['corpus']:>8}{r['wall_s']:>10.2f}{r['files_per_s']:>10.2f}"
+              f"{p50:>10.1f}{p90:>10.1f}{rss:>9.1f}{pdf_mb}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark search and conversion on a synthetic corpus.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 100], help="corpus sizes (default: 20 100)")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="worker processes for bulk conversion (default: CPU count)")
+    parser.add_argument("--single-pass", action="store_true", help="benchmark the single OCR pass pipeline")
+    parser.add_argument("--skip-bulk", action="store_true", help="only benchmark filename generation and search")
+    parser.add_argument("--format", choices=["jpg", "png", "tif"], default="jpg", help="scan format (default: jpg)")
+    parser.add_argument("--seed", type=int, default=0, help="corpus random seed (default: 0)")
+    parser.add_argument("--skew", type=float, default=1.5,
+                        help="rotate each scan by up to this many degrees (default: 1.5)")
+    parser.add_argument("--ocr-profiles", nargs="+", metavar="NAME", default=list(image_to_pdf.OCR_PROFILES),
+                        choices=list(image_to_pdf.get_ocr_profiles()[0]),
+                        help="OCR profiles to compare in the bulk convert run "
+                             f"(default: {' '.join(image_to_pdf.OCR_PROFILES)})")
+    parser.add_argument("--json", metavar="PATH", help="also write the results as JSON")
+    parser.add_argument("--keep", action="store_true", help="keep the generated corpus and output")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show the converter's log")
+    args = parser.parse_args(argv)
+    image_to_pdf.check_dependencies()
+
+    quiet = print if args.verbose else (lambda message: None)
+    results = []
+    try:
+        for size in args.sizes:
+            print(f"Benchmarking a corpus of {size} scan(s)...", flush=True)
+            results.extend(bench_corpus(size, args, quiet))
+    finally:
+        if args.keep:
+            print(f"Corpus and output kept in {_SCRATCH}")
+        else:
+            shutil.rmtree(_SCRATCH, ignore_errors=True)
+
+    print()
+    print_table(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump({"workers": args.workers, "single_pass": args.single_pass, "results": results}, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,7 +2,7 @@
 Image to PDF Converter
 ----------------------
 Requires system tools:  tesseract, ghostscript, poppler
-Requires Python pkgs:   ocrmypdf, pytesseract, Pillow, pdf2image
+Requires Python pkgs:   ocrmypdf, pytesseract, Pillow, pdf2image, numpy
 
 Run the platform installer first if you haven't already:
   Windows : install_windows.bat
@@ -10,9 +10,13 @@ Run the platform installer first if you haven't already:
   Linux   : bash install_linux.sh
 """
 
+import os
 import sys
+import json
+import shutil
 import subprocess
-import importlib
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
 
 
 def _check_python_version():
@@ -24,23 +28,63 @@ def _check_python_version():
         sys.exit(1)
 
 
-def _check_system_tool(cmd_candidates: list) -> bool:
-    """Try each candidate command; return True if any succeeds."""
+def _probe_cache_path() -> str:
+    # Same location as CACHE_DIR below, which isn't defined yet at this point
+    root = os.environ.get("IMAGE_TO_PDF_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "image_to_pdf")
+    return os.path.join(root, "dependency_probe.json")
+
+
+def _load_probe_cache() -> dict:
+    try:
+        with open(_probe_cache_path(), encoding="utf-8") as fh:
+            cache = json.load(fh)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_probe_cache(cache: dict):
+    path = _probe_cache_path()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "w", encoding="utf-8") as fh:
+            json.dump(cache, fh, indent=1)
+        os.replace(path + ".tmp", path)
+    except OSError:
+        pass   # read-only home: probe again next time
+
+
+def _check_system_tool(cmd_candidates: list, cache: dict) -> bool:
+    """
+    Try each candidate command; return True if any succeeds.
+
+    A tool that ran successfully is remembered in cache under its resolved
+    path with its mtime and size, and isn't run again until it changes.
+    Candidates not on PATH are skipped without starting a process.
+    """
     for cmd in cmd_candidates:
+        path = shutil.which(cmd[0])
+        if path is None:
+            continue
         try:
-            subprocess.run(cmd, capture_output=True, check=True)
+            st = os.stat(path)
+        except OSError:
+            continue
+        stamp = [st.st_mtime_ns, st.st_size]
+        if cache.get(path) == stamp:
             return True
-        except (FileNotFoundError, subprocess.CalledProcessError):
+        try:
+            subprocess.run([path] + cmd[1:], capture_output=True, check=True, timeout=30)
+        except (OSError, subprocess.CalledProcessError, subprocess.TimeoutExpired):
             continue
+        cache[path] = stamp
+        return True
     return False
 
 
 def _check_python_package(package: str) -> bool:
-    try:
-        importlib.import_module(package)
-        return True
-    except ImportError:
-        return False
+    """Whether package is installed — found, not imported, so the check stays cheap."""
+    return importlib.util.find_spec(package) is not None
 
 
 def _installer_hint() -> str:
@@ -75,9 +119,14 @@ def check_dependencies():
             [["pdftoppm", "-v"], ["pdftoppm", "--version"]],
         ),
     ]
-    for label, candidates in system_tools:
-        if not any(_check_system_tool([cmd]) for cmd in candidates):
-            missing.append(label)
+    # Probes that miss the cache run in parallel
+    cache = _load_probe_cache()
+    known = dict(cache)
+    with ThreadPoolExecutor(max_workers=len(system_tools)) as pool:
+        found = list(pool.map(lambda tool: _check_system_tool(tool[1], cache), system_tools))
+    missing += [label for (label, _), ok in zip(system_tools, found) if not ok]
+    if cache != known:
+        _save_probe_cache(cache)
 
     # Python packages  (import name → pip install name)
     pkg_map = {
@@ -85,6 +134,7 @@ def check_dependencies():
         "pytesseract": "pytesseract",
         "PIL":        "Pillow",
         "pdf2image":  "pdf2image",
+        "numpy":      "numpy",
     }
     for import_name, install_name in pkg_map.items():
         if not _check_python_package(import_name):
@@ -103,18 +153,3263 @@ def check_dependencies():
         sys.exit(1)
 
 
-check_dependencies()
+# Only when launched as the app, before the imports below can fail on a missing
+# package. Importing the module (tests, benchmark.py, spawned workers) skips it.
+if __name__ == "__main__":
+    check_dependencies()
 
-import os
 import re
-import ocrmypdf
+import io
+import logging
+import logging.handlers
+import signal
+import argparse
+import cProfile
+import csv
+import pstats
+import queue
+import hashlib
+import sqlite3
+import tempfile
+import time
+import multiprocessing
+import xml.etree.ElementTree as ET
+import numpy as np
 import pytesseract
-from PIL import Image
+from PIL import Image, TiffImagePlugin
 from pathlib import Path
-from pdf2image import convert_from_path
-import tkinter as tk
 import threading
-from tkinter import filedialog, messagebox, scrolledtext
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+# ocrmypdf, pikepdf (installed with it) and pdf2image are imported where they
+# are used: ocrmypdf alone takes longer to import than the rest of startup,
+# and a search or an idle window never needs it.
+
+try:
+    import tkinter as tk
+    from tkinter import filedialog, messagebox, scrolledtext
+except ImportError:  # headless install without Tk — only the CLI is available
+    tk = None
+
+try:
+    import tesserocr  # optional: in-process Tesseract API for region OCR
+except ImportError:
+    tesserocr = None
+
+try:
+    # optional: filesystem notifications (inotify / FSEvents / ReadDirectoryChangesW) for Watch Mode
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+
+try:
+    import yaml  # optional: YAML template profiles (JSON always works)
+except ImportError:
+    yaml = None
+
+# Per-user cache location for the OCR index and other derived data
+CACHE_DIR = Path(os.environ.get("IMAGE_TO_PDF_CACHE_DIR") or Path.home() / ".cache" / "image_to_pdf")
+
+# Per-user configuration (template profiles)
+CONFIG_DIR = Path(os.environ.get("IMAGE_TO_PDF_CONFIG_DIR") or Path.home() / ".config" / "image_to_pdf")
+
+# Crop used by Search Mode to read the student name
+SEARCH_NAME_REGION = (337, 203, 727, 261)
+
+# Preview window thumbnail size
+THUMB_SIZE = (160, 160)
+
+# GUI log: the widget keeps the most recent lines, the file keeps everything
+LOG_WIDGET_MAX_LINES = 5000
+LOG_FILE = CACHE_DIR / "logs" / "image_to_pdf.log"
+LOG_FILE_MAX_BYTES = 5 * 1024 * 1024
+LOG_FILE_BACKUPS = 5
+
+
+def open_log_file(path=LOG_FILE):
+    """Return a logger writing to a rotating log file, or None if the file cannot be opened."""
+    logger = logging.getLogger("image_to_pdf")
+    if not logger.handlers:
+        try:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                path, maxBytes=LOG_FILE_MAX_BYTES, backupCount=LOG_FILE_BACKUPS, encoding="utf-8"
+            )
+        except OSError:
+            return None
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+def _default_log(message):
+    """Log sink of helpers called without one: the image_to_pdf logger, so never stdout."""
+    logging.getLogger("image_to_pdf").warning(message)
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Common OCR misreads, folded the same way in indexed tokens and in search keywords
+_OCR_CONFUSIONS = (("rn", "m"), ("vv", "w"), ("0", "o"), ("1", "l"), ("|", "l"), ("5", "s"))
+
+
+def name_tokens(text):
+    """Lower-case word tokens of text with common OCR confusions folded ("Srnith" -> "smith")."""
+    text = text.lower()
+    for wrong, right in _OCR_CONFUSIONS:
+        text = text.replace(wrong, right)
+    return re.findall(r"[^\W_]+", text)
+
+
+def trigrams(token):
+    """Trigrams of a token padded with ^ and $, so short tokens still have some."""
+    padded = f"^{token}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def max_edits(length):
+    """Edits tolerated for a keyword token of this length."""
+    return 0 if length <= 3 else 1 if length <= 7 else 2
+
+
+def edit_distance(a, b, limit):
+    """Levenshtein distance between a and b, or limit + 1 once it is known to exceed limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        current = [i]
+        for j, cb in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def token_matches(keyword, token):
+    """True if keyword occurs in token or is within max_edits() of it (both already folded)."""
+    if keyword in token:
+        return True
+    limit = max_edits(len(keyword))
+    return limit > 0 and edit_distance(keyword, token, limit) <= limit
+
+
+def count_keyword_hits(keywords, text):
+    """Number of keywords found in text — each keyword's tokens must all match some token of text."""
+    tokens = name_tokens(text)
+    hits = 0
+    for keyword in keywords:
+        parts = name_tokens(keyword)
+        if parts and all(any(token_matches(part, token) for token in tokens) for part in parts):
+            hits += 1
+    return hits
+
+
+class OCRIndex:
+    """
+    Persistent SQLite cache of OCR text per file and crop region.
+
+    Files are tracked by absolute path, size and mtime; the OCR text itself is
+    keyed by content hash, so a scan is only hashed again when its size or
+    mtime changes and only OCRed again when its contents change.
+
+    The text is also split into folded tokens (an inverted index per region)
+    with a trigram table over the token vocabulary, so match_keywords() finds
+    candidates for a keyword — including OCR misreads within a few edits —
+    without reading every file's text.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = Path(db_path) if db_path else CACHE_DIR / "ocr_index.sqlite3"
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.executescript("""
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS files (
+                path     TEXT PRIMARY KEY,
+                size     INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                sha256   TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS files_sha256 ON files (sha256);
+            CREATE TABLE IF NOT EXISTS region_text (
+                sha256 TEXT NOT NULL,
+                region TEXT NOT NULL,
+                text   TEXT NOT NULL,
+                PRIMARY KEY (sha256, region)
+            );
+            CREATE TABLE IF NOT EXISTS region_tokens (
+                region TEXT NOT NULL,
+                token  TEXT NOT NULL,
+                sha256 TEXT NOT NULL,
+                PRIMARY KEY (region, token, sha256)
+            );
+            CREATE INDEX IF NOT EXISTS region_tokens_sha256 ON region_tokens (sha256, region);
+            CREATE TABLE IF NOT EXISTS token_trigrams (
+                trigram TEXT NOT NULL,
+                token   TEXT NOT NULL,
+                PRIMARY KEY (trigram, token)
+            );
+        """)
+        # Indexes built before the token tables existed are tokenized once
+        if not self._conn.execute("SELECT 1 FROM region_tokens LIMIT 1").fetchone():
+            rows = self._conn.execute("SELECT sha256, region, text FROM region_text").fetchall()
+            with self._conn:
+                for digest, region, text in rows:
+                    self._index_tokens(digest, region, text)
+
+    @staticmethod
+    def region_key(box):
+        """Stable string key for a crop box, e.g. '337,203,727,261' (string keys are used as is)."""
+        if isinstance(box, str):
+            return box
+        return ",".join(str(int(v)) for v in box)
+
+    def digest_for(self, path):
+        """Return the content hash of path, re-hashing only if its size or mtime changed."""
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, sha256 FROM files WHERE path = ?", (path,)
+            ).fetchone()
+        if row and row[0] == st.st_size and row[1] == st.st_mtime_ns:
+            return row[2]
+
+        digest = file_digest(path)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files (path, size, mtime_ns, sha256) VALUES (?, ?, ?, ?)",
+                (path, st.st_size, st.st_mtime_ns, digest),
+            )
+        return digest
+
+    def get_text(self, path, box):
+        """Return the cached OCR text for box in path, or None if not indexed yet."""
+        digest = self.digest_for(path)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text FROM region_text WHERE sha256 = ? AND region = ?",
+                (digest, self.region_key(box)),
+            ).fetchone()
+        return row[0] if row else None
+
+    def put_text(self, path, box, text):
+        """Store the OCR text for box in path."""
+        digest = self.digest_for(path)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO region_text (sha256, region, text) VALUES (?, ?, ?)",
+                (digest, self.region_key(box), text),
+            )
+            self._index_tokens(digest, self.region_key(box), text)
+
+    def _index_tokens(self, digest, region, text):
+        """Replace the token postings of one region text (caller holds the transaction)."""
+        tokens = set(name_tokens(text))
+        self._conn.execute("DELETE FROM region_tokens WHERE sha256 = ? AND region = ?", (digest, region))
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO region_tokens (region, token, sha256) VALUES (?, ?, ?)",
+            [(region, token, digest) for token in tokens],
+        )
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO token_trigrams (trigram, token) VALUES (?, ?)",
+            [(gram, token) for token in tokens for gram in trigrams(token)],
+        )
+
+    def _region_keys(self, regions):
+        """Keys for a box, a key, or a set/list of keys (e.g. one field across template profiles)."""
+        if isinstance(regions, (set, frozenset, list)):
+            return sorted(self.region_key(region) for region in regions)
+        return [self.region_key(regions)]
+
+    def missing(self, paths, regions):
+        """Return the paths with no indexed text for regions yet, or whose file changed since."""
+        keys = self._region_keys(regions)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT f.path, f.size, f.mtime_ns FROM files f "
+                f"JOIN region_text r ON r.sha256 = f.sha256 AND r.region IN ({','.join('?' * len(keys))})",
+                keys,
+            ).fetchall()
+        indexed = {path: (size, mtime_ns) for path, size, mtime_ns in rows}
+        stale = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                stale.append(path)
+                continue
+            if indexed.get(os.path.abspath(path)) != (st.st_size, st.st_mtime_ns):
+                stale.append(path)
+        return stale
+
+    def _similar_tokens(self, part):
+        """Indexed tokens that token_matches() part, found through the trigram table."""
+        with self._lock:
+            if len(part) < 3:
+                # Too short for trigrams to narrow much; substring match on the vocabulary
+                # (tokens are alphanumeric, so part has no LIKE wildcards to escape)
+                rows = self._conn.execute(
+                    "SELECT DISTINCT token FROM token_trigrams WHERE token LIKE ?", (f"%{part}%",)
+                ).fetchall()
+                return [row[0] for row in rows]
+            grams = sorted(trigrams(part))
+            # Each edit destroys at most three trigrams; a substring keeps all unpadded ones
+            need = max(1, len(part) - 2 - 3 * max_edits(len(part)))
+            rows = self._conn.execute(
+                f"SELECT token FROM token_trigrams WHERE trigram IN ({','.join('?' * len(grams))}) "
+                "GROUP BY token HAVING COUNT(*) >= ?",
+                (*grams, need),
+            ).fetchall()
+        return [row[0] for row in rows if token_matches(part, row[0])]
+
+    def _paths_with_tokens(self, keys, tokens, chunk=500):
+        """Absolute paths whose text for any of the region keys contains any of tokens."""
+        paths = set()
+        for start in range(0, len(tokens), chunk):
+            batch = tokens[start:start + chunk]
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT DISTINCT f.path FROM region_tokens t JOIN files f ON f.sha256 = t.sha256 "
+                    f"WHERE t.region IN ({','.join('?' * len(keys))}) "
+                    f"AND t.token IN ({','.join('?' * len(batch))})",
+                    (*keys, *batch),
+                ).fetchall()
+            paths.update(row[0] for row in rows)
+        return paths
+
+    def match_keywords(self, regions, keywords, paths):
+        """
+        Return {path: number of keywords matched} for the given paths, from
+        the indexed text of regions. Same rule as count_keyword_hits(): every
+        token of a keyword must match, allowing OCR misreads.
+        """
+        keys = self._region_keys(regions)
+        wanted = {os.path.abspath(path): path for path in paths}
+        found = {}   # folded token -> absolute paths
+        scores = {}
+        for keyword in keywords:
+            matched = None
+            for part in name_tokens(keyword):
+                if part not in found:
+                    found[part] = self._paths_with_tokens(keys, self._similar_tokens(part))
+                matched = found[part] if matched is None else matched & found[part]
+            for abs_path in matched or ():
+                if abs_path in wanted:
+                    path = wanted[abs_path]
+                    scores[path] = scores.get(path, 0) + 1
+        return scores
+
+    def text_for(self, path, box, ocr_func):
+        """
+        Return the OCR text for box in path.
+        On a cache miss ocr_func() is called and its result stored.
+        Returns (text, cached).
+        """
+        text = self.get_text(path, box)
+        if text is not None:
+            return text, True
+        text = ocr_func()
+        self.put_text(path, box, text)
+        return text, False
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ThumbnailCache:
+    """
+    On-disk cache of preview thumbnails with least-recently-used eviction.
+
+    Each thumbnail is stored as a PPM file named after a hash of the source's
+    absolute path, size, mtime and the thumbnail size, so a changed scan gets
+    a new entry and the stale one simply ages out. Hits refresh the entry's
+    mtime; once the cache exceeds max_bytes the oldest entries are removed.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=None):
+        self.cache_dir = Path(cache_dir) if cache_dir else CACHE_DIR / "thumbnails"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        if max_bytes is None:
+            max_bytes = int(os.environ.get("IMAGE_TO_PDF_THUMB_CACHE_MB") or 200) * 1024 * 1024
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size = sum(entry.stat().st_size for entry in os.scandir(self.cache_dir) if entry.is_file())
+
+    def _entry(self, path, size=THUMB_SIZE):
+        st = os.stat(path)
+        key = f"{os.path.abspath(path)}\0{st.st_size}\0{st.st_mtime_ns}\0{size[0]}x{size[1]}"
+        return self.cache_dir / (hashlib.sha256(key.encode("utf-8", "surrogateescape")).hexdigest() + ".ppm")
+
+    def get(self, path, size=THUMB_SIZE):
+        """Return the cached thumbnail bytes for path, or None on a miss."""
+        entry = self._entry(path, size)
+        try:
+            data = entry.read_bytes()
+            os.utime(entry)   # mark as recently used
+        except OSError:
+            return None
+        return data
+
+    def put(self, path, data, size=THUMB_SIZE):
+        """Store thumbnail bytes for path, evicting old entries if over the cap."""
+        entry = self._entry(path, size)
+        tmp = entry.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        with self._lock:
+            try:
+                replaced = entry.stat().st_size   # overwriting an entry: count only the difference
+            except OSError:
+                replaced = 0
+            os.replace(tmp, entry)   # readers never see a partial file
+            self._size += len(data) - replaced
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Remove least recently used entries until the cache is at 90% of its cap."""
+        entries = []
+        for item in os.scandir(self.cache_dir):
+            try:
+                st = item.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime_ns, st.st_size, item.path))
+        entries.sort()
+        self._size = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 9 // 10
+        for _, size, entry_path in entries:
+            if self._size <= target:
+                break
+            try:
+                os.unlink(entry_path)
+            except OSError:
+                continue
+            self._size -= size
+
+    def thumbnail_for(self, path, make_func=None, size=THUMB_SIZE):
+        """
+        Return the thumbnail bytes for path.
+        On a cache miss make_func(path, size) (make_thumbnail by default) is
+        called and its result stored. Returns (data, cached).
+        """
+        data = self.get(path, size)
+        if data is not None:
+            return data, True
+        data = (make_func or make_thumbnail)(path, size)
+        try:
+            self.put(path, data, size)
+        except OSError:
+            pass   # a full or read-only cache must not break the preview
+        return data, False
+
+
+class DocumentCache:
+    """
+    Per-session memory of what Search Mode learned about each file: its
+    template profile, the field text it OCRed and, for likely matches, the
+    decoded first page. The year filter crops that page instead of decoding
+    the file again, and Convert Selected passes the rest to convert_file()
+    as hints, so the same files aren't detected and OCRed twice.
+
+    Entries are keyed by path and dropped when the file's size or mtime
+    changes. Decoded pages count against max_bytes and the least recently
+    used are evicted first; template and text entries are small and kept.
+    """
+
+    def __init__(self, max_bytes=None):
+        if max_bytes is None:
+            max_bytes = int(os.environ.get("IMAGE_TO_PDF_DOC_CACHE_MB") or 256) * 1024 * 1024
+        self.max_bytes = max_bytes
+        self._entries = {}
+        self._pages = OrderedDict()   # path -> decoded page, least recently used first
+        self._page_bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _stamp(path):
+        st = os.stat(path)
+        return st.st_size, st.st_mtime_ns
+
+    def _entry(self, path):
+        """The entry for path, emptied first if the file changed since it was made."""
+        path = os.path.abspath(path)
+        stamp = self._stamp(path)
+        entry = self._entries.get(path)
+        if entry is None or entry["stamp"] != stamp:
+            self._drop_page(path)
+            entry = self._entries[path] = {"stamp": stamp, "texts": {}}
+        return entry
+
+    def _drop_page(self, path):
+        page = self._pages.pop(path, None)
+        if page is not None:
+            self._page_bytes -= self._page_size(page)
+
+    @staticmethod
+    def _page_size(page):
+        return page.width * page.height * len(page.getbands())
+
+    def put_template(self, path, profile, size):
+        with self._lock:
+            self._entry(path).update(template=profile.name, size=tuple(size))
+
+    def put_texts(self, path, texts):
+        """Remember field texts ({field: text}) OCRed for path."""
+        with self._lock:
+            self._entry(path)["texts"].update(texts)
+
+    def put_page(self, path, page):
+        """Keep the decoded first page of path, evicting older pages if over the cap."""
+        size = self._page_size(page)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._entry(path)
+            path = os.path.abspath(path)
+            self._drop_page(path)
+            self._pages[path] = page
+            self._page_bytes += size
+            while self._page_bytes > self.max_bytes:
+                self._drop_page(next(iter(self._pages)))
+
+    def page(self, path):
+        """The decoded first page of path, or None."""
+        with self._lock:
+            try:
+                self._entry(path)
+            except OSError:
+                return None
+            path = os.path.abspath(path)
+            page = self._pages.get(path)
+            if page is not None:
+                self._pages.move_to_end(path)
+            return page
+
+    def hints(self, path):
+        """What convert_file() can reuse for path: {"template", "size", "texts"} (each optional), or None."""
+        with self._lock:
+            try:
+                entry = self._entry(path)
+            except OSError:
+                return None
+            hints = {key: entry[key] for key in ("template", "size") if key in entry}
+            texts = {field: text for field, text in entry["texts"].items() if text.strip()}
+            if texts:
+                hints["texts"] = texts
+            return hints or None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._pages.clear()
+            self._page_bytes = 0
+
+
+def _percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))   # ceil without floats
+    return sorted_values[int(rank) - 1]
+
+
+def _timed(timings, stage, func, *args, **kwargs):
+    """Call func, adding its run time in seconds to timings[stage]."""
+    start = time.perf_counter()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - start
+
+
+class RunMetrics:
+    """
+    Per-stage timings and counters for one search, bulk, watch or convert run.
+
+    Stages report seconds per file (see convert_file()'s "timings"), so the
+    same numbers can come back from worker processes. report() turns them
+    into percentiles, throughput and the slowest files; write() appends the
+    report to a .jsonl or .csv file so runs can be compared over time.
+    """
+
+    OUTLIER_FACTOR = 3    # a file is an outlier when it takes this many times the median
+    MAX_OUTLIERS = 20
+
+    def __init__(self, run):
+        self.run = run
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self.stages = {}      # stage -> [seconds, ...]
+        self.files = []       # (path, total seconds, {stage: seconds})
+        self.counters = {}
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def add_file(self, path, timings, ok=True, pages=1):
+        """Record the stage timings of one processed file."""
+        with self._lock:
+            for stage, seconds in timings.items():
+                self.stages.setdefault(stage, []).append(seconds)
+            self.files.append((str(path), sum(timings.values()), dict(timings)))
+            key = "files_ok" if ok else "files_failed"
+            self.counters[key] = self.counters.get(key, 0) + 1
+            if ok:
+                self.counters["pages"] = self.counters.get("pages", 0) + pages
+
+    def report(self):
+        """Return the run summary as a JSON-serialisable dict."""
+        with self._lock:
+            wall = time.perf_counter() - self._start
+            stages = {}
+            for stage, samples in self.stages.items():
+                samples = sorted(samples)
+                stages[stage] = {
+                    "count": len(samples),
+                    "total_s": round(sum(samples), 4),
+                    "mean_s": round(sum(samples) / len(samples), 4),
+                    "p50_s": round(_percentile(samples, 50), 4),
+                    "p90_s": round(_percentile(samples, 90), 4),
+                    "p99_s": round(_percentile(samples, 99), 4),
+                    "max_s": round(samples[-1], 4),
+                }
+            median = _percentile(sorted(total for _, total, _ in self.files), 50)
+            outliers = sorted(
+                (f for f in self.files if median and f[1] > median * self.OUTLIER_FACTOR),
+                key=lambda f: f[1], reverse=True,
+            )[:self.MAX_OUTLIERS]
+            pages = self.counters.get("pages", 0)
+            return {
+                "run": self.run,
+                "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+                "wall_s": round(wall, 3),
+                "files": len(self.files),
+                "files_per_s": round(len(self.files) / wall, 3) if wall else 0.0,
+                "pages_per_s": round(pages / wall, 3) if wall else 0.0,
+                "counters": dict(self.counters),
+                "stages": stages,
+                "outliers": [
+                    {"path": path, "total_s": round(total, 4),
+                     "stages": {k: round(v, 4) for k, v in timings.items()}}
+                    for path, total, timings in outliers
+                ],
+            }
+
+    @staticmethod
+    def write(report, path):
+        """Append report to path — one JSON line, or one CSV row per stage for .csv files."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.suffix.lower() != ".csv":
+            with open(path, "a", encoding="utf-8") as fh:
+                fh.write(json.dumps(report) + "\n")
+            return
+        columns = ["run", "started", "wall_s", "files_per_s", "pages_per_s", "stage",
+                   "count", "total_s", "mean_s", "p50_s", "p90_s", "p99_s", "max_s"]
+        new_file = not path.exists() or path.stat().st_size == 0
+        with open(path, "a", encoding="utf-8", newline="") as fh:
+            writer = csv.DictWriter(fh, fieldnames=columns, extrasaction="ignore")
+            if new_file:
+                writer.writeheader()
+            for stage, stats in report["stages"].items():
+                writer.writerow(dict(report, stage=stage, **stats))
+
+
+class JobJournal:
+    """
+    Append-only JSONL log of bulk conversion results, kept in the output
+    folder so a stopped or crashed run can be resumed.
+
+    The last record for a source wins. A source is done when that record
+    says so, its size and mtime are unchanged (or, failing that, its content
+    hash still matches) and the recorded output still exists.
+
+    Before a source's documents are appended to student PDFs a "merging"
+    record lists each target and bookmark, so a run that dies mid-merge can
+    tell on resume which appends already happened.
+    """
+
+    FILENAME = ".image_to_pdf_journal.jsonl"
+
+    def __init__(self, output_root):
+        self.output_root = Path(output_root)
+        self.output_root.mkdir(parents=True, exist_ok=True)
+        self.path = self.output_root / self.FILENAME
+        self._records = {}
+        self._lock = threading.Lock()
+
+        if self.path.exists():
+            complete = 0   # bytes up to the end of the last complete line
+            with open(self.path, "rb") as fh:
+                for line in fh:
+                    if not line.endswith(b"\n"):
+                        break   # torn last line from a crash
+                    complete += len(line)
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    self._records[record["source"]] = record
+            if complete < self.path.stat().st_size:
+                # Cut the torn line off, or the next record would be appended onto it and lost too
+                with open(self.path, "r+b") as fh:
+                    fh.truncate(complete)
+        # What an interrupted run was merging: source -> {(target, bookmark), ...}
+        self._merging = {
+            source: {(item["target"], item["bookmark"]) for item in record.get("merge") or ()}
+            for source, record in self._records.items() if record["status"] == "merging"
+        }
+        self._fh = open(self.path, "a", encoding="utf-8")
+
+    def lookup(self, source):
+        return self._records.get(os.path.abspath(source))
+
+    @staticmethod
+    def outputs(record):
+        """The output path(s) of a record — a list when a batch scan was split."""
+        output = record.get("output")
+        return [] if not output else output if isinstance(output, list) else [output]
+
+    def is_done(self, source):
+        """True if source was converted by an earlier run and has not changed since."""
+        record = self.lookup(source)
+        if not record or record["status"] != "done":
+            return False
+        if not all((self.output_root / output).exists() for output in self.outputs(record)):
+            return False
+        st = os.stat(source)
+        if st.st_size == record["size"] and st.st_mtime_ns == record["mtime_ns"]:
+            return True
+        if record.get("sha256") and record["sha256"] == file_digest(source):
+            # Touched but unchanged — refresh the stat so it isn't hashed again
+            self.record(source, "done", output=record["output"], sha256=record["sha256"])
+            return True
+        return False
+
+    def discard_partial(self, source):
+        """Delete the output left behind when a run died while writing or merging source."""
+        record = self.lookup(source)
+        if record and record["status"] in ("started", "merging"):
+            for output in self.outputs(record):
+                (self.output_root / output).unlink(missing_ok=True)
+
+    def interrupted_merge(self, source):
+        """The (target, bookmark) pairs an earlier run was merging for source when it stopped."""
+        return self._merging.get(os.path.abspath(source), set())
+
+    def record(self, source, status, output=None, error=None, sha256=None, merge=None):
+        """
+        Append a status record ("started", "merging", "done" or "error") for
+        source; output may be a list. merge lists the {"target", "bookmark"}
+        appends a "merging" record is about to make.
+        """
+        source = os.path.abspath(source)
+        if isinstance(output, list) and len(output) == 1:
+            output = output[0]
+        st = os.stat(source)
+        record = {
+            "source": source, "status": status, "size": st.st_size, "mtime_ns": st.st_mtime_ns,
+            "sha256": sha256, "output": output, "error": error, "time": time.time(),
+        }
+        if merge:
+            record["merge"] = merge
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            self._records[source] = record
+            self._fh.write(line)
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+
+    def close(self):
+        with self._lock:
+            self._fh.close()
+
+
+class RunManifest:
+    """
+    What one bulk, watch or convert run made of each source: a row per
+    output document with its path, the parsed fields and the source's stage
+    timings, in the output folder's manifests/ subfolder.
+
+    Rows are written as files finish (CSV, or JSON lines for the "json"
+    format), so a stopped or crashed run still leaves a usable manifest.
+    """
+
+    FOLDER = "manifests"
+    FIELD_COLUMNS = ["last", "first", "middle", "type", "admission_year", "graduation_year"]   # document_fields()
+    COLUMNS = (["source", "status", "output", "routed", "first_page", "last_page"] + FIELD_COLUMNS
+               + ["template", "pages", "total_s", "timings", "error"])
+
+    def __init__(self, output_root, run, fmt="csv"):
+        folder = Path(output_root) / self.FOLDER
+        folder.mkdir(parents=True, exist_ok=True)
+        stem = f"{run}-{time.strftime('%Y%m%d-%H%M%S')}"
+        suffix = ".csv" if fmt == "csv" else ".jsonl"
+        self.path = folder / f"{stem}{suffix}"
+        counter = 1
+        while True:
+            try:
+                self._fh = open(self.path, "x", encoding="utf-8", newline="")
+                break
+            except FileExistsError:   # two runs started within the same second
+                self.path = folder / f"{stem}_{counter}{suffix}"
+                counter += 1
+        self._lock = threading.Lock()
+        self._csv = None
+        if fmt == "csv":
+            self._csv = csv.DictWriter(self._fh, fieldnames=self.COLUMNS)
+            self._csv.writeheader()
+
+    @classmethod
+    def rows(cls, source, result):
+        """The manifest rows of one convert_file()-style result."""
+        timings = result.get("timings", {})
+        base = {
+            "source": os.path.abspath(source), "status": "done" if result["ok"] else "stopped" if result.get("stopped") else "error",
+            "template": result.get("template", ""), "pages": result.get("pages", ""),
+            "total_s": round(sum(timings.values()), 4),
+            "timings": {stage: round(seconds, 4) for stage, seconds in timings.items()},
+            "error": result.get("error", ""),
+        }
+        rows = []
+        for document in result.get("documents") or [{}]:
+            first_page, last_page = document.get("pages", ("", ""))
+            row = dict(
+                base, output=document.get("output", ""), routed=document.get("routed", document.get("output", "")),
+                first_page=first_page, last_page=last_page,
+                **document.get("fields", dict.fromkeys(cls.FIELD_COLUMNS, "")),
+            )
+            rows.append({column: row[column] for column in cls.COLUMNS})
+        return rows
+
+    def add(self, source, result):
+        with self._lock:
+            for row in self.rows(source, result):
+                if self._csv is not None:
+                    self._csv.writerow(dict(row, timings=json.dumps(row["timings"])))
+                else:
+                    self._fh.write(json.dumps(row) + "\n")
+            self._fh.flush()
+
+    def close(self):
+        with self._lock:
+            self._fh.close()
+
+
+# Field crops used to name and route converted documents, in pixels of a
+# REFERENCE_PAGE_SIZE scan (US Letter at 300 DPI). The built-in template
+# profile is these boxes as fractions of the page.
+FIELD_REGIONS = {
+    "name":       (337,  203,  2000, 261),
+    "admission":  (1491, 275,  1941, 410),
+    "graduation": (1586, 417,  1939, 542),
+    "degree":     (318,  393,  1600, 591),
+}
+REFERENCE_PAGE_SIZE = (2550, 3300)
+
+
+def parse_years(text):
+    """
+    Set of four-digit years mentioned in text. Two-digit years of numeric
+    dates (9/4/72) are expanded the way generate_filename() does.
+    """
+    years = set(re.findall(r'\b(1[89]\d\d|20\d\d)\b', text))
+    for short in re.findall(r'\b\d{1,2}/\d{1,2}/(\d{2})\b', text):
+        years.add(('19' if int(short) >= 20 else '20') + short)
+    if not years and re.fullmatch(r'\s*\d{2}\s*', text):
+        short = text.strip()   # a bare "79" typed into the year field
+        years.add(('19' if int(short) >= 20 else '20') + short)
+    return years
+
+
+def union_box(boxes):
+    """Smallest box enclosing all of the given (left, top, right, bottom) boxes."""
+    boxes = list(boxes)
+    return (
+        min(b[0] for b in boxes), min(b[1] for b in boxes),
+        max(b[2] for b in boxes), max(b[3] for b in boxes),
+    )
+
+
+def bucket_words(data, regions, origin=(0, 0), page=1):
+    """
+    Split pytesseract.image_to_data() output into per-region text.
+
+    A word belongs to every region containing its centre; origin is the
+    offset of the OCRed image within the page. Words keep Tesseract's reading
+    order and line breaks, so the result matches image_to_string() on a crop.
+    Only words on the given page are used.
+    """
+    lines = {field: {} for field in regions}
+    for i, word in enumerate(data.get("text", [])):
+        if not str(word).strip() or data["page_num"][i] != page:
+            continue
+        cx = origin[0] + data["left"][i] + data["width"][i] / 2
+        cy = origin[1] + data["top"][i] + data["height"][i] / 2
+        line_key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        for field, (left, top, right, bottom) in regions.items():
+            if left <= cx < right and top <= cy < bottom:
+                lines[field].setdefault(line_key, []).append(word)
+    return {
+        field: "\n".join(" ".join(words) for words in field_lines.values())
+        for field, field_lines in lines.items()
+    }
+
+
+# Field crops are resampled to this resolution before OCR (Tesseract is tuned for ~300 DPI text)
+OCR_TARGET_DPI = 300
+
+# Skew search range and the smallest correction worth rotating a page for, in degrees
+DESKEW_MAX_ANGLE = 5.0
+DESKEW_MIN_ANGLE = 0.1
+
+# Skew is estimated on a copy of the page reduced to about this width, from at most this many ink pixels
+DESKEW_SAMPLE_WIDTH = 1000
+DESKEW_MAX_SAMPLES = 50_000
+
+
+def otsu_threshold(pixels):
+    """Otsu's global threshold for a uint8 grayscale array."""
+    hist = np.bincount(pixels.ravel(), minlength=256).astype(np.float64)
+    levels = np.arange(256)
+    weight = np.cumsum(hist)                     # pixels at or below each level
+    total = weight[-1]
+    if total == 0:
+        return -1
+    mean = np.cumsum(hist * levels)
+    background = weight[:-1]
+    foreground = total - background
+    with np.errstate(divide="ignore", invalid="ignore"):
+        between = (mean[-1] * background - mean[:-1] * total) ** 2 / (background * foreground)
+    if np.isnan(between).all():
+        return -1    # a single gray level: all background
+    return int(np.nanargmax(between))
+
+
+def _projection_scores(xs, ys, angles):
+    """
+    Sharpness of the horizontal projection profile of the ink pixels (xs, ys)
+    sheared by each angle: text lines collapse into tall, narrow peaks when
+    the shear matches the page's skew.
+    """
+    shifts = np.tan(np.radians(angles, dtype=np.float32))[:, None] * xs[None, :]
+    rows = np.rint(ys[None, :] - shifts).astype(np.int32)
+    rows -= rows.min()
+    bins = int(rows.max()) + 1
+    # One bincount over all angles: offset each angle's rows into its own band
+    flat = (rows + np.arange(len(angles))[:, None] * bins).ravel()
+    profiles = np.bincount(flat, minlength=len(angles) * bins).reshape(len(angles), bins)
+    return (np.diff(profiles, axis=1).astype(np.float64) ** 2).sum(axis=1)
+
+
+def estimate_skew(img, max_angle=DESKEW_MAX_ANGLE):
+    """
+    Estimate the skew of a page in degrees; rotating by the result with
+    Image.rotate() straightens it. Uses a coarse then a fine projection-profile
+    search over a reduced copy of the page.
+    """
+    sample = img.convert("L")
+    factor = max(1, sample.width // DESKEW_SAMPLE_WIDTH)
+    if factor > 1:
+        sample = sample.reduce(factor)
+    pixels = np.asarray(sample)
+    ys, xs = np.nonzero(pixels <= otsu_threshold(pixels))   # the dark class, as in preprocess_crop()
+    if len(xs) < 100:
+        return 0.0   # blank page
+    if len(xs) > DESKEW_MAX_SAMPLES:
+        keep = np.random.default_rng(0).choice(len(xs), DESKEW_MAX_SAMPLES, replace=False)
+        xs, ys = xs[keep], ys[keep]
+    xs = (xs - xs.mean()).astype(np.float32)
+    ys = ys.astype(np.float32)
+
+    coarse = np.linspace(-max_angle, max_angle, 41)
+    best = coarse[np.argmax(_projection_scores(xs, ys, coarse))]
+    step = coarse[1] - coarse[0]
+    fine = np.linspace(best - step, best + step, 21)
+    return float(fine[np.argmax(_projection_scores(xs, ys, fine))])
+
+
+def deskew_page(img):
+    """
+    Straighten a page. Returns (image, angle); the image is img itself when
+    the skew is below DESKEW_MIN_ANGLE.
+    """
+    angle = estimate_skew(img)
+    if abs(angle) < DESKEW_MIN_ANGLE:
+        return img, 0.0
+    # Rotate bilevel pages as grayscale and palette pages as RGB, so a colour scan stays in colour
+    source = img.convert("L") if img.mode == "1" else img.convert("RGB") if img.mode == "P" else img
+    fill = 255 if source.mode == "L" else (255,) * len(source.getbands())
+    rotated = source.rotate(angle, resample=Image.BILINEAR, fillcolor=fill)
+    if img.mode == "1":
+        rotated = rotated.point(lambda v: 255 if v >= 128 else 0).convert("1")
+    rotated.info = dict(img.info)
+    if img.mode == "P":
+        rotated.info.pop("transparency", None)   # a palette index, meaningless once converted
+    return rotated, angle
+
+
+def preprocess_crop(img, dpi=None):
+    """
+    Prepare a field crop for Tesseract: grayscale, resample to OCR_TARGET_DPI
+    and binarize with Otsu's threshold. Returns (image, scale), scale being
+    the factor applied to the crop's coordinates.
+    """
+    if dpi is None:
+        dpi = img.info.get("dpi", (None,))[0]
+    gray = img.convert("L")
+    scale = 1.0
+    if dpi and abs(OCR_TARGET_DPI / dpi - 1) > 0.05:
+        scale = OCR_TARGET_DPI / dpi
+        size = (max(1, round(gray.width * scale)), max(1, round(gray.height * scale)))
+        gray = gray.resize(size, Image.LANCZOS)
+    pixels = np.asarray(gray)
+    binary = np.where(pixels > otsu_threshold(pixels), 255, 0).astype(np.uint8)
+    return Image.fromarray(binary, "L"), scale
+
+
+def _scale_words(data, scale):
+    """Map image_to_data() boxes from a crop resampled by scale back to the original pixels."""
+    if scale == 1.0:
+        return data
+    for key in ("left", "top", "width", "height"):
+        data[key] = [round(v / scale) for v in data[key]]
+    return data
+
+
+_tess_local = threading.local()
+
+
+def _tesserocr_api():
+    """One long-lived Tesseract API handle per thread (the model is loaded once)."""
+    api = getattr(_tess_local, "api", None)
+    if api is None:
+        api = _tess_local.api = tesserocr.PyTessBaseAPI()
+    return api
+
+
+def extract_fields(img, regions=None, origin=(0, 0)):
+    """
+    OCR all named regions of img in a single pass and return {field: text}.
+
+    The union of the regions is cropped once and cleaned up with
+    preprocess_crop(). An in-process tesserocr handle then reads each region
+    of it when installed; otherwise one image_to_data() call covers the crop
+    and the words are bucketed by box, instead of starting a tesseract
+    process per region.
+
+    origin is the page position of img's top-left corner, for images that
+    are already a crop of the page (see open_region()).
+    """
+    regions = regions or FIELD_REGIONS
+    ox, oy = origin
+    area = union_box(regions.values())
+    crop = img.crop((area[0] - ox, area[1] - oy, area[2] - ox, area[3] - oy))
+    crop, scale = preprocess_crop(crop, dpi=(img.info.get("dpi") or (None,))[0])
+    if tesserocr is not None:
+        api = _tesserocr_api()
+        api.SetImage(crop)
+        texts = {}
+        for field, (left, top, right, bottom) in regions.items():
+            api.SetRectangle(round((left - area[0]) * scale), round((top - area[1]) * scale),
+                             round((right - left) * scale), round((bottom - top) * scale))
+            texts[field] = api.GetUTF8Text()
+        api.Clear()
+        return texts
+
+    data = pytesseract.image_to_data(crop, output_type=pytesseract.Output.DICT)
+    return bucket_words(_scale_words(data, scale), regions, origin=area[:2])
+
+
+# pdf2image's default render resolution; PDF pages are cropped on this pixel grid
+PDF_RENDER_DPI = 200
+
+
+def open_as_image(file_path):
+    """Open any supported file as a PIL Image (first page for PDFs)."""
+    if str(file_path).lower().endswith('.pdf'):
+        from pdf2image import convert_from_path
+        pages = convert_from_path(file_path, dpi=PDF_RENDER_DPI, first_page=1, last_page=1)
+        return pages[0]
+    return Image.open(file_path)
+
+
+def render_pdf_region(file_path, box, dpi=PDF_RENDER_DPI, page=1):
+    """
+    Rasterize only box (left, top, right, bottom) of a PDF page.
+
+    box is in pixels of the page rendered at PDF_RENDER_DPI — the size
+    page_geometry() reports, which template regions are scaled to (see
+    TemplateProfile.boxes()); it is scaled if a different dpi is asked for. pdftoppm
+    crops while rendering, so a name strip costs a few kilobytes instead of
+    a full decoded page.
+    """
+    scale = dpi / PDF_RENDER_DPI
+    left, top, right, bottom = (round(v * scale) for v in box)
+    cmd = [
+        "pdftoppm", "-f", str(page), "-l", str(page), "-r", str(dpi),
+        "-x", str(left), "-y", str(top), "-W", str(right - left), "-H", str(bottom - top),
+        "-png", "-singlefile", os.fspath(file_path),
+    ]
+    result = subprocess.run(cmd, capture_output=True)
+    if result.returncode != 0 or not result.stdout:
+        raise RuntimeError(f"pdftoppm failed: {result.stderr.decode(errors='replace').strip()}")
+    img = Image.open(io.BytesIO(result.stdout))
+    img.load()
+    img.info["dpi"] = (dpi, dpi)
+    return img
+
+
+_XHTML = "{http://www.w3.org/1999/xhtml}"
+
+
+def pdf_text_words(file_path, page=1):
+    """
+    Read the words of a PDF page's existing text layer with pdftotext -bbox-layout.
+
+    Returns an image_to_data()-style dict with boxes in pixels of the page
+    rendered at PDF_RENDER_DPI (the page_geometry() size the template regions
+    are scaled to, so bucket_words() applies unchanged), or None when the
+    page has no text layer and must be OCRed.
+    """
+    cmd = ["pdftotext", "-f", str(page), "-l", str(page), "-bbox-layout", os.fspath(file_path), "-"]
+    try:
+        result = subprocess.run(cmd, capture_output=True)
+        root = ET.fromstring(result.stdout)
+    except (OSError, ET.ParseError):
+        return None
+    if result.returncode != 0:
+        return None
+
+    scale = PDF_RENDER_DPI / 72  # PDF points -> render pixels
+    data = {key: [] for key in (
+        "page_num", "block_num", "par_num", "line_num", "word_num",
+        "left", "top", "width", "height", "conf", "text",
+    )}
+    for block_num, block in enumerate(root.iter(_XHTML + "block"), start=1):
+        for line_num, line in enumerate(block.iter(_XHTML + "line"), start=1):
+            for word_num, word in enumerate(line.iter(_XHTML + "word"), start=1):
+                x0, y0 = float(word.get("xMin")), float(word.get("yMin"))
+                x1, y1 = float(word.get("xMax")), float(word.get("yMax"))
+                data["page_num"].append(page)
+                data["block_num"].append(block_num)
+                data["par_num"].append(1)
+                data["line_num"].append(line_num)
+                data["word_num"].append(word_num)
+                data["left"].append(round(x0 * scale))
+                data["top"].append(round(y0 * scale))
+                data["width"].append(round((x1 - x0) * scale))
+                data["height"].append(round((y1 - y0) * scale))
+                data["conf"].append(100)
+                data["text"].append(word.text or "")
+
+    if not any(text.strip() for text in data["text"]):
+        return None
+    return data
+
+
+def text_layer_fields(file_path, regions=None, page=1):
+    """
+    Field text from a PDF page's existing text layer, or None if the page
+    has to be OCRed. A text layer that puts no words in any of the regions
+    (a scan with only a stamp, header or Bates number) counts as none.
+    """
+    if not str(file_path).lower().endswith('.pdf'):
+        return None
+    words = pdf_text_words(file_path, page)
+    if words is None:
+        return None
+    texts = bucket_words(words, regions or FIELD_REGIONS, page=page)
+    if not any(text.strip() for text in texts.values()):
+        return None
+    return texts
+
+
+def page_count(file_path):
+    """Number of pages in a PDF or multi-page image (1 when it cannot be told)."""
+    try:
+        if str(file_path).lower().endswith('.pdf'):
+            from pdf2image import pdfinfo_from_path
+            return int(pdfinfo_from_path(file_path)["Pages"])
+        with Image.open(file_path) as img:
+            return getattr(img, "n_frames", 1)
+    except Exception:
+        return 1
+
+
+def open_region(file_path, box, page=1):
+    """Open just box of one page of a file as a PIL Image (rendered region-only for PDFs)."""
+    if str(file_path).lower().endswith('.pdf'):
+        return render_pdf_region(file_path, box, page=page)
+    with Image.open(file_path) as img:
+        if page > 1:
+            img.seek(page - 1)   # one frame of a multi-page TIFF is decoded at a time
+        return img.crop(box)
+
+
+def read_page_fields(file_path, regions, page):
+    """Field text of one page: from its PDF text layer, or OCR of the field area decoded region-only."""
+    texts = text_layer_fields(file_path, regions, page)
+    if texts is not None:
+        return texts
+    area = union_box(regions.values())
+    return extract_fields(open_region(file_path, area, page), regions, origin=area[:2])
+
+
+def pdf_page_range(pdf, first, last, dest=None):
+    """
+    Pages first..last of pdf (a path or PDF bytes) as a new PDF, saved to
+    dest or returned as bytes. Pages are copied, not re-rendered.
+    """
+    import pikepdf
+    with pikepdf.open(io.BytesIO(pdf) if isinstance(pdf, bytes) else pdf) as source:
+        part = pikepdf.new()
+        part.pages.extend(source.pages[first - 1:last])
+        if dest is None:
+            buf = io.BytesIO()
+            part.save(buf)
+            return buf.getvalue()
+        part.save(dest)
+        return dest
+
+
+def save_page_range(file_path, first, last, folder):
+    """
+    Copy pages first..last of a PDF or multi-page image into a new file in
+    folder for the PDF writer; image frames are decoded and written one at
+    a time. Returns its path.
+    """
+    suffix = ".pdf" if str(file_path).lower().endswith('.pdf') else ".tif"
+    fd, path = tempfile.mkstemp(suffix=suffix, dir=folder)
+    os.close(fd)
+    if suffix == ".pdf":
+        return Path(pdf_page_range(file_path, first, last, path))
+    with Image.open(file_path) as img, TiffImagePlugin.AppendingTiffWriter(path, new=True) as tiff:
+        for index in range(first - 1, last):
+            img.seek(index)
+            options = {"dpi": img.info["dpi"]} if img.info.get("dpi") else {}
+            options["compression"] = "group4" if img.mode == "1" else "tiff_deflate"
+            img.save(tiff, format="TIFF", **options)
+            tiff.newFrame()
+    return Path(path)
+
+
+# Pages larger than this are not decoded whole for deskewing (a straightened copy doubles it)
+PAGE_DECODE_MAX_PIXELS = 60_000_000
+
+
+def open_page(file_path):
+    """
+    The fully decoded page of a single-page raster scan; None for PDFs,
+    multi-page images and pages over PAGE_DECODE_MAX_PIXELS.
+    """
+    if str(file_path).lower().endswith('.pdf'):
+        return None
+    img = Image.open(file_path)
+    if getattr(img, "n_frames", 1) > 1 or img.width * img.height > PAGE_DECODE_MAX_PIXELS:
+        img.close()
+        return None
+    img.load()
+    return img
+
+
+def save_page_copy(page, file_path, folder):
+    """
+    Save a straightened page into folder for the PDF writer, in a format close
+    to the source's (JPEG stays JPEG, bilevel stays Group 4 TIFF, the rest is
+    PNG), keeping its DPI. Returns the new path.
+    """
+    suffix = Path(file_path).suffix.lower()
+    options = {"dpi": page.info["dpi"]} if page.info.get("dpi") else {}
+    if suffix in (".jpg", ".jpeg") and page.mode in ("L", "RGB", "CMYK"):
+        suffix, options = ".jpg", dict(options, quality=95)
+    elif page.mode == "1":
+        suffix, options = ".tif", dict(options, compression="group4")
+    else:
+        suffix, options = ".png", dict(options, compress_level=1)
+    fd, path = tempfile.mkstemp(suffix=suffix, dir=folder)
+    os.close(fd)
+    page.save(path, **options)
+    return Path(path)
+
+
+def decode_fields(file_path, area, timings, folder):
+    """
+    Decode the field area of a file's first page for extract_fields(),
+    straightening the page first so the skew is measured once, here.
+
+    Returns (crop, writer_source, writer_deskew) for write_pdf(): a skewed
+    page is saved straightened into folder and the writer converts that
+    copy without deskewing again. PDFs, multi-page images and huge pages
+    are decoded region-only instead, and ocrmypdf still deskews them.
+    """
+    page = _timed(timings, "decode", open_page, file_path)
+    if page is None:
+        return _timed(timings, "decode", open_region, file_path, area), file_path, True
+    page, angle = _timed(timings, "deskew", deskew_page, page)
+    source = file_path
+    if angle:
+        source = _timed(timings, "deskew", save_page_copy, page, file_path, folder)
+    return page.crop(area), source, False
+
+
+def page_geometry(file_path):
+    """
+    (width, height, dpi) of a file's first page on the pixel grid open_region()
+    uses — the image itself, or a PDF rendered at PDF_RENDER_DPI. Only headers
+    are read; dpi is None when an image does not record it.
+    """
+    if str(file_path).lower().endswith('.pdf'):
+        from pdf2image import pdfinfo_from_path
+        size = pdfinfo_from_path(file_path)["Page size"]   # e.g. "612 x 792 pts (letter)"
+        width_pt, height_pt = (float(v) for v in re.findall(r"[\d.]+", size)[:2])
+        scale = PDF_RENDER_DPI / 72
+        return round(width_pt * scale), round(height_pt * scale), PDF_RENDER_DPI
+    with Image.open(file_path) as img:
+        dpi = img.info.get("dpi")
+        return img.width, img.height, (round(dpi[0]) if dpi else None)
+
+
+class TemplateProfile:
+    """
+    A document layout: field regions as fractions of the page (left, top,
+    right, bottom in 0..1) plus the rules that recognise it.
+
+    Profiles are loaded from JSON (or YAML) like:
+
+        {"name": "transcript-a4",
+         "regions": {"name": [0.13, 0.06, 0.78, 0.08], "admission": [...], ...},
+         "search_region": [0.13, 0.06, 0.29, 0.08],
+         "match": {"aspect": [0.69, 0.72], "dpi": [150, 600],
+                   "header": {"region": [0.05, 0.0, 0.95, 0.05], "keywords": ["transcript"]}}}
+
+    search_region is the (narrower) name strip Search Mode reads; it defaults
+    to the name region. Every match rule is optional.
+    """
+
+    def __init__(self, name, regions, search_region=None, aspect=None, dpi=None, header=None):
+        self.name = name
+        self.regions = {field: tuple(float(v) for v in box) for field, box in regions.items()}
+        self.search_region = tuple(float(v) for v in (search_region or self.regions["name"]))
+        self.aspect = tuple(aspect) if aspect else None
+        self.dpi = tuple(dpi) if dpi else None
+        self.header = header or None
+
+    @classmethod
+    def from_dict(cls, data):
+        missing = set(FIELD_REGIONS) - set(data.get("regions", {}))
+        if missing:
+            raise ValueError(f"template {data.get('name')!r} is missing region(s): {', '.join(sorted(missing))}")
+        match = data.get("match", {})
+        return cls(data["name"], data["regions"], data.get("search_region"),
+                   match.get("aspect"), match.get("dpi"), match.get("header"))
+
+    @classmethod
+    def from_pixels(cls, name, regions, page_size, search_region=None, **match):
+        """Build a profile from pixel boxes measured on a page of page_size."""
+        width, height = page_size
+
+        def normalise(box):
+            return (box[0] / width, box[1] / height, box[2] / width, box[3] / height)
+
+        return cls(name, {field: normalise(box) for field, box in regions.items()},
+                   normalise(search_region) if search_region else None, **match)
+
+    @staticmethod
+    def to_pixels(box, size):
+        width, height = size
+        return (round(box[0] * width), round(box[1] * height), round(box[2] * width), round(box[3] * height))
+
+    def boxes(self, size):
+        """Field regions in pixels for a page of size (width, height)."""
+        return {field: self.to_pixels(box, size) for field, box in self.regions.items()}
+
+    def search_box(self, size):
+        return self.to_pixels(self.search_region, size)
+
+    def region_key(self, field):
+        """OCR index key for a field: its normalised box, so it holds for any scan resolution."""
+        box = self.search_region if field == "search" else self.regions[field]
+        return f"{field}@" + ",".join(f"{v:.4f}" for v in box)
+
+    def fits(self, width, height, dpi):
+        """Whether the page size / DPI rules allow this page."""
+        if self.aspect and not self.aspect[0] <= width / height <= self.aspect[1]:
+            return False
+        if self.dpi and dpi is not None and not self.dpi[0] <= dpi <= self.dpi[1]:
+            return False
+        return True
+
+
+class TemplateRegistry:
+    """
+    The known template profiles, most specific first, with the built-in
+    profile as the fallback.
+
+    detect() picks a profile from cheap page features: page aspect ratio and
+    DPI from the file header, and — only when several profiles still fit —
+    one OCR of the small header strip those profiles name.
+    """
+
+    def __init__(self, profiles=()):
+        self.default = TemplateProfile.from_pixels(
+            "transcript", FIELD_REGIONS, REFERENCE_PAGE_SIZE, search_region=SEARCH_NAME_REGION
+        )
+        self.profiles = [p for p in profiles if p.name != self.default.name] + [self.default]
+
+    @classmethod
+    def load(cls, folders=None, log=_default_log):
+        """Load every *.json (and *.yaml / *.yml with PyYAML) profile in folders; problems go to log."""
+        if folders is None:
+            folders = [Path(__file__).resolve().parent / "templates", CONFIG_DIR / "templates"]
+            folders += [Path(p) for p in os.environ.get("IMAGE_TO_PDF_TEMPLATES", "").split(os.pathsep) if p]
+        profiles = []
+        for folder in folders:
+            if not Path(folder).is_dir():
+                continue
+            for path in sorted(Path(folder).iterdir()):
+                suffix = path.suffix.lower()
+                if suffix not in (".json", ".yaml", ".yml"):
+                    continue
+                if suffix != ".json" and yaml is None:
+                    log(f"⚠ Skipping template {path.name}: install PyYAML to use YAML templates.")
+                    continue
+                try:
+                    with open(path, encoding="utf-8") as fh:
+                        data = json.load(fh) if suffix == ".json" else yaml.safe_load(fh)
+                    for item in data if isinstance(data, list) else [data]:
+                        profiles.append(TemplateProfile.from_dict(item))
+                except Exception as e:   # OSError, bad JSON/YAML, missing or malformed regions
+                    log(f"⚠ Skipping template {path.name}: {e}")
+        return cls(profiles)
+
+    def names(self):
+        return [profile.name for profile in self.profiles]
+
+    def get(self, name):
+        for profile in self.profiles:
+            if profile.name == name:
+                return profile
+        raise KeyError(f"unknown template: {name}")
+
+    def region_keys(self, field):
+        """OCR index keys of field across all profiles."""
+        return {profile.region_key(field) for profile in self.profiles}
+
+    def detect(self, file_path, name=None):
+        """Return (profile, (width, height)) for a file; name forces a profile."""
+        width, height, dpi = page_geometry(file_path)
+        if name:
+            return self.get(name), (width, height)
+        candidates = [p for p in self.profiles if p.fits(width, height, dpi)] or [self.default]
+        with_header = [p for p in candidates if p.header]
+        if len(candidates) > 1 and with_header:
+            best, best_hits = None, 0
+            for profile in with_header:
+                try:
+                    strip = open_region(file_path, profile.to_pixels(profile.header["region"], (width, height)))
+                    text = pytesseract.image_to_string(strip).lower()
+                except Exception:
+                    continue
+                hits = sum(1 for keyword in profile.header.get("keywords", []) if keyword.lower() in text)
+                if hits > best_hits:
+                    best, best_hits = profile, hits
+            if best is not None:
+                return best, (width, height)
+            candidates = [p for p in candidates if not p.header] or candidates
+        return candidates[0], (width, height)
+
+
+_templates = None
+
+
+def get_templates(log=_default_log):
+    """The process-wide TemplateRegistry, loaded on first use (also in worker processes)."""
+    global _templates
+    if _templates is None:
+        _templates = TemplateRegistry.load(log=log)
+    return _templates
+
+
+# ocrmypdf output profiles: named bundles of ocrmypdf.ocr() settings that
+# trade PDF size against conversion speed. balanced is what conversions used
+# before profiles existed. skip_text keeps pages that already have text
+# instead of forcing OCR on every page; jobs only applies when a single file
+# is converted at a time (with several workers each ocrmypdf gets one job).
+OCR_PROFILES = {
+    "fast": {"optimize": 0, "output_type": "pdf", "skip_text": True, "tesseract_timeout": 60},
+    "balanced": {"optimize": 1, "output_type": "pdf", "skip_text": False},
+    "archival": {"optimize": 3, "output_type": "pdfa-2", "skip_text": False, "jbig2_lossy": False,
+                 "tesseract_timeout": 600},
+}
+DEFAULT_OCR_PROFILE = "balanced"
+OCR_PROFILE_SETTINGS = ("optimize", "output_type", "skip_text", "jobs", "tesseract_timeout",
+                        "jpeg_quality", "png_quality", "jbig2_lossy")
+
+
+def load_ocr_profiles(path=None, log=_default_log):
+    """
+    The built-in OCR_PROFILES plus those in ocr_profiles.json in the config
+    folder, and the default profile name. Returns (profiles, default).
+
+    A user profile may start from a built-in one with "base" and override
+    any of OCR_PROFILE_SETTINGS; a profile with the same name as a built-in
+    one replaces it. Problems with the file go to log.
+    """
+    profiles = {name: dict(settings) for name, settings in OCR_PROFILES.items()}
+    default = DEFAULT_OCR_PROFILE
+    path = Path(path) if path else CONFIG_DIR / "ocr_profiles.json"
+    if not path.is_file():
+        return profiles, default
+    try:
+        with open(path, encoding="utf-8") as fh:
+            data = json.load(fh)
+        user_profiles = data.get("profiles", {})
+    except (OSError, ValueError, AttributeError) as e:
+        log(f"⚠ Ignoring {path.name}: {e}")
+        return profiles, default
+    for name, settings in user_profiles.items():
+        try:
+            settings = dict(settings)
+            base = settings.pop("base", DEFAULT_OCR_PROFILE)
+            if base not in profiles:
+                raise ValueError(f"unknown base profile {base!r}")
+            unknown = set(settings) - set(OCR_PROFILE_SETTINGS)
+            if unknown:
+                raise ValueError(f"unknown setting(s): {', '.join(sorted(unknown))}")
+            profiles[name] = {**profiles[base], **settings}
+        except (TypeError, ValueError) as e:
+            log(f"⚠ Skipping OCR profile {name!r} in {path.name}: {e}")
+    if data.get("default") in profiles:
+        default = data["default"]
+    elif "default" in data:
+        log(f"⚠ Unknown default OCR profile {data['default']!r} in {path.name}; using {default}.")
+    return profiles, default
+
+
+_ocr_profiles = None
+
+
+def get_ocr_profiles(log=_default_log):
+    """(profiles, default name) from load_ocr_profiles(), loaded on first use."""
+    global _ocr_profiles
+    if _ocr_profiles is None:
+        _ocr_profiles = load_ocr_profiles(log=log)
+    return _ocr_profiles
+
+
+def ocr_options(name=None, log=_default_log):
+    """
+    The settings of OCR profile name (the configured default if None), as
+    passed to write_pdf(). ocrmypdf refuses --optimize 2 or 3 without
+    pngquant, so those fall back to 1 with a warning when it is missing.
+    """
+    profiles, default = get_ocr_profiles(log)
+    name = name or default
+    if name not in profiles:
+        raise KeyError(f"unknown OCR profile: {name}")
+    options = dict(profiles[name])
+    if options.get("optimize", 1) >= 2 and not shutil.which("pngquant"):
+        log(f"⚠ pngquant not found: OCR profile {name!r} uses --optimize 1 instead of {options['optimize']}.")
+        options["optimize"] = 1
+    return options
+
+
+def make_thumbnail(file_path, size=THUMB_SIZE):
+    """
+    Decode a small preview of a file's first page and return it as PPM bytes
+    for tk.PhotoImage. JPEGs are decoded at reduced scale (Image.draft) and
+    PDFs are rendered straight to thumbnail size, so no full-resolution page
+    is ever held in memory.
+    """
+    if str(file_path).lower().endswith('.pdf'):
+        from pdf2image import convert_from_path
+        img = convert_from_path(file_path, first_page=1, last_page=1, size=max(size))[0]
+    else:
+        img = Image.open(file_path)
+        img.draft("RGB", size)
+    img.thumbnail(size, Image.Resampling.LANCZOS)
+    if img.mode not in ("1", "L", "RGB"):
+        img = img.convert("RGB")
+    buf = io.BytesIO()
+    img.save(buf, format="PPM")
+    return buf.getvalue()
+
+
+def ocr_document_once(file_path):
+    """
+    OCR a whole document in a single Tesseract run.
+
+    Returns (pdf_bytes, word_data): the searchable PDF and the TSV word boxes
+    (as an image_to_data() dict) come from the same run, so the field text
+    for generate_filename() can be read from the boxes with bucket_words()
+    instead of OCRing the page a second time.
+    """
+    with tempfile.TemporaryDirectory(prefix="image_to_pdf_") as tmp:
+        source = str(file_path)
+        if source.lower().endswith('.pdf'):
+            # Tesseract reads images, so render every page and pass a list file
+            from pdf2image import convert_from_path
+            pages = convert_from_path(
+                source, dpi=PDF_RENDER_DPI, output_folder=tmp, fmt="png", paths_only=True
+            )
+            source = os.path.join(tmp, "pages.txt")
+            with open(source, "w") as fh:
+                fh.write("\n".join(pages) + "\n")
+        pdf_bytes, tsv = pytesseract.run_and_get_multiple_output(source, extensions=["pdf", "tsv"])
+    return pdf_bytes, pytesseract.pytesseract.file_to_dict(tsv, "\t", -1)
+
+
+def document_type(admission_text, degree_text):
+    """The document type — "Degrees", "Transcripts" or None — from the markers in its admission and degree regions."""
+    if re.search(r'graduated\s+received', degree_text, re.IGNORECASE):
+        return "Degrees"
+    if re.search(r'date\s+of\s+admission', admission_text, re.IGNORECASE):
+        return "Transcripts"
+    return None
+
+
+def parse_name(name_text):
+    """(last, first, middle) from a name region's text, or None if no name can be read."""
+    # Format 1: Last, First [MI]
+    name_match = re.search(
+        r'\b([A-Z][a-zA-Z\'\-]+),\s+([A-Z][a-zA-Z\'\-]+)(?:\s+([A-Z])\.?)?',
+        name_text
+    )
+    if name_match:
+        return name_match.group(1), name_match.group(2), name_match.group(3) or ""
+    # Format 2: First [MI] Last
+    name_match = re.search(
+        r'\b([A-Z][a-zA-Z\'\-]+)(?:\s+([A-Z])\.?)?\s+([A-Z][a-zA-Z\'\-]+)\b',
+        name_text
+    )
+    if name_match:
+        return name_match.group(3), name_match.group(1), name_match.group(2) or ""
+    return None
+
+
+MONTH_NAME = (
+    r'(?:January|February|March|April|May|June|July|August|'
+    r'September|October|November|December|'
+    r'Jan|Feb|Mar|Apr|Jun|Jul|Aug|Sep|Oct|Nov|Dec)'
+)
+DATE_NAMED   = MONTH_NAME + r'\s+\d{1,2},?\s+\d{4}'
+DATE_NUMERIC = r'\d{1,2}/\d{1,2}/\d{2,4}'
+
+MONTH_MAP = {
+    'jan': 'January', 'feb': 'February', 'mar': 'March',
+    'apr': 'April',   'may': 'May',       'jun': 'June',
+    'jul': 'July',    'aug': 'August',     'sep': 'September',
+    'oct': 'October', 'nov': 'November',   'dec': 'December'
+}
+
+
+def parse_date(text):
+    """
+    The first date in a date region's text as (Month_DD_YYYY, YYYY), or
+    ("", "") if there is none. Named ("June 12, 1979", "Jun 12 1979") and
+    numeric ("06/12/79") dates are accepted; 2-digit years before 20 are
+    taken as 2000s.
+    """
+    date_match = re.search(DATE_NAMED + r'|' + DATE_NUMERIC, text, re.IGNORECASE)
+    if not date_match:
+        return "", ""
+    raw = date_match.group(0).strip()
+    numeric = re.match(r'(\d{1,2})/(\d{1,2})/(\d{2,4})$', raw)
+    if numeric:
+        month_num, day, year = int(numeric.group(1)), numeric.group(2), numeric.group(3)
+        if len(year) == 2:
+            year = '19' + year if int(year) >= 20 else '20' + year
+        month_name = list(MONTH_MAP.values())[month_num - 1]
+        return f"{month_name}_{day}_{year}", year
+    parts = raw.replace(',', '').split()
+    if len(parts) == 3:
+        month_abbr = parts[0][:3].lower()
+        month_name = MONTH_MAP.get(month_abbr, parts[0])
+        year = parts[2]
+        if len(year) == 2:
+            year = '19' + year if int(year) >= 20 else '20' + year
+        return f"{month_name}_{parts[1]}_{year}", year
+    return re.sub(r'[\\/*?:"<>|]', '', raw).strip().replace(' ', '_'), ""
+
+
+def same_name(a, b):
+    """Whether two parse_name() results are the same person, allowing for OCR misreads."""
+    for x, y in zip(a[:2], b[:2]):
+        x, y = "".join(name_tokens(x)), "".join(name_tokens(y))
+        limit = max_edits(min(len(x), len(y)))
+        if edit_distance(x, y, limit) > limit:
+            return False
+    return True
+
+
+def starts_document(current, texts):
+    """
+    Whether a page with field texts begins a new document in a batch scan,
+    given the field texts of the current document's first page: it must
+    show a name, and either the student or the document type differs.
+    Pages without a readable name continue the current document.
+    """
+    name = parse_name(texts["name"])
+    if name is None:
+        return False
+    current_name = parse_name(current["name"])
+    if current_name is None or not same_name(name, current_name):
+        return True
+    kind = document_type(texts["admission"], texts["degree"])
+    return kind is not None and kind != document_type(current["admission"], current["degree"])
+
+
+# Pages after the first that are read for a name when page 1 has none (per-document mode)
+NAME_LOOKAHEAD_PAGES = 3
+
+
+def document_parts(first_texts, read_page, pages, split=False):
+    """
+    Divide a document of pages pages into the parts written as separate PDFs,
+    given the field texts of its first page and read_page(n) for the others.
+    Returns [(first_page, last_page, texts)], last_page None meaning the
+    whole file.
+
+    Per document (the default) the whole file is one part, named from page 1
+    — or from the first of the next NAME_LOOKAHEAD_PAGES pages with a
+    readable name when page 1 has none. With split, every page is read and
+    a new part starts wherever starts_document() says so; pages are read
+    one at a time, so memory does not grow with the page count.
+    """
+    if not split or pages == 1:
+        if pages > 1 and parse_name(first_texts["name"]) is None:
+            for page in range(2, min(pages, 1 + NAME_LOOKAHEAD_PAGES) + 1):
+                texts = read_page(page)
+                if parse_name(texts["name"]) is not None:
+                    return [(1, None, texts)]
+        return [(1, None, first_texts)]
+
+    parts = [[1, 1, first_texts]]
+    for page in range(2, pages + 1):
+        texts = read_page(page)
+        if starts_document(parts[-1][2], texts):
+            parts.append([page, page, texts])
+        else:
+            parts[-1][1] = page
+    if len(parts) == 1:
+        return [(1, None, first_texts)]
+    return [tuple(part) for part in parts]
+
+
+def generate_filename(name_text, admission_text, graduation_text, degree_text, fallback_stem, log=print):
+    """
+    Generate a structured filename and determine the output subdirectory.
+
+    Returns (filename_stem, subfolder) where subfolder is one of:
+      "Degrees/<year>", "Transcripts/<year>", or "Unprocessed"
+
+    Resolved filename format (Degrees and Transcripts):
+      LastName_FirstName_MI_CourseName_Month_DD_YYYY
+
+    Unprocessed filename format (date could not be extracted):
+      Last, First MI CourseName
+
+    Falls back to (original_stem, "Unprocessed") if name/course cannot
+    be extracted at all.
+
+    Status messages are passed to log, so this also runs in worker processes.
+    """
+
+    def clean(value):
+        """Remove characters invalid in filenames (comma is intentional in this format)."""
+        return re.sub(r'[\\/*?:"<>|]', '', value).strip()
+
+    # --- Detect document type ---
+    doc_folder = document_type(admission_text, degree_text)
+    is_degree  = doc_folder == "Degrees"
+
+    # --- Extract name ---
+    last, first, middle = parse_name(name_text) or ("", "", "")
+
+    if not last or not first:
+        log(f"  ⚠ Could not extract name — sending to Unprocessed.")
+        return fallback_stem, "Unprocessed"
+
+    # --- Extract course/degree name (always, regardless of doc type) ---
+    course_name = ""
+    course_match = re.search(
+        r'degree\s+received[:\s]+([A-Za-z\s]+?)(?:\n|$)',
+        degree_text,
+        re.IGNORECASE
+    )
+    if course_match:
+        course_name = clean(course_match.group(1)).strip()
+    else:
+        log(f"  ⚠ Could not extract course name.")
+
+    # --- Extract date ---
+    # Degrees: use date of graduation crop; Transcripts: use date of admission crop
+    date_str, year_str = parse_date(graduation_text if is_degree else admission_text)
+    if not date_str:
+        log(f"  ⚠ Could not extract date.")
+
+    # --- Determine subfolder ---
+    # Only route to Unprocessed if doc type OR course name couldn't be determined.
+    # Missing date is acceptable — file still goes to Degrees/Transcripts without it.
+    if not doc_folder or not course_name:
+        name_part = f"{last}, {first}"
+        if middle:
+            name_part += f" {middle}"
+        unprocessed_name = f"{name_part} {course_name}".strip() if course_name else name_part
+        log(f"  📄 Unprocessed filename: {unprocessed_name}.pdf")
+        return unprocessed_name, "Unprocessed"
+
+    subfolder = f"{doc_folder}/{year_str}" if year_str else f"{doc_folder}/{doc_folder} - No Date"
+
+    # --- Assemble resolved filename ---
+    # Format: "Last, First MI CourseName Date" (date optional)
+    name_part = f"{last}, {first}"
+    if middle:
+        name_part += f" {middle}"
+    parts = [name_part]
+    if course_name:
+        parts.append(course_name)
+    if date_str:
+        parts.append(date_str.replace("_", " "))
+
+    filename = " ".join(clean(p) for p in parts)
+    log(f"  📄 Generated filename: {filename}.pdf → {subfolder}/")
+    return filename, subfolder
+
+
+def document_fields(texts):
+    """
+    The parsed name, document type and admission / graduation years of a
+    document's field texts (empty strings if unknown) — what
+    generate_filename() names and routes it by.
+    """
+    last, first, middle = parse_name(texts["name"]) or ("", "", "")
+    return {"last": last, "first": first, "middle": middle,
+            "type": document_type(texts["admission"], texts["degree"]) or "",
+            "admission_year": parse_date(texts["admission"])[1],
+            "graduation_year": parse_date(texts["graduation"])[1]}
+
+
+# Merged per-student PDFs go here, under the output folder
+MERGED_FOLDER = "Students"
+
+
+class OutputWriter:
+    """
+    Names, places and (optionally) merges the output PDFs under one output
+    folder.
+
+    Each target directory is listed once, on first use, and the names taken
+    since are kept in memory, so a free "<stem>.pdf", "<stem>_1.pdf", ... is
+    found without probing the (possibly network) share for every candidate.
+    The chosen file is still created with O_EXCL, so writers in other
+    processes never end up with the same name. A folder emptied by
+    discard() (e.g. Degrees/<year> once its PDFs are merged) is removed.
+    """
+
+    def __init__(self, output_root):
+        self.root = Path(output_root)
+        self._used = {}    # directory -> lower-cased names in it (case-insensitive filesystems)
+        self._lock = threading.Lock()
+
+    def _names(self, directory):
+        used = self._used.get(directory)
+        if used is None:
+            directory.mkdir(parents=True, exist_ok=True)
+            with os.scandir(directory) as entries:
+                used = self._used[directory] = {entry.name.lower() for entry in entries}
+        return used
+
+    def reserve(self, subfolder, stem):
+        """Create and return a free path "<stem>.pdf", "<stem>_1.pdf", ... in root/subfolder."""
+        directory = self.root / subfolder
+        with self._lock:
+            used = self._names(directory)
+            counter = 0
+            while True:
+                name = f"{stem}.pdf" if counter == 0 else f"{stem}_{counter}.pdf"
+                counter += 1
+                if name.lower() in used:
+                    continue
+                used.add(name.lower())
+                try:
+                    self._create(directory / name)
+                    return directory / name
+                except FileExistsError:   # created by another process since the listing
+                    continue
+
+    @staticmethod
+    def _create(path):
+        """Create an empty file, failing if it exists; its folder is made again if another writer removed it."""
+        flags = os.O_CREAT | os.O_EXCL | os.O_WRONLY
+        try:
+            os.close(os.open(path, flags))
+        except FileNotFoundError:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            os.close(os.open(path, flags))
+
+    def route(self, texts, img_path, log=print):
+        """
+        Name and place the PDF for img_path from its field texts.
+        Returns (output_file, subfolder); output_file is already reserved.
+        """
+        output_stem, subfolder = generate_filename(
+            texts["name"], texts["admission"], texts["graduation"], texts["degree"],
+            Path(img_path).stem, log=log
+        )
+        return self.reserve(subfolder, output_stem), subfolder
+
+    def discard(self, output_file):
+        """Delete a reserved or written output (after a failure or a merge), free its name and prune empty folders."""
+        output_file = Path(output_file)
+        output_file.unlink(missing_ok=True)
+        with self._lock:
+            self._used.get(output_file.parent, set()).discard(output_file.name.lower())
+            directory = output_file.parent
+            while directory != self.root and self.root in directory.parents:
+                try:
+                    directory.rmdir()
+                except OSError:   # not empty
+                    break
+                self._used.pop(directory, None)
+                directory = directory.parent
+
+    @staticmethod
+    def merge_target(fields):
+        """The student PDF (relative to root) a document with these fields merges into, or None without a name."""
+        if not fields["last"] or not fields["first"]:
+            return None
+        name = re.sub(r'[\\/*?:"<>|]', '', f"{fields['last']}, {fields['first']}").strip()
+        return f"{MERGED_FOLDER}/{name}.pdf"
+
+    @staticmethod
+    def bookmark(output):
+        """Bookmark title of a merged document: the name it was routed under."""
+        return Path(output).stem
+
+    def merge(self, output, fields, resumed=False):
+        """
+        Append the pages of output (a path relative to root) to its
+        student's PDF in MERGED_FOLDER, with a bookmark named after the
+        document, and delete it. Returns the merged PDF's relative path, or
+        None if the document has no name to merge by.
+
+        resumed means an earlier run died while merging this document: if
+        the student PDF already has its bookmark, it is not appended again.
+        """
+        relative = self.merge_target(fields)
+        if relative is None:
+            return None
+        import pikepdf
+        target = self.root / relative
+        title = self.bookmark(output)
+        part_file = self.root / output
+        with self._lock:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            partial = target.with_name(target.name + ".tmp")
+            with pikepdf.open(part_file) as part, \
+                    (pikepdf.open(target) if target.exists() else pikepdf.new()) as merged:
+                with merged.open_outline() as outline:
+                    append = not (resumed and any(item.title == title for item in outline.root))
+                    if append:
+                        start = len(merged.pages)
+                        merged.pages.extend(part.pages)
+                        outline.root.append(pikepdf.OutlineItem(title, start))
+                if append:
+                    merged.save(partial)
+            if append:
+                os.replace(partial, target)   # a crash mid-save never leaves a torn student PDF
+        self.discard(part_file)
+        return relative
+
+
+_worker_writers = {}   # output root -> OutputWriter, in conversion worker processes only
+
+
+def output_writer(output_root):
+    """
+    An OutputWriter for output_root. Worker processes live for one run (each
+    run starts its own pool), so they keep one writer per output folder; the
+    main process gets a fresh one per call, so files deleted or moved between
+    runs never keep their names taken.
+    """
+    if multiprocessing.parent_process() is None:
+        return OutputWriter(output_root)
+    key = os.path.abspath(output_root)
+    if key not in _worker_writers:
+        _worker_writers[key] = OutputWriter(output_root)
+    return _worker_writers[key]
+
+
+def write_pdf(img_path, output_file, pdf_bytes=None, ocr_jobs=None, has_text=False, deskew=True, options=None):
+    """
+    Write the searchable PDF for img_path to output_file — pdf_bytes from a
+    single OCR pass if given, otherwise ocrmypdf (deskewing unless the page
+    was already straightened, see decode_fields()) with the settings of an
+    OCR profile (see ocr_options(); balanced if None). With has_text (the
+    document's first page has text in its field regions, see
+    text_layer_fields()), pages that already carry a text layer are kept as
+    they are instead of being OCRed again.
+    The reserved output file is removed again on failure.
+    """
+    output_file = Path(output_file)
+    try:
+        if pdf_bytes is not None:
+            output_file.write_bytes(pdf_bytes)
+        else:
+            ocr_options = dict(OCR_PROFILES[DEFAULT_OCR_PROFILE] if options is None else options)
+            if ocr_jobs:
+                ocr_options["jobs"] = ocr_jobs
+            if has_text or ocr_options.pop("skip_text", False):
+                ocr_options["skip_text"] = True
+            else:
+                ocr_options["force_ocr"] = True
+            import ocrmypdf
+            ocrmypdf.ocr(
+                img_path,
+                output_file,
+                deskew=deskew,
+                **ocr_options
+            )
+    except Exception:
+        output_file.unlink(missing_ok=True)
+        raise
+
+
+def part_input(img_path, first, last, folder, pdf_bytes=None, source=None, deskew=True):
+    """
+    What write_pdf() converts for pages first..last of img_path, as
+    (source, pdf_bytes, deskew). A whole-file part (last None) keeps the
+    given ones; a page range is cut from the single-pass PDF or copied out
+    of the file into folder.
+    """
+    if last is None:
+        return source or img_path, pdf_bytes, deskew
+    if pdf_bytes is not None:
+        return img_path, pdf_page_range(pdf_bytes, first, last), True
+    return save_page_range(img_path, first, last, folder), None, True
+
+
+def convert_file(img_path, output_root, ocr_jobs=None, single_pass=False, template=None, split=False, hints=None,
+                 options=None):
+    """
+    Convert one scan to searchable PDF(s) under output_root/<subfolder>.
+
+    With single_pass, Tesseract OCRs the document once and that result both
+    names the file and becomes the PDF text layer; otherwise the page is
+    straightened, the fields are read from crops of it and ocrmypdf builds
+    the PDF. PDFs that already have a text layer are not OCRed at all. The
+    field regions come from the detected template profile, or the one named
+    by template. With split, a multi-page batch scan is divided into one
+    PDF per document (see document_parts()). hints is what an earlier search
+    found out about the file (DocumentCache.hints()): its template profile
+    and field texts are used instead of detecting and OCRing them again.
+    options are the ocrmypdf settings of the OCR profile (see ocr_options()).
+
+    Touches no GUI state: log lines are collected and returned in the
+    result dict instead.
+    """
+    img_path = Path(img_path)
+    messages = []
+    timings = {}   # stage -> seconds, reported back for RunMetrics
+    writer = output_writer(output_root)
+    written = []
+    try:
+        with tempfile.TemporaryDirectory(prefix="image_to_pdf_") as tmp:
+            pdf_bytes = words = None
+            source, deskew = img_path, True
+            pages = page_count(img_path)
+            hints = hints or {}
+            templates = get_templates()   # the engine loaded these first and logged any problem
+            if template is None and hints.get("template") in templates.names():
+                profile, size = templates.get(hints["template"]), hints["size"]
+            else:
+                profile, size = _timed(timings, "template", templates.detect, img_path, template)
+            known = hints.get("texts", {}) if profile.name == hints.get("template") else {}
+            regions = profile.boxes(size)
+            texts = _timed(timings, "text_layer", text_layer_fields, img_path, regions)
+            has_text = texts is not None
+            if has_text:
+                messages.append("  Using the existing PDF text layer.")
+            elif single_pass:
+                pdf_bytes, words = _timed(timings, "page_ocr", ocr_document_once, img_path)
+                texts = bucket_words(words, regions)
+            else:
+                area = union_box(regions.values())
+                img, source, deskew = decode_fields(img_path, area, timings, tmp)
+                todo = {field: box for field, box in regions.items() if field not in known}
+                texts = {field: known[field] for field in regions if field in known}
+                if texts:
+                    messages.append(f"  Reusing search OCR for: {', '.join(texts)}.")
+                if todo:
+                    texts.update(_timed(timings, "field_ocr", extract_fields, img, todo, origin=area[:2]))
+
+            def read_page(page):
+                if words is not None:
+                    return bucket_words(words, regions, page=page)
+                return _timed(timings, "page_fields", read_page_fields, img_path, regions, page)
+
+            parts = document_parts(texts, read_page, pages, split)
+            documents = []
+            for first, last, part_texts in parts:
+                if len(parts) > 1:
+                    messages.append(f"  Document {len(written) + 1}/{len(parts)}: pages {first}-{last}")
+                output_file, subfolder = writer.route(part_texts, img_path, log=messages.append)
+                written.append(output_file)
+                part_source, part_bytes, part_deskew = _timed(
+                    timings, "split", part_input, img_path, first, last, tmp, pdf_bytes, source, deskew)
+                part_has_text = has_text if first == 1 else text_layer_fields(img_path, regions, first) is not None
+                _timed(timings, "write", write_pdf, part_source, output_file, part_bytes, ocr_jobs, part_has_text,
+                       part_deskew, options)
+                documents.append({"output": f"{subfolder}/{output_file.name}", "pages": [first, last or pages],
+                                  "fields": document_fields(part_texts)})
+
+        outputs = [document["output"] for document in documents]
+        return {
+            "ok": True, "output": outputs[0], "outputs": outputs, "documents": documents, "messages": messages,
+            "timings": timings, "pages": pages, "template": profile.name,
+        }
+
+    except Exception as e:
+        for output_file in written:   # don't leave half a batch behind
+            writer.discard(output_file)
+        return {"ok": False, "error": str(e), "messages": messages, "timings": timings}
+
+
+VALID_EXTENSIONS = ('.pdf', '.jpg', '.jpeg', '.png', '.bmp', '.TIF', '.tiff', '.tif')
+
+
+def iter_source_files(folder, extensions=VALID_EXTENSIONS):
+    """Yield supported files under folder as they are found (symlinked folders are not followed)."""
+    stack = [os.fspath(folder)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.lower().endswith(extensions):
+                        yield entry.path
+        except OSError:
+            continue
+
+# End-of-stream marker passed between bulk pipeline stages
+_DONE = object()
+
+
+class FolderWatcher:
+    """
+    Reports new scans under a folder once they have finished arriving.
+
+    Uses filesystem notifications when the optional watchdog package is
+    installed. Otherwise it polls: only directory mtimes are checked, and
+    only directories that changed are listed again. A file is reported once
+    its size and mtime have been stable for `settle` seconds, so scans that
+    are still being copied in are not picked up half-written. Files under
+    the exclude folders (e.g. an output folder inside the watched one) are
+    never reported.
+    """
+
+    def __init__(self, folder, extensions=VALID_EXTENSIONS, poll_interval=2.0, settle=2.0,
+                 include_existing=False, exclude=()):
+        self.folder = os.fspath(folder)
+        self.extensions = tuple(ext.lower() for ext in extensions)
+        self.exclude = tuple(os.path.normcase(os.path.abspath(path)) for path in exclude)
+        self.poll_interval = poll_interval
+        self.settle = settle
+
+        self._lock = threading.Lock()
+        self._candidates = {}   # path -> ((size, mtime_ns), stable_since) or None if unchecked
+        self._known = set()     # files already seen (polling only)
+        self._dir_mtimes = {}   # directory -> mtime_ns (polling only)
+        self._last_poll = 0.0
+        self._observer = None
+
+        if Observer is not None:
+            watcher = self
+
+            class Handler(FileSystemEventHandler):
+                def on_created(self, event):
+                    if not event.is_directory:
+                        watcher._touch(event.src_path)
+
+                def on_modified(self, event):
+                    if not event.is_directory:
+                        watcher._touch(event.src_path)
+
+                def on_moved(self, event):
+                    if not event.is_directory:
+                        watcher._touch(event.dest_path)
+
+            self._observer = Observer()
+            self._observer.schedule(Handler(), self.folder, recursive=True)
+            self._observer.start()
+            if include_existing:
+                for path in iter_source_files(self.folder, self.extensions):
+                    self._touch(path)
+        else:
+            self._scan_dir(self.folder, report=include_existing)
+
+    @property
+    def using_notifications(self):
+        return self._observer is not None
+
+    def _excluded(self, path):
+        path = os.path.normcase(os.path.abspath(path))
+        return any(path == folder or path.startswith(folder + os.sep) for folder in self.exclude)
+
+    def _touch(self, path):
+        """Note that path appeared or changed; it is reported once it settles."""
+        if path.lower().endswith(self.extensions) and not self._excluded(path):
+            with self._lock:
+                self._candidates[path] = None
+
+    def _scan_dir(self, directory, report=True):
+        """Record a directory (recursively) for polling, reporting files not seen before."""
+        stack = [directory]
+        while stack:
+            current = stack.pop()
+            try:
+                self._dir_mtimes[current] = os.stat(current).st_mtime_ns
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.path not in self._dir_mtimes and not self._excluded(entry.path):
+                                stack.append(entry.path)
+                        elif entry.path not in self._known and entry.name.lower().endswith(self.extensions):
+                            self._known.add(entry.path)
+                            if report:
+                                self._touch(entry.path)
+            except OSError:
+                self._dir_mtimes.pop(current, None)
+
+    def _poll(self):
+        """Re-list only the directories whose mtime changed since the last poll."""
+        for directory, mtime_ns in list(self._dir_mtimes.items()):
+            try:
+                changed = os.stat(directory).st_mtime_ns != mtime_ns
+            except OSError:
+                del self._dir_mtimes[directory]
+                continue
+            if changed:
+                self._scan_dir(directory)
+
+    def ready(self):
+        """Return the files that have stopped changing since they were first noticed."""
+        now = time.monotonic()
+        if self._observer is None and now - self._last_poll >= self.poll_interval:
+            self._last_poll = now
+            self._poll()
+
+        settled = []
+        with self._lock:
+            for path, seen in list(self._candidates.items()):
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    del self._candidates[path]   # removed or renamed before it settled
+                    continue
+                signature = (st.st_size, st.st_mtime_ns)
+                if seen is None or seen[0] != signature:
+                    self._candidates[path] = (signature, now)
+                elif now - seen[1] >= self.settle and st.st_size > 0:
+                    settled.append(path)
+                    del self._candidates[path]
+        return settled
+
+    def close(self):
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+
+
+def _ignore_sigint():
+    """Pool initializer: leave Ctrl+C to the parent so it can stop gracefully."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+class WorkerPool:
+    """
+    Spawned process pool that replaces itself when one of its workers dies.
+
+    A worker killed mid-job (e.g. out of memory on a huge scan) breaks a
+    ProcessPoolExecutor for good: every later submit raises BrokenProcessPool.
+    Here the next submit() or run() starts a fresh pool instead, so one bad
+    file doesn't fail the rest of the run. Safe to share between threads.
+    """
+
+    def __init__(self, workers, log=print):
+        self.workers = workers
+        self.log = log
+        self._lock = threading.Lock()
+        self._pool = self._new_pool()
+
+    def _new_pool(self):
+        # "spawn" avoids forking a process that is running Tk and other threads.
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=_ignore_sigint)
+
+    def _current(self):
+        with self._lock:
+            return self._pool
+
+    def restart(self, broken):
+        """Replace the pool if it is still `broken` — another thread may have replaced it already."""
+        with self._lock:
+            if self._pool is broken:
+                self.log("⚠ A worker process died — restarting the worker pool.")
+                broken.shutdown(wait=False)
+                self._pool = self._new_pool()
+
+    def submit(self, fn, *args):
+        """Submit fn(*args), on a fresh pool if the current one is broken. Returns the Future."""
+        pool = self._current()
+        try:
+            return pool.submit(fn, *args)
+        except BrokenProcessPool:
+            self.restart(pool)
+            return self._current().submit(fn, *args)
+
+    def run(self, fn, *args):
+        """
+        Run fn(*args) on the pool and return its result. If a worker dies
+        meanwhile, the job is retried once on a fresh pool.
+        """
+        for attempt in range(2):
+            pool = self._current()
+            try:
+                return pool.submit(fn, *args).result()
+            except BrokenProcessPool:
+                if attempt:
+                    raise
+                self.restart(pool)
+
+    def shutdown(self, wait=True):
+        self._current().shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+
+class ConversionEngine:
+    """
+    GUI-free search and conversion core, shared by the Tk app and the CLI.
+
+    Settings are plain attributes. Status text goes to log(message) and
+    structured progress events to progress(event_dict); both may be called
+    from worker threads.
+    """
+
+    def __init__(self, input_path="", output_path="", workers=None, single_pass=False, resume=True,
+                 log=print, progress=None):
+        self.input_path = input_path
+        self.output_path = output_path
+        self.workers = workers or os.cpu_count() or 1
+        self.single_pass = single_pass
+        self.resume = resume    # skip files the output folder's job journal marks as done
+        self.valid_ext = VALID_EXTENSIONS
+        self.log = log
+        self.progress = progress or (lambda event: None)
+
+        self._ocr_index = None
+        self._ocr_index_failed = False
+        self._thumbnail_cache = None
+        self._thumbnail_cache_failed = False
+        self.document_cache = DocumentCache()   # what search learned, reused by Convert Selected
+        self.template = None           # template profile name; None detects one per file
+        self.ocr_profile = None        # ocrmypdf output profile name; None uses the configured default
+        self.split_documents = False   # one PDF per document in multi-page batch scans
+        self.merge_students = False    # fold each student's documents into one PDF in MERGED_FOLDER
+        self.manifest_format = "csv"   # run manifest format: "csv" or "json" (JSON lines)
+        self.manifest = None           # RunManifest of the conversion run in progress
+        self.writer = None             # OutputWriter of the conversion run in progress
+        self.metrics = None            # RunMetrics of the run in progress
+        self.metrics_path = None       # append each run's report here (.jsonl or .csv)
+
+        # Pause / stop control
+        self._pause_event = threading.Event()
+        self._pause_event.set()   # set = not paused
+        self._stop_event  = threading.Event()
+
+    # --- Run control ---
+
+    def reset(self):
+        """Clear any pause or stop request before a new run."""
+        self._pause_event.set()
+        self._stop_event.clear()
+
+    def pause(self):
+        self._pause_event.clear()
+
+    def resume(self):
+        self._pause_event.set()
+
+    @property
+    def paused(self):
+        return not self._pause_event.is_set()
+
+    def request_stop(self):
+        """Stop after the current file(s)."""
+        self._stop_event.set()
+        self._pause_event.set()   # unblock if paused so the run can exit
+
+    @property
+    def stop_requested(self):
+        return self._stop_event.is_set()
+
+    def _check_pause_stop(self):
+        """
+        Call this between files in any processing loop.
+        Blocks while paused. Returns True if a stop has been requested.
+        """
+        self._pause_event.wait()   # blocks until event is set (i.e. not paused)
+        return self._stop_event.is_set()
+
+    def _emit(self, event, **data):
+        """Send a structured progress event."""
+        self.progress(dict(event=event, **data))
+
+    def begin_metrics(self, run):
+        """Start collecting stage timings for a run."""
+        self.metrics = RunMetrics(run)
+        return self.metrics
+
+    def end_metrics(self):
+        """Finish the current run's metrics: log a summary, emit it and append it to metrics_path."""
+        metrics, self.metrics = self.metrics, None
+        if metrics is None:
+            return None
+        report = metrics.report()
+        if report["files"]:
+            self.log(f"⏱ {report['files']} file(s) in {report['wall_s']:.1f}s — "
+                     f"{report['files_per_s']:.2f} files/s, {report['pages_per_s']:.2f} pages/s")
+            for stage, stats in sorted(report["stages"].items(), key=lambda item: -item[1]["total_s"]):
+                self.log(f"    {stage:<12} total {stats['total_s']:8.2f}s   p50 {stats['p50_s']:.3f}s   "
+                         f"p90 {stats['p90_s']:.3f}s   max {stats['max_s']:.3f}s")
+        self._emit("metrics", **report)
+        if self.metrics_path:
+            try:
+                RunMetrics.write(report, self.metrics_path)
+            except OSError as e:
+                self.log(f"⚠ Could not write metrics report: {e}")
+        return report
+
+    def begin_manifest(self, run):
+        """Start a conversion run: its manifest and the OutputWriter it merges through."""
+        self.writer = OutputWriter(self.output_path)
+        try:
+            self.manifest = RunManifest(self.output_path, run, self.manifest_format)
+        except OSError as e:
+            self.manifest = None
+            self.log(f"⚠ Could not create the run manifest: {e}")
+        return self.manifest
+
+    def end_manifest(self):
+        """Close the current run's manifest."""
+        manifest, self.manifest = self.manifest, None
+        self.writer = None
+        if manifest is not None:
+            manifest.close()
+            self.log(f"📋 Manifest: {manifest.path}")
+
+    def _merge_documents(self, result, journal=None, source=None):
+        """
+        Fold each named document of a result into its student's PDF, updating
+        the result's outputs. With a JobJournal, the merge targets are
+        recorded first, so a resumed run doesn't append a document twice.
+        """
+        writer = self.writer or OutputWriter(self.output_path)
+        resumed = set()
+        if journal is not None:
+            resumed = journal.interrupted_merge(source)
+            merges = [{"target": writer.merge_target(document["fields"]), "bookmark": writer.bookmark(document["output"])}
+                      for document in result["documents"]]
+            merges = [merge for merge in merges if merge["target"]]
+            try:
+                if merges:
+                    outputs = [document["output"] for document in result["documents"]]
+                    journal.record(source, "merging", output=outputs, merge=merges)
+            except OSError as e:
+                result["messages"].append(f"  ⚠ Could not update job journal: {e}")
+        for document in result["documents"]:
+            try:
+                key = (writer.merge_target(document["fields"]), writer.bookmark(document["output"]))
+                merged = writer.merge(document["output"], document["fields"], resumed=key in resumed)
+            except Exception as e:   # pikepdf / OS errors: the document stays where it was routed
+                result["messages"].append(f"  ⚠ Could not merge {document['output']}: {e}")
+                continue
+            if merged:
+                document["routed"], document["output"] = document["output"], merged
+                result["messages"].append(f"  Merged into {merged}")
+        outputs = list(dict.fromkeys(document["output"] for document in result["documents"]))
+        result["output"], result["outputs"] = outputs[0], outputs
+
+    def _record_file(self, path, result, journal=None):
+        """
+        Merge a finished file's documents if asked to (recording the merge in
+        journal, if given), then add it to the run's metrics and manifest.
+        """
+        if self.merge_students and result["ok"] and result.get("documents"):
+            self._merge_documents(result, journal, path)
+        if self.metrics is not None and not result.get("stopped"):
+            self.metrics.add_file(path, result.get("timings", {}), result["ok"], result.get("pages", 1))
+        if self.manifest is not None:
+            try:
+                self.manifest.add(path, result)
+            except OSError as e:
+                self.log(f"  ⚠ Could not update the run manifest: {e}")
+
+    @property
+    def ocr_index(self):
+        """Persistent OCR cache, opened on first use; None if it cannot be opened."""
+        if self._ocr_index is None and not self._ocr_index_failed:
+            try:
+                self._ocr_index = OCRIndex()
+            except (OSError, sqlite3.Error) as e:
+                self._ocr_index_failed = True
+                self.log(f"⚠ OCR index unavailable ({e}) — searches will OCR every file.")
+        return self._ocr_index
+
+    @property
+    def thumbnail_cache(self):
+        """Persistent preview thumbnail cache, opened on first use; None if it cannot be opened."""
+        if self._thumbnail_cache is None and not self._thumbnail_cache_failed:
+            try:
+                self._thumbnail_cache = ThumbnailCache()
+            except (OSError, ValueError) as e:
+                self._thumbnail_cache_failed = True
+                self.log(f"⚠ Thumbnail cache unavailable ({e}) — previews will be decoded every time.")
+        return self._thumbnail_cache
+
+    def source_files(self, folder):
+        """All supported files under folder, recursively."""
+        return list(iter_source_files(folder, self.valid_ext))
+
+    # --- Search ---
+
+    def search(self, name, year=""):
+        """Search the input folder for name, optionally filtered by year. Returns the matched paths."""
+        self.log(f"Searching for {name}")
+        self.begin_metrics("search")
+        try:
+            matched_files = self.search_folders(self.input_path, name)
+
+            if year and matched_files and not self.stop_requested:
+                self.log(f"Filtering by year: {year}")
+                matched_files = self.search_images(matched_files, year)
+        finally:
+            self.end_metrics()
+
+        self._emit("search_done", matches=matched_files, stopped=self.stop_requested)
+        return matched_files
+
+    def open_as_image(self, file_path):
+        """Open any supported file as a PIL Image (first page for PDFs)."""
+        return open_as_image(file_path)
+
+    def open_region(self, file_path, box):
+        """Open just box of the first page — see the module-level open_region()."""
+        return open_region(file_path, box)
+
+    def search_folders(self, folder_path, search_for):
+        """
+        Partial keyword matching — returns file(s) with the most keyword hits (ties kept).
+
+        Keywords tolerate small OCR misreads (see token_matches()). With the
+        OCR index, only new or changed files are OCRed and the ranking is a
+        lookup in the index's token tables rather than a pass over every file.
+        """
+        keywords = search_for.split()
+        scores = {}  # img_path -> matched keyword count
+
+        all_files = self.source_files(folder_path)
+        total = len(all_files)
+        templates = get_templates(self.log)
+        search_keys = templates.region_keys("search")   # the name strip of every template
+        ocr_index = self.ocr_index
+        if ocr_index is not None:
+            to_scan = ocr_index.missing(all_files, search_keys)
+            self.log(f"{total - len(to_scan)} of {total} file(s) already in the OCR index; "
+                     f"scanning {len(to_scan)} new or changed file(s)...")
+        else:
+            to_scan = all_files
+            self.log(f"Scanning {total} file(s) for partial matches...")
+        self._emit("search_start", total=total, to_scan=len(to_scan))
+
+        for i, img_path in enumerate(to_scan, start=1):
+            if self._check_pause_stop():
+                self.log("⏹ Search stopped by user.")
+                break
+            file = os.path.basename(img_path)
+            self.log(f"  Scanning {i}/{len(to_scan)}: {file}")
+            count = 0
+            timings = {}
+            try:
+                profile, size = _timed(timings, "template", templates.detect, img_path, self.template)
+                self.document_cache.put_template(img_path, profile, size)
+                name_box = profile.search_box(size)
+                decoded = {}
+
+                def ocr_name():
+                    fields = _timed(timings, "text_layer", text_layer_fields, img_path, {"name": name_box})
+                    if fields is not None:
+                        return fields["name"]
+                    # Images are decoded whole anyway; keep the page in case this file matches
+                    page = decoded["page"] = _timed(timings, "decode", open_page, img_path)
+                    if page is not None:
+                        name_crop = page.crop(name_box)
+                    else:
+                        name_crop = _timed(timings, "decode", self.open_region, img_path, name_box)
+                    return _timed(timings, "name_ocr", pytesseract.image_to_string, preprocess_crop(name_crop)[0])
+
+                if ocr_index is not None:
+                    start, before = time.perf_counter(), sum(timings.values())
+                    text = ocr_index.text_for(img_path, profile.region_key("search"), ocr_name)[0]
+                    # Only the lookup itself: OCR run by text_for() is already booked under its own stages
+                    timings["index"] = time.perf_counter() - start - (sum(timings.values()) - before)
+                    # The ranking comes from the index below; this is the file's score for the progress event
+                    count = count_keyword_hits(keywords, text)
+                else:
+                    text = ocr_name()
+                    count = count_keyword_hits(keywords, text)
+                    if count > 0:
+                        scores[img_path] = count
+                if decoded.get("page") is not None and count:
+                    self.document_cache.put_page(img_path, decoded["page"])
+            except Exception as e:
+                self.log(f"  ✗ Error processing {file}: {e}")
+            if self.metrics is not None:
+                self.metrics.add_file(img_path, timings)
+            self._emit("search_progress", index=i, total=len(to_scan), path=img_path, score=count)
+
+        if ocr_index is not None:
+            # Everything indexed so far is ranked, also after a Stop
+            start = time.perf_counter()
+            scores = ocr_index.match_keywords(search_keys, keywords, all_files)
+            if self.metrics is not None:
+                self.metrics.count("index_hits", total - len(to_scan))
+                self.metrics.add_file("(index lookup)", {"match": time.perf_counter() - start})
+
+        for img_path, count in scores.items():
+            self.log(f"  ~ {count}/{len(keywords)} keyword(s) matched: {os.path.basename(img_path)}")
+            self._emit("search_match", path=img_path, score=count, keywords=len(keywords))
+
+        if not scores:
+            return []
+
+        best = max(scores.values())
+        partial_matched_files = [f for f, c in scores.items() if c == best]
+        self.log(f"  ✓ Best match: {best}/{len(keywords)} keyword(s) — {len(partial_matched_files)} file(s)")
+        return partial_matched_files
+
+    def search_images(self, matched_files, date):
+        """
+        Keep the matched files whose admission or graduation date is in the
+        given year.
+
+        Only those two regions are read — from the OCR index, the PDF text
+        layer, or one OCR pass over their crops — and the years found there
+        are compared. A file with no readable year in either region is left
+        out (and logged) rather than OCRed again page-wide.
+        """
+        wanted = parse_years(date)
+        templates = get_templates(self.log)
+        ocr_index = self.ocr_index
+        files = []
+
+        for file in matched_files:
+            if self._check_pause_stop():
+                self.log("⏹ Year filter stopped by user.")
+                break
+            timings = {}
+            try:
+                texts = {}
+                profile, size = _timed(timings, "template", templates.detect, file, self.template)
+                self.document_cache.put_template(file, profile, size)
+                page = self.document_cache.page(file)   # decoded by search_folders() if it looked like a match
+                boxes = profile.boxes(size)
+                date_regions = {field: boxes[field] for field in ("admission", "graduation")}
+                area = union_box(date_regions.values())
+
+                def read_dates():
+                    # Both regions come from one pass; the index asks for them one at a time
+                    if not texts:
+                        fields = _timed(timings, "text_layer", text_layer_fields, file, date_regions)
+                        if fields is None:
+                            if page is not None:
+                                img = page.crop(area)
+                            else:
+                                img = _timed(timings, "decode", self.open_region, file, area)
+                            fields = _timed(timings, "date_ocr", extract_fields, img, date_regions, origin=area[:2])
+                        texts.update(fields)
+                    return texts
+
+                if ocr_index is not None:
+                    date_texts = {
+                        field: ocr_index.text_for(file, profile.region_key(field),
+                                                  lambda field=field: read_dates()[field])[0]
+                        for field in date_regions
+                    }
+                else:
+                    date_texts = dict(read_dates())
+                self.document_cache.put_texts(file, date_texts)
+                text = "\n".join(date_texts.values())
+
+                years = parse_years(text)
+                if self.metrics is not None:
+                    self.metrics.add_file(file, timings)
+
+                if wanted and not years:
+                    self.log(f"  ⚠ No date found in the date fields of {os.path.basename(file)} — "
+                             f"left out of the year filter's results.")
+                elif (wanted & years) if wanted else date.lower() in text.lower():
+                    files.append(file)
+
+            except Exception as e:
+                self.log(f"Error processing {file}: {e}")
+
+        return files
+
+    # --- Conversion ---
+
+    def generate_filename(self, name_text, admission_text, graduation_text, degree_text, fallback_stem):
+        """Generate (filename_stem, subfolder) — see the module-level generate_filename()."""
+        return generate_filename(name_text, admission_text, graduation_text, degree_text, fallback_stem, log=self.log)
+
+    def ocr_options(self):
+        """ocrmypdf settings of the selected OCR profile (None in single-pass mode, which skips ocrmypdf)."""
+        if self.single_pass:
+            return None
+        options = ocr_options(self.ocr_profile, log=self.log)
+        self.log(f"OCR profile: {self.ocr_profile or get_ocr_profiles(self.log)[1]}")
+        return options
+
+    def convert_image(self, image_path):
+        """Convert single image to PDF, routing to the correct output subfolder. Returns the result dict."""
+        self.log(f"Converting {Path(image_path).name} to PDF...")
+
+        result = convert_file(image_path, self.output_path, single_pass=self.single_pass, template=self.template,
+                              split=self.split_documents, hints=self.document_cache.hints(image_path),
+                              options=self.ocr_options())
+        self._finish_file(image_path, result)
+        return result
+
+    def _finish_file(self, image_path, result, **progress):
+        """Log and report one convert_file() result."""
+        self._record_file(image_path, result)
+        for message in result["messages"]:
+            self.log(message)
+
+        if result["ok"]:
+            self.log(f"✓ Saved to: {', '.join(result['outputs'])}")
+        else:
+            self.log(f"✗ Error converting {image_path}: {result['error']}")
+
+        self._emit("file_done", path=str(image_path), **progress, **_result_fields(result))
+
+    def convert_files(self, paths):
+        """
+        Convert the given files (e.g. the selected search matches) on a pool
+        of up to `workers` processes. Returns a summary dict with converted,
+        errors, total, stopped and failed (path -> error).
+
+        No more files than workers are in flight at once. Pause holds back
+        new files while the ones in progress finish; Stop lets those finish
+        and leaves the rest unconverted.
+
+        A worker process that dies fails only the file it was converting;
+        the pool is restarted for the rest.
+        """
+        paths = [str(path) for path in paths]
+        total = len(paths)
+        workers = max(1, min(int(self.workers), total))
+        ocr_jobs = 1 if workers > 1 else None
+
+        options = self.ocr_options()
+        self.log(f"Converting {total} file(s) with {workers} worker(s)...")
+        self._emit("convert_start", total=total, workers=workers)
+        self.begin_metrics("convert")
+        self.begin_manifest("convert")
+
+        converted = 0
+        failed = {}
+        next_index = 0
+        in_flight = {}
+
+        try:
+            with WorkerPool(workers, self.log) as pool:
+                while True:
+                    while (next_index < total and len(in_flight) < workers
+                           and not self.paused and not self._stop_event.is_set()):
+                        path = paths[next_index]
+                        next_index += 1
+                        future = pool.submit(convert_file, path, self.output_path, ocr_jobs, self.single_pass,
+                                             self.template, self.split_documents, self.document_cache.hints(path),
+                                             options)
+                        in_flight[future] = path
+                    if not in_flight:
+                        if next_index >= total or self._stop_event.is_set():
+                            break
+                        self._stop_event.wait(0.2)   # paused with nothing in progress
+                        continue
+
+                    done, _ = wait(in_flight, timeout=0.5, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        path = in_flight.pop(future)
+                        try:
+                            result = future.result()
+                        except Exception as e:   # e.g. its worker died; the pool restarts for the next file
+                            result = {"ok": False, "error": str(e) or type(e).__name__, "messages": [],
+                                      "timings": {}}
+                        if result["ok"]:
+                            converted += 1
+                        else:
+                            failed[path] = result["error"]
+                        self.log(f"[{converted + len(failed)}/{total}] {os.path.basename(path)}")
+                        self._finish_file(path, result, converted=converted, errors=len(failed), total=total)
+
+            stopped = self._stop_event.is_set() and converted + len(failed) < total
+            self.log("=" * 50)
+            self.log("Conversion stopped by user." if stopped else "Conversion complete!")
+            self.log(f"Successfully converted: {converted}/{total}")
+            self.log(f"Errors: {len(failed)}")
+            for path, error in failed.items():
+                self.log(f"  ✗ {os.path.basename(path)}: {error}")
+            if stopped:
+                self.log(f"Not converted (stopped): {total - converted - len(failed)}")
+            self.log("=" * 50)
+        finally:
+            # Also when the run fails part-way, so the manifest and metrics cover what was converted
+            self.end_manifest()
+            self.end_metrics()
+
+        summary = {"converted": converted, "errors": len(failed), "total": total, "stopped": stopped,
+                   "failed": failed}
+        self._emit("convert_done", **summary)
+        return summary
+
+    def _start_stage(self, name, func, inbox, outbox, count, results):
+        """
+        Start `count` threads that apply func to jobs from inbox and put the
+        return value on outbox. A job that raises goes straight to results as
+        a failure; after Stop, queued jobs are dropped and reported to results
+        as stopped. The _DONE marker is passed on once the last thread of the
+        stage has finished.
+        """
+        remaining = [count]
+        lock = threading.Lock()
+
+        def run():
+            while True:
+                job = inbox.get()
+                if job is _DONE:
+                    inbox.put(_DONE)   # let the other threads of this stage see it too
+                    break
+                if self._check_pause_stop():
+                    results.put({"path": job["path"], "ok": False, "stopped": True,
+                                 "error": "stopped before conversion", "messages": job["messages"],
+                                 "timings": job.get("timings", {})})
+                    continue
+                try:
+                    outbox.put(func(job))
+                except Exception as e:
+                    results.put({"path": job["path"], "ok": False, "error": str(e), "messages": job["messages"],
+                                 "timings": job.get("timings", {})})
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                outbox.put(_DONE)
+
+        for i in range(count):
+            threading.Thread(target=run, name=f"{name}-{i + 1}", daemon=True).start()
+
+    def bulk_convert(self):
+        """
+        Convert every supported file under the input folder.
+        Returns a summary dict with converted, errors, skipped, total and stopped.
+
+        With resume set, files the output folder's JobJournal records as
+        converted are skipped and earlier failures are retried.
+
+        Work flows through concurrent stages joined by bounded queues:
+        scan → decode and deskew → field OCR → PDF writer. The scan feeds
+        files as it finds them, only the field strips of decoded pages are
+        held while queued, and the ocrmypdf writers run on a process pool.
+        """
+        self.log("=== Starting Bulk Convert Mode ===")
+
+        input_folder = Path(self.input_path)
+        output_folder = Path(self.output_path)
+
+        if not input_folder.exists():
+            raise FileNotFoundError(f"Input folder not found: {input_folder}")
+
+        workers = max(1, int(self.workers))
+        single_pass = self.single_pass
+        split = self.split_documents
+        ocr_jobs = 1 if workers > 1 else None
+        options = self.ocr_options()
+
+        journal = JobJournal(output_folder)
+        if self.resume and journal.path.stat().st_size:
+            self.log(f"Resuming from job journal: {journal.path}")
+
+        self.log(f"Scanning and converting with {workers} worker(s)...")
+        self.log("")
+        self._emit("bulk_start", workers=workers)
+        self.begin_metrics("bulk")
+        self.begin_manifest("bulk")
+        writer = self.writer
+
+        # Bounded queues give backpressure: the scanner and decoders never run
+        # more than a few files ahead of OCR and the writers.
+        scan_q = queue.Queue(maxsize=workers * 4)
+        ocr_q = queue.Queue(maxsize=workers * 2)
+        write_q = queue.Queue(maxsize=workers * 2)
+        results = queue.Queue()
+
+        scan = {"total": 0, "skipped": 0, "complete": False, "stopped": False}
+
+        def scanner():
+            try:
+                for path in iter_source_files(input_folder, self.valid_ext):
+                    if self._stop_event.is_set():
+                        scan["stopped"] = True
+                        break
+                    if self.resume:
+                        try:
+                            if journal.is_done(path):
+                                scan["skipped"] += 1
+                                continue
+                            journal.discard_partial(path)
+                        except OSError:
+                            pass
+                    scan["total"] += 1
+                    scan_q.put({"path": Path(path), "messages": [], "timings": {}, "queued": time.perf_counter()})
+            finally:
+                scan["complete"] = True
+                scan_q.put(_DONE)
+
+        templates = get_templates(self.log)
+
+        def detect(job):
+            """Pick the job's template profile and its field regions in pixels."""
+            profile, size = _timed(job["timings"], "template", templates.detect, job["path"], self.template)
+            job["template"] = profile.name
+            job["regions"] = profile.boxes(size)
+            job["area"] = union_box(job["regions"].values())
+
+        def waited(job):
+            """Book the time a job sat in the queue before this stage picked it up."""
+            now = time.perf_counter()
+            job["timings"]["queue_wait"] = job["timings"].get("queue_wait", 0.0) + now - job["queued"]
+            job["queued"] = now
+
+        def decode(job):
+            waited(job)
+            timings = job["timings"]
+            detect(job)
+            job["texts"] = _timed(timings, "text_layer", text_layer_fields, job["path"], job["regions"])
+            if job["texts"] is None:
+                # Only the field strip is queued, keeping queued images small
+                job["img"], job["source"], job["deskew"] = decode_fields(
+                    job["path"], job["area"], timings, page_dir)
+            job["queued"] = time.perf_counter()
+            return job
+
+        def ocr(job):
+            waited(job)
+            log = job["messages"].append
+            timings = job["timings"]
+            if "texts" not in job:
+                detect(job)
+                job["texts"] = _timed(timings, "text_layer", text_layer_fields, job["path"], job["regions"])
+            words = None
+            if job["texts"] is not None:
+                texts = job["texts"]
+                log("  Using the existing PDF text layer.")
+            elif single_pass:
+                job["pdf_bytes"], words = _timed(timings, "page_ocr", ocr_document_once, job["path"])
+                texts = bucket_words(words, job["regions"])
+            else:
+                texts = _timed(timings, "field_ocr", extract_fields, job.pop("img"), job["regions"],
+                               origin=job["area"][:2])
+
+            def read_page(page):
+                if words is not None:
+                    return bucket_words(words, job["regions"], page=page)
+                return _timed(timings, "page_fields", read_page_fields, job["path"], job["regions"], page)
+
+            job["pages"] = page_count(job["path"])
+            job["parts"] = document_parts(texts, read_page, job["pages"], split)
+            job["queued"] = time.perf_counter()
+            return job
+
+        # Straightened pages wait in page_dir for the writers; anything a failed
+        # or stopped job leaves behind is removed with it.
+        with tempfile.TemporaryDirectory(prefix="image_to_pdf_pages_") as page_dir, \
+                WorkerPool(workers, self.log) as pool:
+
+            def write(job):
+                waited(job)
+                log = job["messages"].append
+                timings = job["timings"]
+                pdf_bytes = job.pop("pdf_bytes", None)
+                has_text = job["texts"] is not None
+                # Output names are only reserved here, so a job dropped on Stop leaves no empty PDF behind
+                written, documents = [], []
+                try:
+                    for first, last, part_texts in job["parts"]:
+                        if len(job["parts"]) > 1:
+                            log(f"  Document {len(written) + 1}/{len(job['parts'])}: pages {first}-{last}")
+                        output_file, subfolder = writer.route(part_texts, job["path"], log=log)
+                        written.append(output_file)
+                        documents.append({"output": f"{subfolder}/{output_file.name}",
+                                          "pages": [first, last or job["pages"]],
+                                          "fields": document_fields(part_texts)})
+                    outputs = [document["output"] for document in documents]
+                    journal.record(job["path"], "started", output=outputs)
+                    for (first, last, _), output_file in zip(job["parts"], written):
+                        source, part_bytes, deskew = _timed(
+                            timings, "split", part_input, job["path"], first, last, page_dir, pdf_bytes,
+                            job.get("source"), job.get("deskew", True))
+                        try:
+                            if part_bytes is not None:
+                                _timed(timings, "write", write_pdf, job["path"], output_file, part_bytes)
+                            else:
+                                part_has_text = (has_text if first == 1 else
+                                                 text_layer_fields(job["path"], job["regions"], first) is not None)
+                                # A worker dying restarts the shared pool and retries this part once
+                                _timed(timings, "write", pool.run, write_pdf, source, output_file, None, ocr_jobs,
+                                       part_has_text, deskew, options)
+                        finally:
+                            if source != job["path"]:
+                                Path(source).unlink(missing_ok=True)   # straightened page or page range copy
+                except Exception:
+                    for output_file in written:   # don't leave half a batch behind
+                        writer.discard(output_file)
+                    raise
+                return {
+                    "path": job["path"], "ok": True, "messages": job["messages"],
+                    "output": outputs[0], "outputs": outputs, "documents": documents,
+                    "sha256": _timed(timings, "hash", file_digest, job["path"]),
+                    "timings": timings, "pages": job["pages"], "template": job["template"],
+                }
+
+            threading.Thread(target=scanner, name="scan", daemon=True).start()
+            if single_pass:
+                # Tesseract reads the file itself, so there is nothing to decode
+                self._start_stage("ocr", ocr, scan_q, write_q, workers, results)
+            else:
+                self._start_stage("decode", decode, scan_q, ocr_q, min(workers, 4), results)
+                self._start_stage("ocr", ocr, ocr_q, write_q, workers, results)
+            self._start_stage("write", write, write_q, results, workers, results)
+
+            converted = 0
+            errors = 0
+            not_converted = 0
+            while True:
+                result = results.get()
+                if result is _DONE:
+                    break
+                img_path = result.pop("path")
+                self._record_file(img_path, result, journal)
+                if result.get("stopped"):
+                    # Left out of the journal, so a resumed run picks it up again
+                    not_converted += 1
+                    continue
+                total = f"{scan['total']}" if scan["complete"] else f"{scan['total']}+"
+                for message in result["messages"]:
+                    self.log(message)
+                try:
+                    if result["ok"]:
+                        journal.record(img_path, "done", output=result["outputs"], sha256=result["sha256"])
+                    else:
+                        journal.record(img_path, "error", error=result["error"])
+                except OSError as e:
+                    self.log(f"  ⚠ Could not update job journal: {e}")
+                if result["ok"]:
+                    converted += 1
+                    self.log(f"  ✓ {img_path.name} → {', '.join(result['outputs'])} ({converted}/{total})")
+                else:
+                    errors += 1
+                    self.log(f"  ✗ Error converting {img_path.name}: {result['error']}")
+                self.log("")
+                self._emit("file_done", path=str(img_path), converted=converted, errors=errors,
+                           total=scan["total"], scan_complete=scan["complete"], **_result_fields(result))
+
+        journal.close()
+        total_files = scan["total"]
+        stopped = self.stop_requested and (scan["stopped"] or converted + errors < total_files)
+        if stopped:
+            self.log("⏹ Stopped by user.")
+
+        # Summary
+        self.log("=" * 50)
+        if stopped:
+            self.log("Bulk conversion stopped by user.")
+        else:
+            self.log("Bulk conversion complete!")
+        self.log(f"Successfully converted: {converted}/{total_files}")
+        self.log(f"Errors: {errors}")
+        if scan["skipped"]:
+            self.log(f"Skipped (already converted): {scan['skipped']}")
+        if not_converted:
+            self.log(f"Not converted (stopped): {not_converted}")
+        self.log("=" * 50)
+        if self.metrics is not None:
+            self.metrics.count("skipped", scan["skipped"])
+        self.end_manifest()
+        self.end_metrics()
+
+        summary = {
+            "converted": converted, "errors": errors, "skipped": scan["skipped"],
+            "total": total_files, "stopped": stopped,
+        }
+        self._emit("bulk_done", **summary)
+        return summary
+
+    def watch(self, poll_interval=2.0, settle=2.0, include_existing=False):
+        """
+        Convert scans as they arrive in the input folder, until Stop is requested.
+        Returns a summary dict with converted and errors.
+
+        Files are converted once they have been stable for `settle` seconds.
+        Existing files are left alone unless include_existing is set; files
+        the job journal already records as converted are always skipped.
+        """
+        self.log("=== Starting Watch Mode ===")
+
+        input_folder = Path(self.input_path)
+        output_folder = Path(self.output_path)
+
+        if not input_folder.exists():
+            raise FileNotFoundError(f"Input folder not found: {input_folder}")
+
+        workers = max(1, int(self.workers))
+        ocr_jobs = 1 if workers > 1 else None
+        options = self.ocr_options()
+        journal = JobJournal(output_folder)
+        # The output folder may live inside the input folder; its PDFs are not new scans
+        watcher = FolderWatcher(input_folder, self.valid_ext, poll_interval, settle, include_existing,
+                                exclude=[output_folder])
+        how = "filesystem notifications" if watcher.using_notifications else f"polling every {poll_interval:g}s"
+        self.log(f"Watching {input_folder} ({how}) — press Stop to end.")
+        self._emit("watch_start", workers=workers, notifications=watcher.using_notifications)
+        self.begin_metrics("watch")
+        self.begin_manifest("watch")
+
+        converted = 0
+        errors = 0
+        in_flight = {}
+
+        def collect(future):
+            nonlocal converted, errors
+            img_path = Path(in_flight.pop(future))
+            try:
+                result = future.result()
+            except Exception as e:   # e.g. a worker process died
+                result = {"ok": False, "error": str(e), "messages": [], "timings": {}}
+            self._record_file(img_path, result, journal)
+            for message in result["messages"]:
+                self.log(message)
+            try:
+                if result["ok"]:
+                    journal.record(img_path, "done", output=result["outputs"], sha256=file_digest(img_path))
+                else:
+                    journal.record(img_path, "error", error=result["error"])
+            except OSError as e:
+                self.log(f"  ⚠ Could not update job journal: {e}")
+            if result["ok"]:
+                converted += 1
+                self.log(f"  ✓ {img_path.name} → {', '.join(result['outputs'])}")
+            else:
+                errors += 1
+                self.log(f"  ✗ Error converting {img_path.name}: {result['error']}")
+            self._emit("file_done", path=str(img_path), converted=converted, errors=errors,
+                       **_result_fields(result))
+
+        def new_pool():
+            # "spawn" avoids forking a process that is running Tk and other threads.
+            return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                       initializer=_ignore_sigint)
+
+        pool = new_pool()
+        try:
+            while not self._stop_event.is_set():
+                if not self.paused:
+                    for path in watcher.ready():
+                        try:
+                            if journal.is_done(path):
+                                continue
+                        except OSError:
+                            continue
+                        self.log(f"New scan: {os.path.relpath(path, input_folder)}")
+                        args = (convert_file, path, output_folder, ocr_jobs, self.single_pass,
+                                self.template, self.split_documents, None, options)
+                        try:
+                            future = pool.submit(*args)
+                        except BrokenProcessPool:
+                            # A worker died; its files fail in collect() and a fresh pool takes the rest
+                            self.log("⚠ A worker process died — restarting the worker pool.")
+                            pool.shutdown(wait=False)
+                            pool = new_pool()
+                            future = pool.submit(*args)
+                        in_flight[future] = path
+                for future in [f for f in in_flight if f.done()]:
+                    collect(future)
+                self._stop_event.wait(0.5)
+
+            # Stop requested — let the files in progress finish
+            for future in list(in_flight):
+                collect(future)
+        finally:
+            pool.shutdown()
+            watcher.close()
+            journal.close()
+
+        self.log("=" * 50)
+        self.log("Watch mode stopped.")
+        self.log(f"Converted: {converted}")
+        self.log(f"Errors: {errors}")
+        self.log("=" * 50)
+        self.end_manifest()
+        self.end_metrics()
+
+        summary = {"converted": converted, "errors": errors}
+        self._emit("watch_done", **summary)
+        return summary
+
+
+def _result_fields(result):
+    """convert_file() result without the log lines, for progress events."""
+    return {key: value for key, value in result.items() if key != "messages"}
+
 
 class ImageToPDFApp:
     def __init__(self, root):
@@ -129,14 +3424,24 @@ class ImageToPDFApp:
         self.search_name = tk.StringVar()
         self.search_year = tk.StringVar()
         self.mode = tk.StringVar(value="search")  # ADDED for mode selection
-        self.valid_ext = ('.pdf', '.jpg', '.jpeg', '.png', '.bmp', '.TIF', '.tiff', '.tif')
-
-        # Pause / stop control
-        self._pause_event = threading.Event()
-        self._pause_event.set()   # set = not paused
-        self._stop_event  = threading.Event()
+        self.workers = tk.IntVar(value=os.cpu_count() or 1)  # bulk conversion processes
+        self.single_pass = tk.BooleanVar(value=False)        # one OCR run per page, no ocrmypdf
+        self.resume = tk.BooleanVar(value=True)              # skip files already in the job journal
+        self.template = tk.StringVar(value="Auto")           # crop-region profile; Auto detects per page
+        self.split_documents = tk.BooleanVar(value=False)    # one PDF per document in batch scans
+        self.merge_students = tk.BooleanVar(value=False)     # one PDF per student instead of per scan
+
+        # Log lines from any thread are queued and drained into the widget on the Tk thread
+        self._log_q = queue.Queue()
+        self._log_file = open_log_file()
+        self.ocr_profile = tk.StringVar(value=get_ocr_profiles(self.log)[1])   # ocrmypdf size / speed trade-off
+
+        # Search / conversion core (also used headless by the CLI)
+        self.engine = ConversionEngine(log=self.log)
+        self.engine.metrics_path = LOG_FILE.parent / "metrics.jsonl"
 
         self.create_widgets()
+        self._drain_log()
 
     def create_widgets(self):
         # Title
@@ -162,6 +3467,28 @@ class ImageToPDFApp:
         tk.Entry(path_frame, textvariable=self.output_path, width=40).grid(row=1, column=1, padx=5)
         tk.Button(path_frame, text="Browse", command=self.browse_output).grid(row=1, column=2)
 
+        tk.Label(path_frame, text="Workers:").grid(row=2, column=0, sticky="w", pady=5)
+        tk.Spinbox(path_frame, from_=1, to=max(64, os.cpu_count() or 1), textvariable=self.workers,
+                   width=5).grid(row=2, column=1, padx=5, sticky="w")
+        tk.Checkbutton(path_frame, text="Single OCR pass (faster, no deskew)",
+                       variable=self.single_pass).grid(row=3, column=1, padx=5, sticky="w")
+        tk.Checkbutton(path_frame, text="Resume: skip files already converted into this output folder",
+                       variable=self.resume).grid(row=4, column=1, padx=5, sticky="w")
+
+        tk.Checkbutton(path_frame, text="Split multi-page batch scans into one PDF per document",
+                       variable=self.split_documents).grid(row=5, column=1, padx=5, sticky="w")
+
+        tk.Label(path_frame, text="Template:").grid(row=6, column=0, sticky="w", pady=5)
+        tk.OptionMenu(path_frame, self.template, "Auto", *get_templates(self.log).names()).grid(
+            row=6, column=1, padx=5, sticky="w")
+
+        tk.Label(path_frame, text="OCR Profile:").grid(row=7, column=0, sticky="w", pady=5)
+        tk.OptionMenu(path_frame, self.ocr_profile, *get_ocr_profiles(self.log)[0]).grid(
+            row=7, column=1, padx=5, sticky="w")
+
+        tk.Checkbutton(path_frame, text=f"Merge each student's documents into one PDF ({MERGED_FOLDER}/)",
+                       variable=self.merge_students).grid(row=8, column=1, padx=5, sticky="w")
+
         # Mode Selection
         self.mode_frame = tk.LabelFrame(
             self.root,
@@ -190,6 +3517,15 @@ class ImageToPDFApp:
             font=("Arial", 9)
         ).pack(anchor="w", pady=3)
 
+        tk.Radiobutton(
+            self.mode_frame,
+            text="Watch Mode - Convert new scans as they arrive in the input folder",
+            variable=self.mode,
+            value="watch",
+            command=self.toggle_mode,
+            font=("Arial", 9)
+        ).pack(anchor="w", pady=3)
+
         # Search Options Frame
         self.search_frame = tk.Frame(self.root, padx=20, pady=10)
         self.search_frame.pack(fill="x")
@@ -256,47 +3592,59 @@ class ImageToPDFApp:
         self.start_button.config(state="normal")
         self.pause_button.config(state="disabled", text="Pause", bg="#e67e00")
         self.stop_button.config(state="disabled")
-        self._pause_event.set()
-        self._stop_event.clear()
+        self.engine.reset()
 
     def toggle_pause(self):
         """Pause or resume processing."""
-        if self._pause_event.is_set():
-            self._pause_event.clear()
+        if not self.engine.paused:
+            self.engine.pause()
             self.pause_button.config(text="Resume", bg="#27ae60")
             self.log("⏸ Paused — click Resume to continue.")
         else:
-            self._pause_event.set()
+            self.engine.resume()
             self.pause_button.config(text="Pause", bg="#e67e00")
             self.log("▶ Resumed.")
 
     def request_stop(self):
         """Signal the worker thread to stop after the current file."""
-        self._stop_event.set()
-        self._pause_event.set()   # unblock if paused so thread can exit
+        self.engine.request_stop()
         self.pause_button.config(state="disabled")
         self.stop_button.config(state="disabled")
         self.log("⏹ Stop requested — finishing current file...")
 
-    def _check_pause_stop(self):
-        """
-        Call this between files in any processing loop.
-        Blocks while paused. Returns True if a stop has been requested.
-        """
-        self._pause_event.wait()   # blocks until event is set (i.e. not paused)
-        return self._stop_event.is_set()
-
     def toggle_mode(self):
         """Show/hide search options based on mode"""
-        if self.mode.get() == "bulk":
+        if self.mode.get() != "search":
             self.search_frame.pack_forget()
         else:
             self.search_frame.pack(fill="x", padx=20, pady=10, after=self.mode_frame)
 
     def log(self, message):
-        self.log_text.insert(tk.END, f"{message}\n")
-        self.log_text.see(tk.END)
-        self.root.update_idletasks()
+        """Queue a log line — safe to call from any thread."""
+        self._log_q.put(message)
+        if self._log_file is not None:
+            self._log_file.info(message)
+
+    def _drain_log(self, batch=500):
+        """Move queued log lines into the widget in one insert, trimming it to LOG_WIDGET_MAX_LINES."""
+        lines = []
+        try:
+            while len(lines) < batch:
+                lines.append(self._log_q.get_nowait())
+        except queue.Empty:
+            pass
+        if lines:
+            self.log_text.insert(tk.END, "\n".join(lines) + "\n")
+            excess = int(self.log_text.index("end-1c").split(".")[0]) - 1 - LOG_WIDGET_MAX_LINES
+            if excess > 0:
+                self.log_text.delete("1.0", f"{excess + 1}.0")
+            self.log_text.see(tk.END)
+        # Come back sooner while a backlog remains
+        self.root.after(10 if len(lines) == batch else 100, self._drain_log)
+
+    def _dialog(self, show, title, message):
+        """Show a messagebox (e.g. messagebox.showinfo) from a worker thread, on the Tk thread."""
+        self.root.after(0, lambda: show(title, message))
 
     def browse_input(self):
         folder = filedialog.askdirectory(title="Select Input Folder")
@@ -326,8 +3674,16 @@ class ImageToPDFApp:
                 return
 
         # Reset and start
-        self._stop_event.clear()
-        self._pause_event.set()
+        self.engine.reset()
+        self.engine.input_path = input_folder
+        self.engine.output_path = output_folder
+        self.engine.workers = self._worker_count()
+        self.engine.single_pass = self.single_pass.get()
+        self.engine.resume = self.resume.get()
+        self.engine.template = None if self.template.get() == "Auto" else self.template.get()
+        self.engine.split_documents = self.split_documents.get()
+        self.engine.ocr_profile = self.ocr_profile.get()
+        self.engine.merge_students = self.merge_students.get()
         self.start_button.config(state="disabled")
         self.pause_button.config(state="normal", text="Pause", bg="#e67e00")
         self.stop_button.config(state="normal")
@@ -344,15 +3700,17 @@ class ImageToPDFApp:
                 # Search mode: buttons re-enabled by preview window on close,
                 # or immediately below if nothing was found / stopped early.
                 return
+            elif self.mode.get() == "watch":
+                self.watch_mode()
             else:
                 self.bulk_convert_mode()
 
         except Exception as e:
             self.log(f"Error: {str(e)}")
-            messagebox.showerror("Error", str(e))
+            self._dialog(messagebox.showerror, "Error", str(e))
 
         finally:
-            # Always reset for bulk mode; search mode resets via preview close
+            # Always reset for bulk/watch mode; search mode resets via preview close
             if self.mode.get() != "search":
                 self.root.after(0, self._reset_buttons)
 
@@ -360,118 +3718,54 @@ class ImageToPDFApp:
         """Search for specific documents"""
         self.log("=== Starting Search Mode ===")
 
-        input_folder = self.input_path.get()
-        name = self.search_name.get()
-        year = self.search_year.get()
+        matched_files = self.engine.search(self.search_name.get(), self.search_year.get())
 
-        self.log(f"Searching for {name}")
-        matched_files = self.search_folders(input_folder, name)
-
-        if year and matched_files:
-            self.log(f"Filtering by year: {year}")
-            matched_files = self.search_images(matched_files, year)
-
-        if matched_files and not self._stop_event.is_set():
+        if matched_files and not self.engine.stop_requested:
             self.log(f"Found {len(matched_files)} matching file(s). Opening preview...")
             self.root.after(0, lambda: self.show_preview_window(matched_files))
         else:
-            if self._stop_event.is_set():
+            if self.engine.stop_requested:
                 self.log("Search stopped — no preview shown.")
             else:
                 self.log("No matching files found.")
-                messagebox.showinfo("No Results", "No matching documents found.")
+                self._dialog(messagebox.showinfo, "No Results", "No matching documents found.")
             self.root.after(0, self._reset_buttons)
 
+    def _worker_count(self):
+        """Number of bulk conversion processes from the Workers setting (defaults to CPU count)."""
+        try:
+            return max(1, int(self.workers.get()))
+        except (tk.TclError, ValueError):
+            return os.cpu_count() or 1
+
     def bulk_convert_mode(self):
         """Convert all images to PDFs"""
-        self.log("=== Starting Bulk Convert Mode ===")
-
-        input_folder = Path(self.input_path.get())
-        output_folder = Path(self.output_path.get())
-
-        if not input_folder.exists():
-            raise FileNotFoundError(f"Input folder not found: {input_folder}")
-
-        converted = 0
-        errors = 0
-        total_files = 0
-
-        # Count files
-        for root, dirs, files in os.walk(input_folder, followlinks=False):
-            for file in files:
-                if file.lower().endswith(self.valid_ext):
-                    total_files += 1
-
-        self.log(f"Found {total_files} image(s) to convert.")
-        self.log("")
-
-        # Convert each file
-        stopped = False
-        for root, dirs, files in os.walk(input_folder, followlinks=False):
-            if stopped:
-                break
-            for file in files:
-                if file.lower().endswith(self.valid_ext):
-                    if self._check_pause_stop():
-                        self.log("⏹ Stopped by user.")
-                        stopped = True
-                        break
-                    img_path = Path(root) / file
-
-                    try:
-                        self.log(f"Converting: {file}")
-
-                        # Extract text and generate structured filename
-                        img = Image.open(img_path)
-                        name = pytesseract.image_to_string(img.crop((337,  203,  2000, 261)))
-                        admission_date = pytesseract.image_to_string(img.crop((1491, 275,  1941, 410)))
-                        graduation_date = pytesseract.image_to_string(img.crop((1586, 417,  1939, 542)))
-                        degree = pytesseract.image_to_string(img.crop((318,  393,  1600, 591)))
-                        output_stem = self.generate_filename(name, admission_date, graduation_date, degree, img_path.stem)
-                        output_file = output_folder / f"{output_stem}.pdf"
-
-                        # Avoid overwriting existing files
-                        counter = 1
-                        while output_file.exists():
-                            output_file = output_folder / f"{output_stem}_{counter}.pdf"
-                            counter += 1
-
-                        ocrmypdf.ocr(
-                            img_path,
-                            output_file,
-                            deskew=True,
-                            force_ocr=True,
-                            output_type="pdf"
-                        )
-
-                        converted += 1
-                        self.log(f"  ✓ Success ({converted}/{total_files})")
-                        self.log("")
-
-                    except Exception as e:
-                        errors += 1
-                        self.log(f"  ✗ Error: {str(e)}")
-                        self.log("")
+        summary = self.engine.bulk_convert()
 
-        # Summary
-        self.log("=" * 50)
-        if stopped:
-            self.log("Bulk conversion stopped by user.")
-        else:
-            self.log("Bulk conversion complete!")
-        self.log(f"Successfully converted: {converted}/{total_files}")
-        self.log(f"Errors: {errors}")
-        self.log("=" * 50)
+        label = "Stopped" if summary["stopped"] else "Complete"
+        self._dialog(
+            messagebox.showinfo, label,
+            f"Converted {summary['converted']} of {summary['total']} file(s).\n{summary['errors']} error(s)."
+            + (f"\n{summary['skipped']} already converted (skipped)." if summary["skipped"] else "")
+        )
 
-        label = "Stopped" if stopped else "Complete"
-        messagebox.showinfo(label, f"Converted {converted} of {total_files} file(s).\n{errors} error(s).")
+    def watch_mode(self):
+        """Convert new scans until Stop is pressed"""
+        summary = self.engine.watch()
+        self._dialog(
+            messagebox.showinfo, "Watch Mode Stopped",
+            f"Converted {summary['converted']} new file(s).\n{summary['errors']} error(s)."
+        )
 
     def show_preview_window(self, matched_files):
         """
         Open a preview window showing thumbnails of all matched files.
         The user selects which ones to convert, then clicks Convert Selected.
+
+        The list is virtualized: only rows in (or near) view exist as widgets,
+        and their thumbnails are decoded by a background thread pool, so the
+        window opens immediately however many files matched.
         """
-        import io
         preview_win = tk.Toplevel(self.root)
         preview_win.title("Preview Matched Files")
         preview_win.geometry("780x560")
@@ -494,50 +3788,60 @@ class ImageToPDFApp:
         canvas_frame = tk.Frame(preview_win)
         canvas_frame.pack(fill="both", expand=True, padx=15, pady=(0, 5))
 
-        canvas = tk.Canvas(canvas_frame, bg="#f0f0f0")
+        canvas = tk.Canvas(canvas_frame, bg="#f0f0f0", highlightthickness=0)
         scrollbar = tk.Scrollbar(canvas_frame, orient="vertical", command=canvas.yview)
-        canvas.configure(yscrollcommand=scrollbar.set)
         scrollbar.pack(side="right", fill="y")
         canvas.pack(side="left", fill="both", expand=True)
 
-        inner_frame = tk.Frame(canvas, bg="#f0f0f0")
-        canvas_window = canvas.create_window((0, 0), window=inner_frame, anchor="nw")
-
-        def on_frame_configure(event):
-            canvas.configure(scrollregion=canvas.bbox("all"))
-
-        def on_canvas_configure(event):
-            canvas.itemconfig(canvas_window, width=event.width)
-
-        inner_frame.bind("<Configure>", on_frame_configure)
-        canvas.bind("<Configure>", on_canvas_configure)
+        ROW_HEIGHT = THUMB_SIZE[1] + 20
+        OVERSCAN = 3           # rows kept alive above/below the viewport
+        CACHED_THUMBS = 200    # decoded thumbnails kept for scrolling back
 
-        THUMB_SIZE = (160, 160)
-        check_vars = []
-        thumb_refs = []
+        check_vars = [tk.BooleanVar(value=True) for _ in matched_files]
+        rows = {}              # index -> (row frame, thumbnail label, PhotoImage)
+        thumbs = {}            # index -> PPM bytes, most recently used last
+        pending = set()        # indices being decoded
+        wanted = set()         # indices currently materialized
+        done_q = queue.Queue()
+        closed = threading.Event()
+        pool = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1), thread_name_prefix="thumb")
+        thumb_cache = self.engine.thumbnail_cache
 
-        for idx, file_path in enumerate(matched_files):
-            var = tk.BooleanVar(value=True)
-            check_vars.append(var)
+        placeholder_buf = io.BytesIO()
+        Image.new("RGB", THUMB_SIZE, color=(180, 180, 180)).save(placeholder_buf, format="PPM")
+        placeholder = tk.PhotoImage(data=placeholder_buf.getvalue())
 
-            row = tk.Frame(inner_frame, bg="#f0f0f0", pady=6, padx=8)
-            row.pack(fill="x")
+        canvas.configure(scrollregion=(0, 0, 0, ROW_HEIGHT * len(matched_files)))
 
+        def decode(idx):
+            if closed.is_set():
+                return
+            if idx not in wanted:
+                done_q.put((idx, False))   # scrolled away before its turn
+                return
             try:
-                img = Image.open(file_path)
-                img.thumbnail(THUMB_SIZE, Image.Resampling.LANCZOS)
-                buf = io.BytesIO()
-                img.save(buf, format="PPM")
-                tk_img = tk.PhotoImage(data=buf.getvalue())
+                if thumb_cache is not None:
+                    data, _ = thumb_cache.thumbnail_for(matched_files[idx])
+                else:
+                    data = make_thumbnail(matched_files[idx])
             except Exception:
-                placeholder = Image.new("RGB", THUMB_SIZE, color=(180, 180, 180))
-                buf = io.BytesIO()
-                placeholder.save(buf, format="PPM")
-                tk_img = tk.PhotoImage(data=buf.getvalue())
+                data = None
+            done_q.put((idx, data))
+
+        def show_thumb(idx, data):
+            row = rows.get(idx)
+            if row is None or data is None:
+                return
+            tk_img = tk.PhotoImage(data=data)
+            row[1].configure(image=tk_img)
+            rows[idx] = (row[0], row[1], tk_img)
 
-            thumb_refs.append(tk_img)
+        def build_row(idx):
+            file_path = matched_files[idx]
+            row = tk.Frame(canvas, bg="#f0f0f0", pady=6, padx=8)
 
-            tk.Label(row, image=tk_img, bg="#f0f0f0", relief="solid", bd=1).pack(side="left", padx=(0, 10))
+            thumb_label = tk.Label(row, image=placeholder, bg="#f0f0f0", relief="solid", bd=1)
+            thumb_label.pack(side="left", padx=(0, 10))
 
             info_frame = tk.Frame(row, bg="#f0f0f0")
             info_frame.pack(side="left", fill="both", expand=True)
@@ -547,9 +3851,84 @@ class ImageToPDFApp:
             tk.Label(info_frame, text=file_path,
                      font=("Arial", 8), fg="#555", bg="#f0f0f0", anchor="w", wraplength=480).pack(anchor="w", pady=(2, 6))
             tk.Checkbutton(info_frame, text="Include in conversion",
-                           variable=var, bg="#f0f0f0", font=("Arial", 9)).pack(anchor="w")
+                           variable=check_vars[idx], bg="#f0f0f0", font=("Arial", 9)).pack(anchor="w")
 
-            tk.Frame(inner_frame, bg="#cccccc", height=1).pack(fill="x", padx=8)
+            tk.Frame(row, bg="#cccccc", height=1).place(relx=0, rely=1.0, relwidth=1.0, anchor="sw")
+
+            canvas.create_window(0, idx * ROW_HEIGHT, window=row, anchor="nw",
+                                 width=canvas.winfo_width(), height=ROW_HEIGHT, tags=("row", f"row{idx}"))
+            rows[idx] = (row, thumb_label, None)
+
+            if idx in thumbs:
+                thumbs[idx] = thumbs.pop(idx)   # mark as recently used
+                show_thumb(idx, thumbs[idx])
+            elif idx not in pending:
+                pending.add(idx)
+                pool.submit(decode, idx)
+
+        def refresh():
+            """Materialize the rows in view and drop the ones scrolled far away."""
+            if closed.is_set():
+                return
+            top = canvas.canvasy(0)
+            bottom = top + canvas.winfo_height()
+            first = max(0, int(top // ROW_HEIGHT) - OVERSCAN)
+            last = min(len(matched_files), int(bottom // ROW_HEIGHT) + 1 + OVERSCAN)
+
+            for idx in [i for i in rows if not first <= i < last]:
+                canvas.delete(f"row{idx}")
+                rows.pop(idx)[0].destroy()
+            wanted.clear()
+            wanted.update(range(first, last))
+            for idx in range(first, last):
+                if idx not in rows:
+                    build_row(idx)
+
+        def on_yscroll(*args):
+            scrollbar.set(*args)
+            refresh()
+
+        def on_canvas_configure(event):
+            canvas.itemconfigure("row", width=event.width)
+            refresh()
+
+        def on_mousewheel(event):
+            canvas.yview_scroll(-1 if event.num == 4 or event.delta > 0 else 1, "units")
+
+        canvas.configure(yscrollcommand=on_yscroll, yscrollincrement=ROW_HEIGHT // 3)
+        canvas.bind("<Configure>", on_canvas_configure)
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            preview_win.bind(sequence, on_mousewheel)
+
+        def drain():
+            """Hand finished thumbnails to their rows (Tk is only touched from this thread)."""
+            if closed.is_set():
+                return
+            while True:
+                try:
+                    idx, data = done_q.get_nowait()
+                except queue.Empty:
+                    break
+                pending.discard(idx)
+                if data is False:
+                    if idx in rows:   # scrolled back into view meanwhile
+                        pending.add(idx)
+                        pool.submit(decode, idx)
+                    continue
+                if data is not None:
+                    thumbs[idx] = data
+                    while len(thumbs) > CACHED_THUMBS:
+                        thumbs.pop(next(iter(thumbs)))
+                show_thumb(idx, data)
+            preview_win.after(50, drain)
+
+        def on_destroy(event):
+            if event.widget is preview_win:
+                closed.set()
+                pool.shutdown(wait=False, cancel_futures=True)
+
+        preview_win.bind("<Destroy>", on_destroy)
+        preview_win.after(50, drain)
 
         btn_bar = tk.Frame(preview_win)
         btn_bar.pack(fill="x", padx=15, pady=(4, 0))
@@ -569,11 +3948,24 @@ class ImageToPDFApp:
                 return
             preview_win.destroy()
             def run():
-                for f in selected:
-                    self.convert_image(f)
-                self.log(f"Conversion complete — {len(selected)} file(s) converted.")
-                messagebox.showinfo("Success", f"{len(selected)} file(s) successfully converted to PDF.")
-                self.root.after(0, self._reset_buttons)
+                try:
+                    summary = self.engine.convert_files(selected)
+                except Exception as e:
+                    self.log(f"Error: {e}")
+                    self._dialog(messagebox.showerror, "Error", str(e))
+                    return
+                finally:
+                    self.root.after(0, self._reset_buttons)
+                done = f"{summary['converted']} of {summary['total']} file(s) converted to PDF"
+                if summary["stopped"]:
+                    self._dialog(messagebox.showinfo, "Stopped",
+                                 f"Conversion stopped — {done}, {summary['errors']} failed.")
+                elif summary["errors"]:
+                    self._dialog(messagebox.showwarning, "Finished with Errors",
+                                 f"{done}; {summary['errors']} failed — see the log for details.")
+                else:
+                    self._dialog(messagebox.showinfo, "Success",
+                                 f"{summary['converted']} file(s) successfully converted to PDF.")
             threading.Thread(target=run, daemon=True).start()
 
         tk.Button(action_bar, text="Convert Selected", command=on_convert,
@@ -581,259 +3973,216 @@ class ImageToPDFApp:
         tk.Button(action_bar, text="Cancel", command=on_close,
                   font=("Arial", 10), width=10, height=2).pack(side="right")
 
-    def open_as_image(self, file_path):
-        """Open any supported file as a PIL Image (first page for PDFs)."""
-        if str(file_path).lower().endswith('.pdf'):
-            pages = convert_from_path(file_path, first_page=1, last_page=1)
-            return pages[0]
-        return Image.open(file_path)
-
-    def search_folders(self, folder_path, search_for):
-        """Partial keyword matching — returns file(s) with the most keyword hits (ties kept)."""
-        keywords = search_for.split()
-        scores = {}  # img_path -> matched keyword count
-
-        all_files = [
-            os.path.join(root, file)
-            for root, dirs, files in os.walk(folder_path, followlinks=False)
-            for file in files
-            if file.lower().endswith(self.valid_ext)
-        ]
-        total = len(all_files)
-        self.log(f"Scanning {total} file(s) for partial matches...")
-
-        for i, img_path in enumerate(all_files, start=1):
-            if self._check_pause_stop():
-                self.log("⏹ Search stopped by user.")
-                break
-            file = os.path.basename(img_path)
-            self.log(f"  Scanning {i}/{total}: {file}")
-            try:
-                name_crop = self.open_as_image(img_path).crop((337, 203, 727, 261))
-                text = pytesseract.image_to_string(name_crop)
-                matched_words = [word for word in keywords if word.lower() in text.lower()]
-                count = len(matched_words)
-                if count > 0:
-                    scores[img_path] = count
-                    self.log(f"  ~ {count}/{len(keywords)} keyword(s) matched: {file}")
-            except Exception as e:
-                self.log(f"  ✗ Error processing {file}: {e}")
-
-        if not scores:
-            return []
-
-        best = max(scores.values())
-        partial_matched_files = [f for f, c in scores.items() if c == best]
-        self.log(f"  ✓ Best match: {best}/{len(keywords)} keyword(s) — {len(partial_matched_files)} file(s)")
-        return partial_matched_files
-
-    def generate_filename(self, name_text, admission_text, graduation_text, degree_text, fallback_stem):
-        """
-        Generate a structured filename and determine the output subdirectory.
-
-        Returns (filename_stem, subfolder) where subfolder is one of:
-          "Degrees/<year>", "Transcripts/<year>", or "Unprocessed"
-
-        Resolved filename format (Degrees and Transcripts):
-          LastName_FirstName_MI_CourseName_Month_DD_YYYY
-
-        Unprocessed filename format (date could not be extracted):
-          Last, First MI CourseName
-
-        Falls back to (original_stem, "Unprocessed") if name/course cannot
-        be extracted at all.
-        """
-
-        def clean(value):
-            """Remove characters invalid in filenames (comma is intentional in this format)."""
-            return re.sub(r'[\\/*?:"<>|]', '', value).strip()
-
-        # --- Detect document type ---
-        is_degree     = bool(re.search(r'graduated\s+received',    degree_text,    re.IGNORECASE))
-        is_transcript = bool(re.search(r'date\s+of\s+admission', admission_text, re.IGNORECASE))
-        doc_folder    = "Degrees" if is_degree else ("Transcripts" if is_transcript else None)
-
-        # --- Extract name ---
-        last, first, middle = "", "", ""
-
-        # Format 1: Last, First [MI]
-        name_match = re.search(
-            r'\b([A-Z][a-zA-Z\'\-]+),\s+([A-Z][a-zA-Z\'\-]+)(?:\s+([A-Z])\.?)?',
-            name_text
-        )
-        if name_match:
-            last   = name_match.group(1)
-            first  = name_match.group(2)
-            middle = name_match.group(3) or ""
-        else:
-            # Format 2: First [MI] Last
-            name_match = re.search(
-                r'\b([A-Z][a-zA-Z\'\-]+)(?:\s+([A-Z])\.?)?\s+([A-Z][a-zA-Z\'\-]+)\b',
-                name_text
-            )
-            if name_match:
-                first  = name_match.group(1)
-                middle = name_match.group(2) or ""
-                last   = name_match.group(3)
-
-        if not last or not first:
-            self.log(f"  ⚠ Could not extract name — sending to Unprocessed.")
-            return fallback_stem, "Unprocessed"
-
-        # --- Extract course/degree name (always, regardless of doc type) ---
-        course_name = ""
-        course_match = re.search(
-            r'degree\s+received[:\s]+([A-Za-z\s]+?)(?:\n|$)',
-            degree_text,
-            re.IGNORECASE
-        )
-        if course_match:
-            course_name = clean(course_match.group(1)).strip()
-        else:
-            self.log(f"  ⚠ Could not extract course name.")
-
-        # --- Extract date ---
-        MONTH_NAME = (
-            r'(?:January|February|March|April|May|June|July|August|'
-            r'September|October|November|December|'
-            r'Jan|Feb|Mar|Apr|Jun|Jul|Aug|Sep|Oct|Nov|Dec)'
-        )
-        DATE_NAMED   = MONTH_NAME + r'\s+\d{1,2},?\s+\d{4}'
-        DATE_NUMERIC = r'\d{1,2}/\d{1,2}/\d{2,4}'
-
-        MONTH_MAP = {
-            'jan': 'January', 'feb': 'February', 'mar': 'March',
-            'apr': 'April',   'may': 'May',       'jun': 'June',
-            'jul': 'July',    'aug': 'August',     'sep': 'September',
-            'oct': 'October', 'nov': 'November',   'dec': 'December'
-        }
-
-        def normalise_date(raw):
-            """Convert any matched date string to (Month_DD_YYYY, YYYY)."""
-            raw = raw.strip()
-            numeric = re.match(r'(\d{1,2})/(\d{1,2})/(\d{2,4})$', raw)
-            if numeric:
-                month_num, day, year = int(numeric.group(1)), numeric.group(2), numeric.group(3)
-                if len(year) == 2:
-                    year = '19' + year if int(year) >= 20 else '20' + year
-                month_name = list(MONTH_MAP.values())[month_num - 1]
-                return f"{month_name}_{day}_{year}", year
-            parts = raw.replace(',', '').split()
-            if len(parts) == 3:
-                month_abbr = parts[0][:3].lower()
-                month_name = MONTH_MAP.get(month_abbr, parts[0])
-                year = parts[2]
-                if len(year) == 2:
-                    year = '19' + year if int(year) >= 20 else '20' + year
-                return f"{month_name}_{parts[1]}_{year}", year
-            return clean(raw).replace(' ', '_'), ""
-
-        date_str, year_str = "", ""
-        if is_degree:
-            # Degrees: use date of graduation crop
-            date_match = re.search(
-                DATE_NAMED + r'|' + DATE_NUMERIC,
-                graduation_text, re.IGNORECASE
-            )
-        else:
-            # Transcripts: use date of admission crop
-            date_match = re.search(
-                DATE_NAMED + r'|' + DATE_NUMERIC,
-                admission_text, re.IGNORECASE
-            )
-
-        if date_match:
-            date_str, year_str = normalise_date(date_match.group(0))
-        else:
-            self.log(f"  ⚠ Could not extract date.")
-
-        # --- Determine subfolder ---
-        # Only route to Unprocessed if doc type OR course name couldn't be determined.
-        # Missing date is acceptable — file still goes to Degrees/Transcripts without it.
-        if not doc_folder or not course_name:
-            name_part = f"{last}, {first}"
-            if middle:
-                name_part += f" {middle}"
-            unprocessed_name = f"{name_part} {course_name}".strip() if course_name else name_part
-            self.log(f"  📄 Unprocessed filename: {unprocessed_name}.pdf")
-            return unprocessed_name, "Unprocessed"
-
-        subfolder = f"{doc_folder}/{year_str}" if year_str else f"{doc_folder}/{doc_folder} - No Date"
-
-        # --- Assemble resolved filename ---
-        # Format: "Last, First MI CourseName Date" (date optional)
-        name_part = f"{last}, {first}"
-        if middle:
-            name_part += f" {middle}"
-        parts = [name_part]
-        if course_name:
-            parts.append(course_name)
-        if date_str:
-            parts.append(date_str.replace("_", " "))
-
-        filename = " ".join(clean(p) for p in parts)
-        self.log(f"  📄 Generated filename: {filename}.pdf → {subfolder}/")
-        return filename, subfolder
 
-    def convert_image(self, image_path):
-        """Convert single image to PDF, routing to the correct output subfolder."""
-        try:
-            img_path = Path(image_path)
-            base_output = Path(self.output_path.get())
-
-            self.log(f"Converting {img_path.name} to PDF...")
-
-            img = self.open_as_image(img_path)
-            name_text       = pytesseract.image_to_string(img.crop((337,  203,  2000, 261)))
-            admission_text  = pytesseract.image_to_string(img.crop((1491, 275,  1941, 410)))
-            graduation_text = pytesseract.image_to_string(img.crop((1586, 417,  1939, 542)))
-            degree_text     = pytesseract.image_to_string(img.crop((318,  393,  1600, 591)))
-
-            output_stem, subfolder = self.generate_filename(
-                name_text, admission_text, graduation_text, degree_text, img_path.stem
-            )
-
-            output_dir = base_output / subfolder
-            output_dir.mkdir(parents=True, exist_ok=True)
-            output_file = output_dir / f"{output_stem}.pdf"
-
-            # Avoid overwriting existing files
-            counter = 1
-            while output_file.exists():
-                output_file = output_dir / f"{output_stem}_{counter}.pdf"
-                counter += 1
-
-            ocrmypdf.ocr(
-                img_path,
-                output_file,
-                deskew=True,
-                force_ocr=True,
-                output_type="pdf"
-            )
-
-            self.log(f"✓ Saved to: {subfolder}/{output_file.name}")
-
-        except Exception as e:
-            self.log(f"✗ Error converting {image_path}: {e}")
-
-    def search_images(self, matched_files, date):
-        """Filter by year - This one was correct!"""
-        files = []
-
-        for file in matched_files:
-            try:
-                text = pytesseract.image_to_string(Image.open(file))
+def profile_document(path, output_root, single_pass=False, stats_path=None, top=30, stream=None,
+                     template=None, split=False, ocr_profile=None):
+    """
+    Convert one document in-process under cProfile and print the functions
+    with the most cumulative time. Returns the convert_file() result.
+
+    single_pass, template, split and ocr_profile are the run settings of the
+    same name, so the profile covers the pipeline a bulk or search run uses.
+
+    ocrmypdf and Tesseract run partly in child processes; their time shows up
+    as waits in the parent, so compare with the stage timings in the result.
+    """
+    options = None if single_pass else ocr_options(ocr_profile, log=print)
+    profiler = cProfile.Profile()
+    result = profiler.runcall(convert_file, path, output_root, 1, single_pass, template, split, None, options)
+    if stats_path:
+        profiler.dump_stats(stats_path)
+    stats = pstats.Stats(profiler, stream=stream or sys.stdout)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top)
+    return result
+
+
+# CLI exit codes
+EXIT_OK = 0
+EXIT_FAILED = 1      # one or more files failed to convert
+EXIT_USAGE = 2       # bad arguments (also used by argparse)
+EXIT_NO_MATCH = 3    # search found no matching documents
+EXIT_STOPPED = 130   # interrupted by SIGINT / SIGTERM
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(
+        prog="image_to_pdf.py",
+        description="Search and convert scanned transcripts without the GUI. "
+                    "Run without arguments to open the GUI instead.",
+        epilog=f"Exit codes: {EXIT_OK} success, {EXIT_FAILED} some files failed, {EXIT_USAGE} usage error, "
+               f"{EXIT_NO_MATCH} no search matches, {EXIT_STOPPED} interrupted.",
+    )
+    # How each file is converted; shared with profile so it measures the same pipeline
+    pipeline = argparse.ArgumentParser(add_help=False)
+    pipeline.add_argument("--single-pass", action="store_true",
+                          help="OCR each page once with Tesseract instead of field crops + ocrmypdf (no deskew)")
+    pipeline.add_argument("--split", action="store_true",
+                          help="split multi-page batch scans into one PDF per document (a new student or document type)")
+    pipeline.add_argument("--template", metavar="NAME",
+                          help="crop-region template to use for every file (default: auto-detect per file)")
+    pipeline.add_argument("--ocr-profile", metavar="NAME",
+                          help="ocrmypdf output profile: fast, balanced, archival or one from ocr_profiles.json "
+                               "(default: balanced, or the configured default)")
+
+    common = argparse.ArgumentParser(add_help=False, parents=[pipeline])
+    common.add_argument("-i", "--input", required=True, help="folder of scans to process (searched recursively)")
+    common.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="worker processes for conversion (default: CPU count)")
+    common.add_argument("--json", action="store_true",
+                        help="print progress as JSON lines on stdout; log text goes to stderr")
+    common.add_argument("--metrics", metavar="PATH",
+                        help="append a stage timing report for each run to PATH (JSON lines, or CSV if it ends in .csv)")
+    common.add_argument("--merge", action="store_true",
+                        help=f"merge each student's documents into one PDF under {MERGED_FOLDER}/ in the output folder")
+    common.add_argument("--manifest", choices=["csv", "json"], default="csv",
+                        help="format of the run manifest written to the output folder's manifests/ (default: csv)")
+
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    search = commands.add_parser("search", parents=[common], help="find documents by student name")
+    search.add_argument("-n", "--name", required=True, help="name to search for, e.g. \"John Smith\"")
+    search.add_argument("-y", "--year", default="", help="only keep matches mentioning this year")
+    search.add_argument("-o", "--output", help="output folder (required with --convert)")
+    search.add_argument("--convert", action="store_true", help="convert every match to PDF")
+
+    bulk = commands.add_parser("bulk", parents=[common], help="convert every scan in the input folder")
+    bulk.add_argument("-o", "--output", required=True, help="output folder for the PDFs")
+    bulk.add_argument("--no-resume", dest="resume", action="store_false",
+                      help="convert everything, ignoring the output folder's job journal")
+
+    watch = commands.add_parser("watch", parents=[common], help="convert new scans as they arrive")
+    watch.add_argument("-o", "--output", required=True, help="output folder for the PDFs")
+    watch.add_argument("--poll-interval", type=float, default=2.0,
+                       help="seconds between directory checks without watchdog (default: 2)")
+    watch.add_argument("--settle", type=float, default=2.0,
+                       help="seconds a file must stop changing before it is converted (default: 2)")
+    watch.add_argument("--include-existing", action="store_true",
+                       help="also convert files already present that the job journal has not seen")
+
+    profile = commands.add_parser("profile", parents=[pipeline], help="convert a single document under cProfile")
+    profile.add_argument("document", help="scan or PDF to convert")
+    profile.add_argument("-o", "--output", required=True, help="output folder for the PDF")
+    profile.add_argument("--stats", metavar="PATH", help="also save the raw profile (for pstats / snakeviz)")
+    profile.add_argument("--top", type=int, default=30, help="number of functions to list (default: 30)")
+
+    return parser
+
+
+def run_cli(argv=None):
+    """Headless entry point. Returns a process exit code."""
+    parser = build_arg_parser()
+    args = parser.parse_args(argv)
+
+    if getattr(args, "json", False):
+        def log(message):
+            print(message, file=sys.stderr, flush=True)
+
+        def progress(event):
+            print(json.dumps(event, default=str), flush=True)
+    else:
+        def log(message):
+            print(message, flush=True)
+
+        progress = None
+
+    templates = get_templates(log)
+    if args.template and args.template not in templates.names():
+        parser.error(f"unknown template {args.template!r} (available: {', '.join(templates.names())})")
+    profiles = get_ocr_profiles(log)[0]
+    if args.ocr_profile and args.ocr_profile not in profiles:
+        parser.error(f"unknown OCR profile {args.ocr_profile!r} (available: {', '.join(profiles)})")
+
+    if args.command == "profile":
+        if not os.path.isfile(args.document):
+            parser.error(f"document not found: {args.document}")
+        result = profile_document(args.document, args.output, args.single_pass, args.stats, args.top,
+                                  template=args.template, split=args.split, ocr_profile=args.ocr_profile)
+        for message in result["messages"]:
+            print(message)
+        if not result["ok"]:
+            print(f"✗ Error converting {args.document}: {result['error']}")
+        print(json.dumps({"timings": result.get("timings", {})}))
+        return EXIT_OK if result["ok"] else EXIT_FAILED
+
+    if not os.path.isdir(args.input):
+        parser.error(f"input folder not found: {args.input}")
+    if args.command == "search" and args.convert and not args.output:
+        parser.error("--output is required with --convert")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    engine = ConversionEngine(
+        input_path=args.input,
+        output_path=args.output or "",
+        workers=args.workers,
+        single_pass=args.single_pass,
+        resume=getattr(args, "resume", True),
+        log=log,
+        progress=progress,
+    )
+    engine.metrics_path = args.metrics
+    engine.template = args.template
+    engine.split_documents = args.split
+    engine.ocr_profile = args.ocr_profile
+    engine.merge_students = args.merge
+    engine.manifest_format = args.manifest
+
+    # First Ctrl+C / SIGTERM finishes the current files; a second one aborts
+    def on_signal(signum, frame):
+        if engine.stop_requested:
+            raise KeyboardInterrupt
+        log("⏹ Stop requested — finishing current file(s)... (interrupt again to abort)")
+        engine.request_stop()
+
+    signal.signal(signal.SIGINT, on_signal)
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, on_signal)
 
-                if date.lower() in text.lower():
-                    files.append(file)
+    try:
+        if args.command == "bulk":
+            summary = engine.bulk_convert()
+            if summary["stopped"]:
+                return EXIT_STOPPED
+            return EXIT_FAILED if summary["errors"] else EXIT_OK
+
+        if args.command == "watch":
+            # Runs until SIGINT/SIGTERM; a graceful stop is the normal way out
+            engine.watch(args.poll_interval, args.settle, args.include_existing)
+            return EXIT_OK
+
+        matched_files = engine.search(args.name, args.year)
+        if engine.stop_requested:
+            return EXIT_STOPPED
+        if not matched_files:
+            log("No matching files found.")
+            return EXIT_NO_MATCH
+        if not args.convert:
+            if not args.json:
+                for path in matched_files:
+                    print(path)
+            return EXIT_OK
+
+        summary = engine.convert_files(matched_files)
+        if summary["stopped"]:
+            return EXIT_STOPPED
+        return EXIT_FAILED if summary["errors"] else EXIT_OK
+
+    except KeyboardInterrupt:
+        log("Aborted.")
+        return EXIT_STOPPED
+    except Exception as e:
+        log(f"Error: {e}")
+        return EXIT_FAILED
 
-            except Exception as e:
-                self.log(f"Error processing {file}: {e}")
 
-        return files
+def main():
+    if len(sys.argv) > 1:
+        sys.exit(run_cli(sys.argv[1:]))
 
+    if tk is None:
+        print("tkinter is not available — use the command line instead (see --help).")
+        sys.exit(EXIT_USAGE)
 
-def main():
     root = tk.Tk()
     app = ImageToPDFApp(root)
     root.mainloop()
@@ -114,7 +114,7 @@ fi
 echo ""
 echo "[6/6] Installing Python packages..."
 $PYTHON -m pip install --upgrade pip --quiet
-$PYTHON -m pip install --upgrade ocrmypdf pytesseract Pillow pdf2image \
+$PYTHON -m pip install --upgrade ocrmypdf pytesseract Pillow pdf2image numpy \
     || fail "Failed to install Python packages. Try running with sudo or inside a virtual environment."
 ok "Python packages installed."
 
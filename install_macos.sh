@@ -81,7 +81,7 @@ fi
 echo ""
 echo "[6/6] Installing Python packages..."
 $PYTHON -m pip install --upgrade pip --quiet
-$PYTHON -m pip install --upgrade ocrmypdf pytesseract Pillow pdf2image \
+$PYTHON -m pip install --upgrade ocrmypdf pytesseract Pillow pdf2image numpy \
     || fail "Failed to install Python packages."
 ok "Python packages installed."
 
@@ -105,7 +105,7 @@ if %errorlevel% neq 0 (
 :: Step 6: Python packages
 echo.
 echo [6/6] Installing Python packages...
-python -m pip install --upgrade ocrmypdf pytesseract Pillow pdf2image
+python -m pip install --upgrade ocrmypdf pytesseract Pillow pdf2image numpy
 if %errorlevel% neq 0 (
     echo      ERROR: Failed to install Python packages.
     pause & exit /b 1
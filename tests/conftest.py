@@ -0,0 +1,15 @@
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+# image_to_pdf.py is a single script at the repository root, not an installed package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep the tests away from the user's cache and template / OCR profile configuration.
+# Must be set before image_to_pdf is imported (CACHE_DIR and CONFIG_DIR are read at import).
+_SCRATCH = tempfile.mkdtemp(prefix="image_to_pdf_tests_")
+atexit.register(shutil.rmtree, _SCRATCH, ignore_errors=True)
+os.environ["IMAGE_TO_PDF_CACHE_DIR"] = os.path.join(_SCRATCH, "cache")
+os.environ["IMAGE_TO_PDF_CONFIG_DIR"] = os.path.join(_SCRATCH, "config")
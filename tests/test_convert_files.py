@@ -0,0 +1,73 @@
+"""Tests for ConversionEngine.convert_files() with the process pool replaced by a fake."""
+
+from concurrent.futures import Future
+
+import pytest
+
+import image_to_pdf as m
+
+
+class FakePool:
+    """Runs nothing: each submit returns a finished Future, failing the way `outcomes` says."""
+
+    outcomes = {}   # file name -> exception raised by submit() or by the Future
+
+    def __init__(self, workers, log):
+        self.log = log
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def submit(self, fn, path, *args):
+        name = m.os.path.basename(path)
+        outcome = self.outcomes.get(name)
+        if outcome == "submit":
+            raise RuntimeError("cannot schedule new futures after shutdown")
+        future = Future()
+        if outcome == "died":
+            future.set_exception(m.BrokenProcessPool("A process in the process pool was terminated abruptly"))
+        else:
+            future.set_result({"ok": True, "output": f"Unprocessed/{name}.pdf", "outputs": [f"Unprocessed/{name}.pdf"],
+                               "documents": [], "messages": [], "timings": {"write": 0.1}})
+        return future
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    monkeypatch.setattr(m, "WorkerPool", FakePool)
+    engine = m.ConversionEngine(output_path=str(tmp_path / "out"), workers=2, single_pass=True,
+                                log=lambda message: None)
+    engine.paths = []
+    for name in ("a.png", "b.png", "c.png", "d.png"):
+        (tmp_path / name).write_bytes(b"scan")
+        engine.paths.append(str(tmp_path / name))
+    return engine
+
+
+def manifest_rows(engine):
+    manifest, = (m.Path(engine.output_path) / "manifests").iterdir()
+    return manifest.read_text().splitlines()[1:]
+
+
+def test_a_dead_worker_fails_only_its_file(engine, monkeypatch):
+    monkeypatch.setattr(FakePool, "outcomes", {"b.png": "died"})
+    summary = engine.convert_files(engine.paths)
+    assert summary["converted"] == 3
+    assert list(summary["failed"]) == [engine.paths[1]]
+    assert "terminated abruptly" in summary["failed"][engine.paths[1]]
+    assert len(manifest_rows(engine)) == 4
+    assert engine.manifest is None and engine.metrics is None
+
+
+def test_manifest_and_metrics_are_finished_when_the_run_fails(engine, monkeypatch):
+    monkeypatch.setattr(FakePool, "outcomes", {"c.png": "submit"})
+    reports = []
+    monkeypatch.setattr(engine, "progress", lambda event: reports.append(event))
+    with pytest.raises(RuntimeError):
+        engine.convert_files(engine.paths)
+    assert engine.manifest is None and engine.metrics is None
+    assert len(manifest_rows(engine)) == 2   # a and b finished before c could not be scheduled
+    assert [event["files"] for event in reports if event["event"] == "metrics"] == [2]
@@ -0,0 +1,59 @@
+"""Tests for skew estimation and page straightening."""
+
+import pytest
+from PIL import Image, ImageDraw
+
+import image_to_pdf as m
+
+
+def text_page(size=(1275, 1650)):
+    """A white page with rows of black word-like bars."""
+    img = Image.new("L", size, 255)
+    draw = ImageDraw.Draw(img)
+    for y in range(150, size[1] - 150, 40):
+        for x in range(100, size[0] - 125, 60):
+            draw.rectangle([x, y, x + 45, y + 12], fill=0)
+    return img
+
+
+@pytest.mark.parametrize("angle", [0, 1.5, -2.5, 4])
+def test_estimate_skew_undoes_a_rotation(angle):
+    skewed = text_page().rotate(angle, fillcolor=255)
+    assert m.estimate_skew(skewed) == pytest.approx(-angle, abs=0.15)
+
+
+def test_estimate_skew_of_a_bilevel_page():
+    skewed = text_page().rotate(2, fillcolor=255).point(lambda v: 255 if v >= 128 else 0).convert("1")
+    assert m.estimate_skew(skewed) == pytest.approx(-2, abs=0.15)
+
+
+def test_blank_page_has_no_skew():
+    assert m.estimate_skew(Image.new("L", (1275, 1650), 255)) == 0.0
+
+
+def test_straight_page_is_returned_as_is():
+    page = text_page()
+    assert m.deskew_page(page) == (page, 0.0)
+
+
+@pytest.mark.parametrize("mode", ["L", "RGB", "1"])
+def test_deskew_keeps_mode_and_info(mode):
+    page = text_page().rotate(3, fillcolor=255).convert(mode)
+    page.info["dpi"] = (150, 150)
+    straight, angle = m.deskew_page(page)
+    assert angle == pytest.approx(-3, abs=0.15)
+    assert straight.mode == mode
+    assert straight.size == page.size
+    assert straight.info["dpi"] == (150, 150)
+    assert m.estimate_skew(straight) == pytest.approx(0, abs=0.15)
+
+
+def test_palette_page_stays_in_colour(tmp_path):
+    page = text_page().rotate(3, fillcolor=255).convert("RGB")
+    ImageDraw.Draw(page).rectangle([600, 700, 700, 800], fill=(200, 0, 0))   # a red seal
+    page = page.quantize(16)
+    page.info["transparency"] = 0
+    straight, angle = m.deskew_page(page)
+    assert straight.mode == "RGB"
+    assert straight.getpixel((650, 750))[0] > 150 > straight.getpixel((650, 750))[1]
+    m.save_page_copy(straight, "scan.png", tmp_path)   # no stale palette transparency in the copy
@@ -0,0 +1,77 @@
+"""Tests for DocumentCache: what Search Mode hands on to Convert Selected."""
+
+import os
+
+import pytest
+from PIL import Image
+
+import image_to_pdf as m
+
+
+@pytest.fixture
+def scans(tmp_path):
+    paths = []
+    for n in range(3):
+        path = tmp_path / f"scan{n}.png"
+        path.write_bytes(b"scan %d" % n)
+        paths.append(str(path))
+    return paths
+
+
+def page(width=10, height=10, mode="L"):
+    return Image.new(mode, (width, height))   # 100 bytes in L, 300 in RGB
+
+
+def test_hints(scans):
+    cache = m.DocumentCache()
+    assert cache.hints(scans[0]) is None
+    cache.put_template(scans[0], m.TemplateRegistry().default, (2550, 3300))
+    cache.put_texts(scans[0], {"name": "Smith, John", "admission": "  "})
+    assert cache.hints(scans[0]) == {"template": "transcript", "size": (2550, 3300),
+                                     "texts": {"name": "Smith, John"}}   # blank text isn't worth reusing
+
+
+def test_changed_file_drops_its_entry_and_page(scans):
+    cache = m.DocumentCache()
+    cache.put_texts(scans[0], {"name": "Smith, John"})
+    cache.put_page(scans[0], page())
+    with open(scans[0], "ab") as fh:
+        fh.write(b" rescanned")
+    assert cache.hints(scans[0]) is None
+    assert cache.page(scans[0]) is None
+    assert cache._page_bytes == 0
+
+
+def test_pages_are_evicted_least_recently_used_first(scans):
+    cache = m.DocumentCache(max_bytes=250)
+    cache.put_page(scans[0], page())
+    cache.put_page(scans[1], page())
+    assert cache.page(scans[0]) is not None   # now the most recently used
+    cache.put_page(scans[2], page())
+    assert cache.page(scans[1]) is None
+    assert cache.page(scans[0]) is not None and cache.page(scans[2]) is not None
+    assert cache._page_bytes == 200
+
+
+def test_replacing_a_page_counts_it_once(scans):
+    cache = m.DocumentCache(max_bytes=250)
+    for _ in range(3):
+        cache.put_page(scans[0], page())
+    cache.put_page(scans[1], page())
+    assert cache._page_bytes == 200
+    assert cache.page(scans[0]) is not None
+
+
+def test_page_larger_than_the_cap_is_not_kept(scans):
+    cache = m.DocumentCache(max_bytes=250)
+    cache.put_page(scans[0], page(mode="RGB"))
+    assert cache.page(scans[0]) is None
+    assert cache._page_bytes == 0
+
+
+def test_deleted_file(scans):
+    cache = m.DocumentCache()
+    cache.put_texts(scans[0], {"name": "Smith, John"})
+    os.remove(scans[0])
+    assert cache.hints(scans[0]) is None
+    assert cache.page(scans[0]) is None
@@ -0,0 +1,67 @@
+"""Tests for FolderWatcher's polling mode: settling, existing files and excluded folders."""
+
+import pytest
+
+import image_to_pdf as m
+
+
+@pytest.fixture(autouse=True)
+def polling(monkeypatch):
+    monkeypatch.setattr(m, "Observer", None)   # same behaviour with or without watchdog installed
+
+
+def watcher(folder, **kwargs):
+    kwargs.setdefault("poll_interval", 0)
+    kwargs.setdefault("settle", 0)
+    return m.FolderWatcher(folder, **kwargs)
+
+
+def drain(w, rounds=3):
+    found = []
+    for _ in range(rounds):
+        found += w.ready()
+    return sorted(found)
+
+
+def test_existing_files_are_only_reported_with_include_existing(tmp_path):
+    (tmp_path / "old.png").write_bytes(b"scan")
+    assert drain(watcher(tmp_path)) == []
+    assert drain(watcher(tmp_path, include_existing=True)) == [str(tmp_path / "old.png")]
+
+
+def test_new_files_are_reported_once(tmp_path):
+    w = watcher(tmp_path)
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "new.jpg").write_bytes(b"scan")
+    (tmp_path / "notes.txt").write_text("not a scan")
+    assert drain(w) == [str(tmp_path / "sub" / "new.jpg")]
+    assert drain(w) == []
+
+
+def test_file_is_reported_after_it_stops_changing(tmp_path):
+    w = watcher(tmp_path, settle=60)
+    scan = tmp_path / "arriving.tif"
+    scan.write_bytes(b"part")
+    assert drain(w) == []       # not stable for a minute yet
+
+    w.settle = 0
+    scan.write_bytes(b"partial copy")
+    assert w.ready() == []      # size changed: stable from now on
+    assert w.ready() == [str(scan)]
+
+
+def test_empty_file_is_not_reported(tmp_path):
+    w = watcher(tmp_path)
+    (tmp_path / "empty.png").write_bytes(b"")
+    assert drain(w) == []
+
+
+def test_excluded_folder_is_never_reported(tmp_path):
+    out = tmp_path / "out"
+    (out / "Transcripts").mkdir(parents=True)
+    (out / "Transcripts" / "old.png").write_bytes(b"scan")
+    w = watcher(tmp_path, include_existing=True, exclude=[out])
+    (out / "Transcripts" / "new.png").write_bytes(b"scan")
+    (tmp_path / "in.png").write_bytes(b"scan")
+    w._touch(str(out / "Transcripts" / "new.png"))   # as a filesystem notification would
+    assert drain(w) == [str(tmp_path / "in.png")]
@@ -0,0 +1,185 @@
+"""
+Tests for the pure helpers that name, route and split documents.
+
+Nothing here runs OCR, so Tesseract, Ghostscript and Poppler are not needed.
+
+    python -m pytest tests
+"""
+
+import pytest
+
+import image_to_pdf as m
+
+
+def texts(name="", admission="", graduation="", degree=""):
+    return {"name": name, "admission": admission, "graduation": graduation, "degree": degree}
+
+
+TRANSCRIPT = texts("Smith, John A.", "Date of Admission\nMay 3, 1975", "", "Degree Received: Arts")
+DEGREE = texts("Smith, John A.", "", "June 12, 1979", "Graduated Received\nDegree Received: Arts")
+
+
+# --- Years and dates ---
+
+@pytest.mark.parametrize("text, years", [
+    ("Date of Admission\nMay 3, 1975", {"1975"}),
+    ("9/4/72", {"1972"}),
+    ("09/04/05", {"2005"}),
+    ("admitted 1971, graduated 1975", {"1971", "1975"}),
+    ("79", {"1979"}),
+    (" 12 ", {"2012"}),
+    ("Course 101 Credit 3", set()),
+    ("", set()),
+])
+def test_parse_years(text, years):
+    assert m.parse_years(text) == years
+
+
+@pytest.mark.parametrize("text, parsed", [
+    ("Date of Admission\nMay 3, 1975", ("May_3_1975", "1975")),
+    ("Sep 4 1972", ("September_4_1972", "1972")),
+    ("9/4/72", ("September_4_1972", "1972")),
+    ("06/12/15", ("June_12_2015", "2015")),
+    ("no date here", ("", "")),
+])
+def test_parse_date(text, parsed):
+    assert m.parse_date(text) == parsed
+
+
+# --- Fuzzy name matching ---
+
+@pytest.mark.parametrize("text, tokens", [
+    ("Srnith, John", ["smith", "john"]),
+    ("VVilliams", ["williams"]),
+    ("J0hn 5mith", ["john", "smith"]),
+    ("O'Brien-Lee", ["o", "brien", "lee"]),
+])
+def test_name_tokens_fold_ocr_confusions(text, tokens):
+    assert m.name_tokens(text) == tokens
+
+
+def test_count_keyword_hits_tolerates_misreads():
+    assert m.count_keyword_hits(["Smith", "John"], "Srnith, J0hn A.") == 2
+    assert m.count_keyword_hits(["Williams"], "Wiliams, Mary") == 1     # one edit in a 8-letter name
+    assert m.count_keyword_hits(["Smith"], "Jones, Mary") == 0
+
+
+def test_count_keyword_hits_short_keywords_are_exact():
+    assert m.count_keyword_hits(["Lee"], "Lea, Ann") == 0
+    assert m.count_keyword_hits(["Lee"], "Lee, Ann") == 1
+
+
+def test_count_keyword_hits_needs_every_part_of_a_keyword():
+    assert m.count_keyword_hits(["Mary-Jane"], "Mary Smith") == 0
+    assert m.count_keyword_hits(["Mary-Jane"], "Jane, Mary") == 1
+
+
+# --- Word bucketing ---
+
+def word_data(*words):
+    """An image_to_data()-style dict of (text, left, top, width, height, line, page) words."""
+    data = {key: [] for key in ("page_num", "block_num", "par_num", "line_num", "word_num",
+                                "left", "top", "width", "height", "conf", "text")}
+    for n, (text, left, top, width, height, line, page) in enumerate(words, start=1):
+        for key, value in (("page_num", page), ("block_num", 1), ("par_num", 1), ("line_num", line),
+                           ("word_num", n), ("left", left), ("top", top), ("width", width),
+                           ("height", height), ("conf", 95), ("text", text)):
+            data[key].append(value)
+    return data
+
+
+REGIONS = {"name": (0, 0, 100, 50), "degree": (0, 50, 100, 100)}
+
+
+def test_bucket_words_by_word_centre():
+    data = word_data(
+        ("Smith,", 5, 10, 30, 10, 1, 1),
+        ("John", 40, 10, 20, 10, 1, 1),
+        ("Arts", 5, 45, 20, 10, 2, 1),    # centre at y=50: degree, not name
+        ("Stamp", 150, 10, 30, 10, 3, 1),  # outside every region
+    )
+    assert m.bucket_words(data, REGIONS) == {"name": "Smith, John", "degree": "Arts"}
+
+
+def test_bucket_words_keeps_line_breaks_and_skips_blanks():
+    data = word_data(
+        ("Degree", 5, 55, 30, 10, 1, 1),
+        ("  ", 40, 55, 10, 10, 1, 1),
+        ("Received:", 5, 70, 40, 10, 2, 1),
+        ("Arts", 50, 70, 20, 10, 2, 1),
+    )
+    assert m.bucket_words(data, REGIONS)["degree"] == "Degree\nReceived: Arts"
+
+
+def test_bucket_words_applies_origin_and_page():
+    data = word_data(("Smith", 0, 0, 20, 10, 1, 1), ("Jones", 0, 0, 20, 10, 1, 2))
+    # The OCRed crop starts at (10, 55) on the page, so both words fall in the degree region
+    assert m.bucket_words(data, REGIONS, origin=(10, 55)) == {"name": "", "degree": "Smith"}
+    assert m.bucket_words(data, REGIONS, origin=(10, 55), page=2)["degree"] == "Jones"
+
+
+# --- Names, document types and split boundaries ---
+
+@pytest.mark.parametrize("text, name", [
+    ("Smith, John A.", ("Smith", "John", "A")),
+    ("O'Brien, Mary", ("O'Brien", "Mary", "")),
+    ("John A. Smith", ("Smith", "John", "A")),
+    ("smith john", None),
+    ("", None),
+])
+def test_parse_name(text, name):
+    assert m.parse_name(text) == name
+
+
+def test_document_type():
+    assert m.document_type(TRANSCRIPT["admission"], TRANSCRIPT["degree"]) == "Transcripts"
+    assert m.document_type(DEGREE["admission"], DEGREE["degree"]) == "Degrees"
+    assert m.document_type("", "Degree Received: Arts") is None
+
+
+def test_same_name_allows_misreads():
+    assert m.same_name(("Smith", "John", "A"), ("Srnith", "John", ""))
+    assert not m.same_name(("Smith", "John", "A"), ("Smith", "Mary", "A"))
+
+
+def test_starts_document():
+    assert not m.starts_document(TRANSCRIPT, texts())                          # no name: continuation
+    assert not m.starts_document(TRANSCRIPT, texts("Srnith, John"))            # same student, type unknown
+    assert m.starts_document(TRANSCRIPT, texts("Jones, Mary"))                 # another student
+    assert m.starts_document(TRANSCRIPT, DEGREE)                               # same student, another type
+    assert m.starts_document(texts(), texts("Jones, Mary"))                    # first name after unnamed pages
+
+
+def test_document_parts_per_document_uses_lookahead_for_a_name():
+    pages = {2: texts(), 3: texts("Jones, Mary")}
+    assert m.document_parts(texts(), pages.__getitem__, 3) == [(1, None, pages[3])]
+    # Page 1 names the document: no other page is read
+    assert m.document_parts(TRANSCRIPT, lambda page: pytest.fail("read page"), 3) == [(1, None, TRANSCRIPT)]
+
+
+def test_document_parts_split_boundaries():
+    jones = texts("Jones, Mary", "Date of Admission\nMay 3, 1975", "", "Degree Received: Arts")
+    pages = {2: texts(), 3: DEGREE, 4: texts(), 5: jones}
+    parts = m.document_parts(TRANSCRIPT, pages.__getitem__, 5, split=True)
+    assert parts == [(1, 2, TRANSCRIPT), (3, 4, DEGREE), (5, 5, jones)]
+
+
+def test_document_parts_split_single_document_is_whole_file():
+    pages = {2: texts(), 3: texts("Smith, John")}
+    assert m.document_parts(TRANSCRIPT, pages.__getitem__, 3, split=True) == [(1, None, TRANSCRIPT)]
+
+
+def test_document_fields():
+    assert m.document_fields(DEGREE) == {
+        "last": "Smith", "first": "John", "middle": "A", "type": "Degrees",
+        "admission_year": "", "graduation_year": "1979",
+    }
+
+
+def test_generate_filename_routes_by_type_and_year():
+    log = lambda message: None   # noqa: E731
+    assert m.generate_filename(*TRANSCRIPT.values(), "scan", log=log) == (
+        "Smith, John A Arts May 3 1975", "Transcripts/1975")
+    assert m.generate_filename(*DEGREE.values(), "scan", log=log) == (
+        "Smith, John A Arts June 12 1979", "Degrees/1979")
+    assert m.generate_filename("", "", "", "", "scan", log=log) == ("scan", "Unprocessed")
@@ -0,0 +1,122 @@
+"""Tests for JobJournal: resuming bulk runs from the output folder's JSONL journal."""
+
+import json
+import os
+
+import pytest
+
+import image_to_pdf as m
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "in" / "scan.png"
+    path.parent.mkdir()
+    path.write_bytes(b"scan")
+    return path
+
+
+@pytest.fixture
+def out(tmp_path):
+    return tmp_path / "out"
+
+
+def finish(journal, source, out, output="Transcripts/1975/Smith.pdf"):
+    (out / output).parent.mkdir(parents=True, exist_ok=True)
+    (out / output).write_bytes(b"%PDF")
+    journal.record(source, "done", output=output, sha256=m.file_digest(source))
+
+
+def test_done_survives_a_restart(source, out):
+    journal = m.JobJournal(out)
+    finish(journal, source, out)
+    journal.close()
+    journal = m.JobJournal(out)
+    assert journal.is_done(source)
+    assert journal.lookup(source)["output"] == "Transcripts/1975/Smith.pdf"
+    journal.close()
+
+
+def test_last_record_wins(source, out):
+    journal = m.JobJournal(out)
+    finish(journal, source, out)
+    journal.record(source, "error", error="boom")
+    assert not journal.is_done(source)
+    journal.close()
+    assert m.JobJournal(out).lookup(source)["status"] == "error"
+
+
+def test_changed_or_missing_output_is_not_done(source, out):
+    journal = m.JobJournal(out)
+    finish(journal, source, out)
+    source.write_bytes(b"a different scan")
+    assert not journal.is_done(source)
+
+    finish(journal, source, out)
+    (out / "Transcripts/1975/Smith.pdf").unlink()
+    assert not journal.is_done(source)
+    journal.close()
+
+
+def test_touched_but_unchanged_source_is_still_done(source, out):
+    journal = m.JobJournal(out)
+    finish(journal, source, out)
+    st = os.stat(source)
+    os.utime(source, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    assert journal.is_done(source)
+    assert journal.lookup(source)["mtime_ns"] == st.st_mtime_ns + 10 ** 9   # refreshed, not hashed again
+    journal.close()
+
+
+def test_discard_partial_removes_outputs_of_a_started_job(source, out):
+    journal = m.JobJournal(out)
+    outputs = ["Transcripts/1975/Smith.pdf", "Degrees/1979/Smith.pdf"]
+    for output in outputs:
+        (out / output).parent.mkdir(parents=True, exist_ok=True)
+        (out / output).write_bytes(b"")
+    journal.record(source, "started", output=outputs)
+    journal.close()
+
+    journal = m.JobJournal(out)
+    journal.discard_partial(source)
+    assert not any((out / output).exists() for output in outputs)
+    journal.close()
+
+
+def test_interrupted_merge_is_remembered_and_its_parts_discarded(source, out):
+    journal = m.JobJournal(out)
+    part = "Degrees/1979/Smith.pdf"
+    (out / part).parent.mkdir(parents=True)
+    (out / part).write_bytes(b"")
+    merge = [{"target": "Students/Smith, John.pdf", "bookmark": "Smith"}]
+    journal.record(source, "merging", output=[part], merge=merge)
+    journal.close()
+
+    journal = m.JobJournal(out)
+    assert not journal.is_done(source)
+    journal.discard_partial(source)
+    assert not (out / part).exists()
+    # Still known after the resumed run journals the source as started again
+    journal.record(source, "started", output=[part])
+    assert journal.interrupted_merge(source) == {("Students/Smith, John.pdf", "Smith")}
+    journal.close()
+
+
+def test_torn_last_line_is_truncated_before_appending(source, out, tmp_path):
+    journal = m.JobJournal(out)
+    finish(journal, source, out)
+    journal.close()
+    intact = journal.path.read_bytes()
+    with open(journal.path, "ab") as fh:
+        fh.write(b'{"source": "half a rec')   # crash mid-write
+
+    other = tmp_path / "in" / "other.png"
+    other.write_bytes(b"other")
+    journal = m.JobJournal(out)
+    assert journal.path.read_bytes() == intact
+    journal.record(other, "error", error="boom")
+    journal.close()
+
+    lines = journal.path.read_bytes().splitlines()
+    assert [json.loads(line)["source"] for line in lines] == [str(source), str(other)]
+    assert m.JobJournal(out).is_done(source)
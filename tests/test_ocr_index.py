@@ -0,0 +1,136 @@
+"""Tests for OCRIndex: cached region text, stale-file detection and fuzzy keyword lookup."""
+
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+import image_to_pdf as m
+
+NAME = (337, 203, 727, 261)
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = m.OCRIndex(tmp_path / "index.sqlite3")
+    yield index
+    index.close()
+
+
+@pytest.fixture
+def scans(tmp_path):
+    folder = tmp_path / "scans"
+    folder.mkdir()
+    paths = {}
+    for stem in ("smith", "jones", "williams"):
+        paths[stem] = str(folder / f"{stem}.png")
+        with open(paths[stem], "wb") as fh:
+            fh.write(stem.encode())
+    return paths
+
+
+def index_names(index, scans, texts):
+    for stem, text in texts.items():
+        index.put_text(scans[stem], NAME, text)
+
+
+@pytest.mark.parametrize("a, b, limit, distance", [
+    ("smith", "smith", 1, 0),
+    ("smith", "smyth", 1, 1),
+    ("smith", "smiths", 1, 1),
+    ("smith", "jones", 1, 2),     # gave up past the limit
+    ("williams", "wiliams", 2, 1),
+    ("lee", "leeson", 1, 2),      # length difference alone exceeds the limit
+])
+def test_edit_distance(a, b, limit, distance):
+    assert m.edit_distance(a, b, limit) == distance
+
+
+def test_region_key():
+    assert m.OCRIndex.region_key(NAME) == "337,203,727,261"
+    assert m.OCRIndex.region_key((337.9, 203, 727, 261)) == "337,203,727,261"
+    assert m.OCRIndex.region_key("transcript:name") == "transcript:name"
+
+
+def test_text_for_ocrs_once(index, scans):
+    calls = []
+
+    def ocr():
+        calls.append(1)
+        return "Smith, John"
+
+    assert index.text_for(scans["smith"], NAME, ocr) == ("Smith, John", False)
+    assert index.text_for(scans["smith"], NAME, ocr) == ("Smith, John", True)
+    assert len(calls) == 1
+
+
+def test_text_is_shared_by_identical_copies(index, scans, tmp_path):
+    index.put_text(scans["smith"], NAME, "Smith, John")
+    copy = str(tmp_path / "copy.png")
+    shutil.copy(scans["smith"], copy)
+    assert index.get_text(copy, NAME) == "Smith, John"
+
+
+def test_missing_reports_new_changed_and_deleted_files(index, scans):
+    assert sorted(index.missing(scans.values(), NAME)) == sorted(scans.values())
+    index_names(index, scans, {"smith": "Smith, John", "jones": "Jones, Mary", "williams": "Williams, Ann"})
+    assert index.missing(scans.values(), NAME) == []
+    assert index.missing(scans.values(), "other-region") == list(scans.values())
+
+    with open(scans["jones"], "ab") as fh:
+        fh.write(b" rescanned")
+    os.remove(scans["williams"])
+    assert sorted(index.missing(scans.values(), NAME)) == sorted([scans["jones"], scans["williams"]])
+
+
+def test_missing_accepts_a_set_of_region_keys(index, scans):
+    index.put_text(scans["smith"], "transcript:search", "Smith, John")
+    index.put_text(scans["jones"], "other:search", "Jones, Mary")
+    keys = {"transcript:search", "other:search"}
+    assert index.missing([scans["smith"], scans["jones"], scans["williams"]], keys) == [scans["williams"]]
+
+
+def test_match_keywords_tolerates_misreads(index, scans):
+    index_names(index, scans, {"smith": "Srnith, J0hn", "jones": "Jones, Mary", "williams": "Wiliams, John"})
+    scores = index.match_keywords(NAME, ["John", "Smith"], scans.values())
+    assert scores == {scans["smith"]: 2, scans["williams"]: 1}
+    assert index.match_keywords(NAME, ["Williams"], scans.values()) == {scans["williams"]: 1}
+    assert index.match_keywords(NAME, ["Brown"], scans.values()) == {}
+
+
+def test_match_keywords_agrees_with_count_keyword_hits(index, scans):
+    texts = {"smith": "Smith-Jones, Mary", "jones": "Jones, Mary Lee", "williams": "Lea, Ann"}
+    index_names(index, scans, texts)
+    for keywords in (["Mary-Jane"], ["Lee"], ["Jones", "Mary"], ["Ann"], ["ma"]):
+        expected = {scans[stem]: m.count_keyword_hits(keywords, text) for stem, text in texts.items()}
+        expected = {path: hits for path, hits in expected.items() if hits}
+        assert index.match_keywords(NAME, keywords, scans.values()) == expected, keywords
+
+
+def test_match_keywords_only_returns_given_paths(index, scans):
+    index_names(index, scans, {"smith": "Smith, John", "jones": "Smith, Mary"})
+    assert index.match_keywords(NAME, ["Smith"], [scans["jones"]]) == {scans["jones"]: 1}
+
+
+def test_reindexing_replaces_old_tokens(index, scans):
+    index.put_text(scans["smith"], NAME, "Smith, John")
+    index.put_text(scans["smith"], NAME, "Jones, Mary")
+    assert index.match_keywords(NAME, ["Smith"], scans.values()) == {}
+    assert index.match_keywords(NAME, ["Mary"], scans.values()) == {scans["smith"]: 1}
+
+
+def test_indexes_without_token_tables_are_tokenized_on_open(tmp_path, scans):
+    db = tmp_path / "old.sqlite3"
+    index = m.OCRIndex(db)
+    index.put_text(scans["smith"], NAME, "Smith, John")
+    index.close()
+    conn = sqlite3.connect(db)
+    with conn:
+        conn.execute("DELETE FROM region_tokens")
+        conn.execute("DELETE FROM token_trigrams")
+    conn.close()
+
+    index = m.OCRIndex(db)
+    assert index.match_keywords(NAME, ["Smith"], scans.values()) == {scans["smith"]: 1}
+    index.close()
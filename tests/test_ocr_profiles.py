@@ -0,0 +1,97 @@
+"""Tests for OCR profiles: ocr_profiles.json validation and the settings passed to ocrmypdf."""
+
+import json
+
+import pytest
+
+import image_to_pdf as m
+
+
+def load(tmp_path, data):
+    path = tmp_path / "ocr_profiles.json"
+    path.write_text(data if isinstance(data, str) else json.dumps(data))
+    logged = []
+    return m.load_ocr_profiles(path, log=logged.append), logged
+
+
+def test_builtin_profiles_without_a_config_file(tmp_path):
+    profiles, default = m.load_ocr_profiles(tmp_path / "missing.json", log=pytest.fail)
+    assert default == "balanced"
+    assert profiles == m.OCR_PROFILES
+    assert profiles is not m.OCR_PROFILES
+
+
+def test_user_profiles_start_from_their_base(tmp_path):
+    (profiles, default), logged = load(tmp_path, {
+        "default": "scanner",
+        "profiles": {
+            "scanner": {"base": "fast", "jpeg_quality": 60},
+            "plain": {"optimize": 0},
+            "archival": {"base": "archival", "tesseract_timeout": 60},
+        },
+    })
+    assert logged == []
+    assert default == "scanner"
+    assert profiles["scanner"] == dict(m.OCR_PROFILES["fast"], jpeg_quality=60)
+    assert profiles["plain"] == dict(m.OCR_PROFILES["balanced"], optimize=0)
+    assert profiles["archival"]["tesseract_timeout"] == 60   # a built-in profile can be replaced
+    assert m.OCR_PROFILES["archival"]["tesseract_timeout"] == 600
+
+
+def test_invalid_profiles_are_skipped_with_a_warning(tmp_path):
+    (profiles, default), logged = load(tmp_path, {
+        "default": "nope",
+        "profiles": {
+            "typo": {"optimise": 2},
+            "orphan": {"base": "missing"},
+            "list": ["fast"],
+            "ok": {"base": "fast"},
+        },
+    })
+    assert set(profiles) == set(m.OCR_PROFILES) | {"ok"}
+    assert default == "balanced"
+    assert logged == [
+        "⚠ Skipping OCR profile 'typo' in ocr_profiles.json: unknown setting(s): optimise",
+        "⚠ Skipping OCR profile 'orphan' in ocr_profiles.json: unknown base profile 'missing'",
+        logged[2],
+        "⚠ Unknown default OCR profile 'nope' in ocr_profiles.json; using balanced.",
+    ]
+    assert logged[2].startswith("⚠ Skipping OCR profile 'list' in ocr_profiles.json:")
+
+
+@pytest.mark.parametrize("content", ["{not json", "[1, 2]"])
+def test_unreadable_file_falls_back_to_the_builtins(tmp_path, content):
+    (profiles, default), logged = load(tmp_path, content)
+    assert (profiles, default) == (m.OCR_PROFILES, "balanced")
+    assert len(logged) == 1 and logged[0].startswith("⚠ Ignoring ocr_profiles.json:")
+
+
+def test_warnings_stay_off_stdout(tmp_path, capsys):
+    path = tmp_path / "ocr_profiles.json"
+    path.write_text("{not json")
+    m.load_ocr_profiles(path)
+    assert capsys.readouterr().out == ""
+
+
+@pytest.fixture
+def configured(monkeypatch):
+    monkeypatch.setattr(m, "_ocr_profiles", (dict(m.OCR_PROFILES, small={"optimize": 3}), "small"))
+
+
+def test_ocr_options_uses_the_configured_default(configured, monkeypatch):
+    monkeypatch.setattr(m.shutil, "which", lambda name: "/usr/bin/" + name)
+    assert m.ocr_options(log=pytest.fail) == {"optimize": 3}
+    assert m.ocr_options("fast", log=pytest.fail) == m.OCR_PROFILES["fast"]
+
+
+def test_ocr_options_without_pngquant(configured, monkeypatch):
+    monkeypatch.setattr(m.shutil, "which", lambda name: None)
+    logged = []
+    assert m.ocr_options("archival", log=logged.append)["optimize"] == 1
+    assert m.OCR_PROFILES["archival"]["optimize"] == 3
+    assert logged == ["⚠ pngquant not found: OCR profile 'archival' uses --optimize 1 instead of 3."]
+
+
+def test_ocr_options_unknown_profile(configured):
+    with pytest.raises(KeyError):
+        m.ocr_options("nope")
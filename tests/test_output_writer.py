@@ -0,0 +1,138 @@
+"""Tests for OutputWriter: reserving, routing, discarding and merging output PDFs."""
+
+import pikepdf
+import pytest
+
+import image_to_pdf as m
+
+DEGREE = {"name": "Smith, John", "admission": "", "graduation": "May 3, 1975",
+          "degree": "Graduated received\nDegree received: Bachelor of Arts"}
+FIELDS = {"last": "Smith", "first": "John", "middle": "", "type": "Degrees",
+          "admission_year": "", "graduation_year": "1975"}
+
+
+def quiet(message):
+    pass
+
+
+@pytest.fixture
+def writer(tmp_path):
+    return m.OutputWriter(tmp_path / "out")
+
+
+def write_pages(path, count):
+    pdf = pikepdf.new()
+    for _ in range(count):
+        pdf.add_blank_page()
+    pdf.save(path)
+
+
+def routed(writer, pages=1):
+    output_file, subfolder = writer.route(DEGREE, "scan.png", log=quiet)
+    write_pages(output_file, pages)
+    return f"{subfolder}/{output_file.name}"
+
+
+def bookmarks(path):
+    with pikepdf.open(path) as pdf, pdf.open_outline() as outline:
+        return [(item.title, len(pdf.pages)) for item in outline.root]
+
+
+def test_reserve_creates_the_file_and_suffixes_taken_names(writer):
+    first = writer.reserve("Unprocessed", "scan")
+    second = writer.reserve("Unprocessed", "scan")
+    assert first.name == "scan.pdf" and first.exists()
+    assert second.name == "scan_1.pdf" and second.exists()
+
+
+def test_reserve_skips_names_on_disk_and_made_by_other_writers(writer):
+    (writer.root / "Unprocessed").mkdir(parents=True)
+    (writer.root / "Unprocessed" / "SCAN.pdf").write_bytes(b"%PDF")
+    assert writer.reserve("Unprocessed", "scan").name == "scan_1.pdf"
+    # Another process takes the next name after this writer listed the folder
+    (writer.root / "Unprocessed" / "scan_2.pdf").write_bytes(b"%PDF")
+    assert writer.reserve("Unprocessed", "scan").name == "scan_3.pdf"
+
+
+def test_route_places_a_degree_by_year(writer):
+    output_file, subfolder = writer.route(DEGREE, "scan.png", log=quiet)
+    assert subfolder == "Degrees/1975"
+    assert output_file == writer.root / "Degrees" / "1975" / "Smith, John Bachelor of Arts May 3 1975.pdf"
+
+
+def test_discard_frees_the_name_and_removes_the_empty_folder(writer):
+    output_file = writer.reserve("Degrees/1975", "scan")
+    writer.discard(output_file)
+    assert not (writer.root / "Degrees").exists()
+    assert writer.root.exists()
+    # The folder is made again for the next reservation
+    assert writer.reserve("Degrees/1975", "scan").name == "scan.pdf"
+
+
+def test_discard_keeps_a_folder_with_other_files(writer):
+    keep = writer.reserve("Degrees/1975", "keep")
+    writer.discard(writer.reserve("Degrees/1975", "scan"))
+    assert keep.exists()
+
+
+def test_merge_appends_with_a_bookmark_and_removes_the_routed_pdf(writer):
+    first = routed(writer, pages=2)
+    assert writer.merge(first, FIELDS) == "Students/Smith, John.pdf"
+    second = routed(writer, pages=1)
+    writer.merge(second, FIELDS)
+    target = writer.root / "Students" / "Smith, John.pdf"
+    with pikepdf.open(target) as pdf:
+        assert len(pdf.pages) == 3
+    assert [title for title, _ in bookmarks(target)] == [m.OutputWriter.bookmark(first)] * 2
+    assert not (writer.root / "Degrees").exists()
+
+
+def test_merge_needs_a_name(writer):
+    output = routed(writer)
+    assert writer.merge(output, dict(FIELDS, first="")) is None
+    assert (writer.root / output).exists()
+
+
+def test_resumed_merge_skips_a_document_already_bookmarked(writer):
+    output = routed(writer, pages=2)
+    writer.merge(output, FIELDS)
+    # The run died after the append; the resumed run converts the scan again
+    output = routed(writer, pages=2)
+    assert writer.merge(output, FIELDS, resumed=True) == "Students/Smith, John.pdf"
+    with pikepdf.open(writer.root / "Students" / "Smith, John.pdf") as pdf:
+        assert len(pdf.pages) == 2
+    assert not (writer.root / output).exists()
+
+
+def test_resumed_merge_appends_a_document_not_yet_bookmarked(writer):
+    output = routed(writer, pages=2)
+    assert writer.merge(output, FIELDS, resumed=True) == "Students/Smith, John.pdf"
+    with pikepdf.open(writer.root / "Students" / "Smith, John.pdf") as pdf:
+        assert len(pdf.pages) == 2
+
+
+def test_engine_journals_the_merge_before_appending(tmp_path, writer):
+    source = tmp_path / "scan.png"
+    source.write_bytes(b"scan")
+    output = routed(writer)
+    journal = m.JobJournal(writer.root)
+    engine = m.ConversionEngine(log=quiet)
+    engine.writer = writer
+    engine.merge_students = True
+    seen = []
+    real_merge = writer.merge
+
+    def merge(*args, **kwargs):
+        seen.append(journal.lookup(source)["status"])
+        return real_merge(*args, **kwargs)
+
+    writer.merge = merge
+    result = {"ok": True, "outputs": [output], "messages": [], "timings": {},
+              "documents": [{"output": output, "fields": FIELDS}]}
+    engine._merge_documents(result, journal, source)
+    journal.close()
+    assert seen == ["merging"]
+    # As a resumed run would find it if this one died now
+    journal = m.JobJournal(writer.root)
+    assert journal.interrupted_merge(source) == {("Students/Smith, John.pdf", m.OutputWriter.bookmark(output))}
+    journal.close()
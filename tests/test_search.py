@@ -0,0 +1,82 @@
+"""Tests for ConversionEngine's name search, with Tesseract replaced by canned text."""
+
+import pytest
+from PIL import Image
+
+import image_to_pdf as m
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    folder = tmp_path / "scans"
+    folder.mkdir()
+    names = {"smith.png": "Srnith, John", "jones.png": "Jones, Mary", "johnson.png": "Smith, Mary"}
+    for shade, file in enumerate(names, start=200):   # distinct contents: the index is keyed by content hash
+        Image.new("L", m.REFERENCE_PAGE_SIZE, shade).save(folder / file, dpi=(300, 300))
+
+    # One region OCR per file; tell the files apart by the order they are read in
+    order = []
+    monkeypatch.setattr(m, "open_page", lambda path: order.append(path) or Image.new("L", m.REFERENCE_PAGE_SIZE))
+    monkeypatch.setattr(m.pytesseract, "image_to_string",
+                        lambda img, *args, **kwargs: names[m.os.path.basename(order[-1])])
+
+    events = []
+    engine = m.ConversionEngine(input_path=str(folder), log=lambda message: None, progress=events.append)
+    engine._ocr_index = m.OCRIndex(tmp_path / "index.sqlite3")
+    engine.events = events
+    yield engine
+    if engine._ocr_index is not None:
+        engine._ocr_index.close()
+
+
+def scores(events, kind):
+    return {m.os.path.basename(event["path"]): event["score"] for event in events if event["event"] == kind}
+
+
+def test_index_search_reports_each_files_hits(engine):
+    matches = engine.search("John Smith")
+    assert [m.os.path.basename(path) for path in matches] == ["smith.png"]
+    assert scores(engine.events, "search_progress") == {"smith.png": 2, "jones.png": 0, "johnson.png": 1}
+    assert scores(engine.events, "search_match") == {"smith.png": 2, "johnson.png": 1}
+
+
+def test_second_search_is_answered_from_the_index(engine):
+    engine.search("Mary")
+    engine.events.clear()
+    matches = engine.search("Mary")
+    assert sorted(m.os.path.basename(path) for path in matches) == ["johnson.png", "jones.png"]
+    assert scores(engine.events, "search_progress") == {}    # nothing OCRed again
+    assert scores(engine.events, "search_match") == {"jones.png": 1, "johnson.png": 1}
+
+
+def test_search_without_index_reports_the_same_hits(engine):
+    engine._ocr_index.close()
+    engine._ocr_index, engine._ocr_index_failed = None, True
+    engine.search("John Smith")
+    assert scores(engine.events, "search_progress") == {"smith.png": 2, "jones.png": 0, "johnson.png": 1}
+
+
+def index_dates(engine, dates):
+    """Put admission / graduation text for each file straight into the OCR index."""
+    folder = m.Path(engine.input_path)
+    for file, (admission, graduation) in dates.items():
+        profile = m.get_templates().detect(folder / file)[0]
+        engine._ocr_index.put_text(str(folder / file), profile.region_key("admission"), admission)
+        engine._ocr_index.put_text(str(folder / file), profile.region_key("graduation"), graduation)
+    return [str(folder / file) for file in dates]
+
+
+def test_year_filter_reads_only_the_date_fields(engine, monkeypatch):
+    files = index_dates(engine, {
+        "smith.png": ("Date of Admission\nSept 4, 1975", "June 12, 1979"),
+        "jones.png": ("9/4/72", ""),
+        "johnson.png": ("illegible", ""),
+    })
+    monkeypatch.setattr(m.pytesseract, "image_to_string", lambda *args, **kwargs: pytest.fail("page OCR"))
+    logged = []
+    engine.log = logged.append
+
+    assert engine.search_images(files, "79") == [files[0]]
+    assert engine.search_images(files, "1972") == [files[1]]
+    assert [line for line in logged if "johnson.png" in line] == [
+        "  ⚠ No date found in the date fields of johnson.png — left out of the year filter's results."] * 2
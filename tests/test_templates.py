@@ -0,0 +1,87 @@
+"""Tests for template profiles: normalized regions, loading and per-file detection."""
+
+import json
+
+import pytest
+from PIL import Image
+
+import image_to_pdf as m
+
+A4_REGIONS = {"name": [0.1, 0.05, 0.8, 0.08], "admission": [0.1, 0.08, 0.4, 0.12],
+              "graduation": [0.4, 0.08, 0.8, 0.12], "degree": [0.1, 0.12, 0.8, 0.16]}
+
+
+def profile_file(folder, name, **match):
+    path = folder / f"{name}.json"
+    path.write_text(json.dumps({"name": name, "regions": A4_REGIONS, "match": match}))
+    return path
+
+
+def scan(folder, name, size, dpi):
+    path = folder / name
+    Image.new("L", size, 255).save(path, dpi=(dpi, dpi))
+    return path
+
+
+def test_builtin_profile_scales_the_reference_regions():
+    profile = m.TemplateRegistry().default
+    assert profile.boxes(m.REFERENCE_PAGE_SIZE) == m.FIELD_REGIONS
+    half = profile.boxes((m.REFERENCE_PAGE_SIZE[0] // 2, m.REFERENCE_PAGE_SIZE[1] // 2))
+    assert all(abs(a - b / 2) <= 1 for a, b in zip(half["name"], m.FIELD_REGIONS["name"]))
+    assert profile.search_box(m.REFERENCE_PAGE_SIZE) == m.SEARCH_NAME_REGION
+
+
+def test_region_key_is_resolution_independent():
+    profile = m.TemplateRegistry().default
+    assert profile.region_key("name").startswith("name@0.1322,")
+    assert profile.region_key("search") != profile.region_key("name")
+
+
+def test_load_skips_bad_files_and_logs_why(tmp_path):
+    profile_file(tmp_path, "a4")
+    (tmp_path / "broken.json").write_text("{not json")
+    (tmp_path / "partial.json").write_text(json.dumps({"name": "partial", "regions": {"name": [0, 0, 1, 1]}}))
+    (tmp_path / "notes.txt").write_text("ignored")
+    logged = []
+    registry = m.TemplateRegistry.load([tmp_path, tmp_path / "missing"], log=logged.append)
+    assert registry.names() == ["a4", "transcript"]   # the built-in profile is always last
+    assert len(logged) == 2
+    assert logged[0].startswith("⚠ Skipping template broken.json:")
+    assert "missing region(s): admission, degree, graduation" in logged[1]
+
+
+def test_load_logs_nothing_to_stdout(tmp_path, capsys):
+    (tmp_path / "broken.json").write_text("{not json")
+    m.TemplateRegistry.load([tmp_path])
+    assert capsys.readouterr().out == ""
+
+
+def test_detect_by_aspect_and_dpi(tmp_path):
+    profile_file(tmp_path, "a4", aspect=[0.70, 0.71], dpi=[150, 300])
+    registry = m.TemplateRegistry.load([tmp_path], log=pytest.fail)
+    a4 = scan(tmp_path, "a4.png", (1240, 1754), 150)
+    letter = scan(tmp_path, "letter.png", (1275, 1650), 150)
+    a4_hires = scan(tmp_path, "a4_600.png", (1240, 1754), 600)
+
+    assert registry.detect(a4) == (registry.get("a4"), (1240, 1754))
+    assert registry.detect(letter)[0].name == "transcript"
+    assert registry.detect(a4_hires)[0].name == "transcript"   # outside the DPI range
+    assert registry.detect(letter, "a4")[0].name == "a4"       # a named profile skips detection
+
+
+def test_detect_reads_the_header_only_when_several_fit(tmp_path, monkeypatch):
+    header = {"region": [0, 0, 1, 0.05]}
+    profile_file(tmp_path, "north", aspect=[0.70, 0.71], header=dict(header, keywords=["north campus"]))
+    profile_file(tmp_path, "south", aspect=[0.70, 0.71], header=dict(header, keywords=["south campus"]))
+    registry = m.TemplateRegistry.load([tmp_path], log=pytest.fail)
+    page = scan(tmp_path, "page.png", (1240, 1754), 150)
+
+    monkeypatch.setattr(m.pytesseract, "image_to_string", lambda img: "SOUTH CAMPUS Registrar")
+    assert registry.detect(page)[0].name == "south"
+    monkeypatch.setattr(m.pytesseract, "image_to_string", lambda img: "illegible")
+    assert registry.detect(page)[0].name == "transcript"   # no header matched: fall back past the header profiles
+
+
+def test_unknown_template_name():
+    with pytest.raises(KeyError):
+        m.TemplateRegistry().get("nope")
@@ -0,0 +1,69 @@
+"""Tests for ThumbnailCache: size accounting and least-recently-used eviction."""
+
+import os
+
+import image_to_pdf as m
+
+
+def scans(folder, count):
+    paths = []
+    for n in range(count):
+        path = folder / f"scan{n}.png"
+        path.write_bytes(b"scan %d" % n)
+        paths.append(path)
+    return paths
+
+
+def age(cache, path, seconds):
+    """Make path's entry look last used `seconds` ago."""
+    entry = cache._entry(path)
+    st = os.stat(entry)
+    os.utime(entry, ns=(st.st_atime_ns, st.st_mtime_ns - seconds * 10 ** 9))
+
+
+def test_put_and_get(tmp_path):
+    cache = m.ThumbnailCache(tmp_path / "cache", max_bytes=1000)
+    scan, = scans(tmp_path, 1)
+    assert cache.get(scan) is None
+    cache.put(scan, b"P6 thumbnail")
+    assert cache.get(scan) == b"P6 thumbnail"
+    assert cache.thumbnail_for(scan, make_func=lambda path, size: b"new") == (b"P6 thumbnail", True)
+
+
+def test_changed_scan_misses(tmp_path):
+    cache = m.ThumbnailCache(tmp_path / "cache", max_bytes=1000)
+    scan, = scans(tmp_path, 1)
+    cache.put(scan, b"old")
+    scan.write_bytes(b"rescanned page")
+    assert cache.thumbnail_for(scan, make_func=lambda path, size: b"new") == (b"new", False)
+
+
+def test_overwriting_an_entry_counts_its_size_once(tmp_path):
+    cache = m.ThumbnailCache(tmp_path / "cache", max_bytes=250)
+    first, second = scans(tmp_path, 2)
+    cache.put(first, b"x" * 120)
+    for _ in range(3):
+        cache.put(second, b"y" * 120)
+    assert cache._size == 240
+    assert cache.get(first) is not None   # nothing evicted: the cache holds 240 of 250 bytes
+
+
+def test_eviction_removes_least_recently_used(tmp_path):
+    cache = m.ThumbnailCache(tmp_path / "cache", max_bytes=300)
+    paths = scans(tmp_path, 3)
+    for n, path in enumerate(paths):
+        cache.put(path, b"z" * 100)
+        age(cache, path, 100 - n)
+    assert cache.get(paths[0]) is not None   # refreshed: now the most recently used
+
+    cache.put(tmp_path / "scan2.png", b"z" * 150)   # over the cap
+    assert cache.get(paths[1]) is None
+    assert cache.get(paths[0]) is not None
+    assert cache._size == 250
+
+
+def test_size_is_read_back_from_disk(tmp_path):
+    cache = m.ThumbnailCache(tmp_path / "cache", max_bytes=1000)
+    scan, = scans(tmp_path, 1)
+    cache.put(scan, b"x" * 42)
+    assert m.ThumbnailCache(tmp_path / "cache", max_bytes=1000)._size == 42
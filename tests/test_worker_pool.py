@@ -0,0 +1,36 @@
+"""Tests for WorkerPool: a worker dying restarts the pool instead of failing every later job."""
+
+import os
+
+import pytest
+
+import image_to_pdf as m
+
+
+@pytest.fixture
+def pool():
+    logged = []
+    with m.WorkerPool(1, log=logged.append) as pool:
+        pool.logged = logged
+        yield pool
+
+
+def test_run_returns_the_result(pool):
+    assert pool.run(abs, -3) == 3
+    assert pool.logged == []
+
+
+def test_run_retries_once_then_raises(pool):
+    with pytest.raises(m.BrokenProcessPool):
+        pool.run(os._exit, 1)   # kills the worker on both attempts
+    assert len(pool.logged) == 1   # the next job restarts it again
+    assert pool.run(abs, -2) == 2
+
+
+def test_jobs_after_a_dead_worker_run_on_a_fresh_pool(pool):
+    broken = pool.submit(os._exit, 1)
+    with pytest.raises(m.BrokenProcessPool):
+        broken.result()
+    assert pool.submit(abs, -4).result() == 4
+    assert pool.run(abs, -5) == 5
+    assert pool.logged == ["⚠ A worker process died — restarting the worker pool."]